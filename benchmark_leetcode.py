@@ -0,0 +1,222 @@
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import tempfile
+import tracemalloc
+from contextlib import redirect_stdout
+from datetime import datetime
+from typing import List, Dict, Any, Callable
+
+import test_leetcode_auth as leetcode
+from test_leetcode_auth import LeetCodeSubmissionFetcher, SubmissionColumns, TIMESTAMP_NORMALIZER
+
+
+DEFAULT_SIZES = [1000, 10000, 100000, 1000000]
+LANGUAGES = [('cpp', 'C++'), ('python3', 'Python3'), ('java', 'Java'), ('mysql', 'MySQL'), ('javascript', 'JavaScript')]
+STATUSES = [(10, 'Accepted'), (11, 'Wrong Answer'), (14, 'Time Limit Exceeded'), (15, 'Runtime Error'), (20, 'Compile Error')]
+STATUS_WEIGHTS = [60, 20, 8, 8, 4]
+
+
+def generate_history(size: int, seed: int = 42, problems: int = 3000, overlap: float = 0.1) -> Dict[str, List[Dict]]:
+    """Synthetic history in both API schemas, newest first
+
+    Roughly 20% of rows are GraphQL-shaped accepted submissions, the rest REST-shaped
+    rows of any status; `overlap` of the GraphQL rows also appear in the REST
+    rows, as they do in real fetches.
+    """
+    rng = random.Random(seed)
+    now = int(time.time())
+    graphql, rest = [], []
+
+    for i in range(size):
+        submission_id = 2000000000 - i
+        timestamp = now - i * 300 - rng.randint(0, 299)
+        problem = rng.randrange(problems)
+        slug = f'problem-{problem}'
+        title = f'Problem {problem}'
+        lang, lang_name = rng.choice(LANGUAGES)
+
+        if rng.random() < 0.2:
+            graphql.append({
+                'id': str(submission_id), 'title': title, 'titleSlug': slug, 'timestamp': str(timestamp),
+                'statusDisplay': 'Accepted', 'lang': lang, 'runtime': f'{rng.randint(0, 500)} ms',
+                'url': f'/submissions/detail/{submission_id}/', 'isPending': 'Not Pending',
+                'memory': f'{rng.uniform(5, 60):.1f} MB', 'topicTags': [], '_source': 'graphql'
+            })
+            if rng.random() >= overlap:
+                continue
+            status, status_display = STATUSES[0]
+        else:
+            status, status_display = rng.choices(STATUSES, STATUS_WEIGHTS)[0]
+
+        rest.append({
+            'id': submission_id, 'question_id': problem, 'lang': lang, 'lang_name': lang_name,
+            'timestamp': timestamp, 'status': status, 'status_display': status_display,
+            'runtime': f'{rng.randint(0, 500)} ms', 'url': f'/submissions/detail/{submission_id}/',
+            'is_pending': 'Not Pending', 'title': title, 'memory': f'{rng.uniform(5, 60):.1f} MB',
+            'code': '', 'title_slug': slug, 'has_notes': False, 'flag_type': 1, '_source': 'rest'
+        })
+
+    return {'graphql': graphql, 'rest': rest}
+
+
+def measure(func: Callable, track_memory: bool) -> Dict[str, Any]:
+    """Wall/CPU time of one call, plus peak traced memory from a second call if requested"""
+    with open(os.devnull, 'w') as devnull, redirect_stdout(devnull):
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        func()
+        result = {
+            'wall_seconds': round(time.perf_counter() - wall_start, 6),
+            'cpu_seconds': round(time.process_time() - cpu_start, 6)
+        }
+
+        if track_memory:
+            tracemalloc.start()
+            try:
+                func()
+                result['peak_memory_bytes'] = tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+
+    return result
+
+
+def benchmark_size(size: int, track_memory: bool = True, fetch: bool = False, seed: int = 42) -> Dict[str, Any]:
+    """Time every pipeline stage over a synthetic history of `size` submissions"""
+    history = generate_history(size, seed)
+    graphql, rest = history['graphql'], history['rest']
+    fetcher = LeetCodeSubmissionFetcher()
+    stages = {}
+
+    raw_timestamps = [sub['timestamp'] for sub in graphql + rest]
+
+    def timestamps():
+        TIMESTAMP_NORMALIZER.cache.clear()
+        for value in raw_timestamps:
+            fetcher.fix_timestamp(value)
+
+    stages['fix_timestamp'] = measure(timestamps, track_memory)
+    stages['merge'] = measure(lambda: fetcher.smart_merge_submissions(graphql, rest), track_memory)
+
+    with open(os.devnull, 'w') as devnull, redirect_stdout(devnull):
+        merged = fetcher.smart_merge_submissions(graphql, rest)
+    merged.sort(key=lambda x: int(x.get('timestamp', 0)), reverse=True)
+
+    stages['analyze'] = measure(lambda: fetcher.analyze_comprehensive_data(merged), track_memory)
+    if leetcode.np is not None:
+        stages['analyze_columnar'] = measure(lambda: SubmissionColumns(merged).to_aggregator().to_dict(),
+                                             track_memory)
+
+    with open(os.devnull, 'w') as devnull, redirect_stdout(devnull):
+        analysis = fetcher.analyze_comprehensive_data(merged)
+
+    with tempfile.TemporaryDirectory() as output_dir:
+        cwd = os.getcwd()
+        os.chdir(output_dir)
+        try:
+            stages['save'] = measure(lambda: fetcher.save_enhanced_data('benchmark', None, merged, analysis),
+                                     track_memory)
+        finally:
+            os.chdir(cwd)
+
+    if fetch:
+        stages['fetch'] = benchmark_fetch(graphql, rest, track_memory)
+
+    return {
+        'size': size,
+        'graphql_rows': len(graphql),
+        'rest_rows': len(rest),
+        'merged_rows': len(merged),
+        'stages': stages
+    }
+
+
+def benchmark_fetch(graphql: List[Dict], rest: List[Dict], track_memory: bool) -> Dict[str, Any]:
+    """Fetch the REST history from a local mock server"""
+    from leetcode_mock_server import LeetCodeFixture, MockLeetCodeServer
+
+    strip = lambda sub: {key: value for key, value in sub.items() if key != '_source'}
+    fixture = LeetCodeFixture('benchmark', None, [strip(sub) for sub in graphql[:200]], [strip(sub) for sub in rest])
+    server = MockLeetCodeServer(fixture).start()
+
+    try:
+        fetcher = LeetCodeSubmissionFetcher()
+        fetcher.base_url = server.base_url
+        fetcher.rate_limit_delay = 0
+        fetcher.create_authenticated_session({'LEETCODE_SESSION': 'benchmark'})
+        pages = (len(rest) + 19) // 20
+        result = measure(lambda: fetcher.fetch_rest_pages_concurrent(max_pages=pages, page_size=20), track_memory)
+        result['pages_per_sec'] = round(fetcher.last_fetch_stats.get('pages_per_sec', 0), 2)
+        return result
+    finally:
+        server.stop()
+
+
+def compare_results(results: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """Stages whose wall time grew by more than `threshold` x versus the baseline run"""
+    baseline_runs = {run['size']: run for run in baseline.get('runs', [])}
+    regressions = []
+
+    for run in results['runs']:
+        previous = baseline_runs.get(run['size'])
+        if not previous:
+            continue
+        for stage, stats in run['stages'].items():
+            before = previous['stages'].get(stage, {}).get('wall_seconds')
+            if before and stats['wall_seconds'] > before * threshold:
+                regressions.append(f"{stage} @ {run['size']:,}: {before:.3f}s -> {stats['wall_seconds']:.3f}s "
+                                   f"({stats['wall_seconds'] / before:.2f}x)")
+
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the fetch/merge/analyze/save stages at scale")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help="History sizes to benchmark")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--no-memory', action='store_true', help="Skip the tracemalloc peak-memory pass")
+    parser.add_argument('--fetch', action='store_true', help="Also benchmark REST paging against the mock server")
+    parser.add_argument('--output', default='benchmark_results.json', help="Where to write JSON results")
+    parser.add_argument('--baseline', help="Earlier results file to compare against")
+    parser.add_argument('--threshold', type=float, default=1.2, help="Slowdown factor reported as a regression")
+    args = parser.parse_args()
+
+    results = {
+        'timestamp': datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'numpy': leetcode.np.__version__ if leetcode.np is not None else None,
+        'runs': []
+    }
+
+    print("⏱️ LeetCode pipeline benchmark")
+    for size in args.sizes:
+        run = benchmark_size(size, track_memory=not args.no_memory, fetch=args.fetch, seed=args.seed)
+        results['runs'].append(run)
+
+        print(f"\n📊 {size:,} submissions ({run['merged_rows']:,} after merge)")
+        for stage, stats in run['stages'].items():
+            memory = f", peak {stats['peak_memory_bytes'] / 1024 / 1024:.1f} MB" if 'peak_memory_bytes' in stats else ""
+            print(f"   {stage:<18} {stats['wall_seconds']:>9.3f}s wall {stats['cpu_seconds']:>9.3f}s cpu{memory}")
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    print(f"\n💾 Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            regressions = compare_results(results, json.load(f), args.threshold)
+        if regressions:
+            print(f"\n❌ {len(regressions)} regressions over {args.threshold:.2f}x:")
+            for regression in regressions:
+                print(f"   {regression}")
+            sys.exit(1)
+        print("\n✅ No regressions against the baseline")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+import os
+
+import pytest
+
+from leetcode_mock_server import LeetCodeFixture, MockLeetCodeServer
+from test_leetcode_auth import LeetCodeSubmissionFetcher
+
+SNAPSHOT_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'shaMayank_comprehensive_leetcode_data.json')
+
+
+@pytest.fixture(autouse=True)
+def workdir(tmp_path, monkeypatch):
+    """Run every test in its own directory; the fetcher writes its state files to the cwd"""
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+@pytest.fixture
+def history():
+    """200 distinct REST rows, newest first, replayed from the bundled snapshot"""
+    return LeetCodeFixture.from_snapshot(SNAPSHOT_FILE, rest_rows=200).rest_submissions
+
+
+@pytest.fixture
+def rest_fixture():
+    """200 REST rows, newest first, and no GraphQL rows so counts are exact"""
+    fixture = LeetCodeFixture.from_snapshot(SNAPSHOT_FILE, rest_rows=200)
+    fixture.graphql_submissions = []
+    return fixture
+
+
+@pytest.fixture
+def serve():
+    """Start mock servers for a test, stopping them afterwards"""
+    servers = []
+
+    def start(fixture, **options):
+        server = MockLeetCodeServer(fixture, **options).start()
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.stop()
+
+
+def make_fetcher(base_url, session='session-a'):
+    """Fetcher pointed at a mock server, with no rate limiting, retries or shared state files"""
+    fetcher = LeetCodeSubmissionFetcher()
+    fetcher.base_url = base_url
+    fetcher.rate_limit_delay = 0
+    fetcher.rate_limit_state_file = None
+    fetcher.problem_cache_file = None
+    fetcher.max_retries = 0
+    fetcher.create_authenticated_session({'LEETCODE_SESSION': session, 'csrftoken': 'token'})
+    return fetcher
@@ -0,0 +1,491 @@
+import asyncio
+import time
+import argparse
+from typing import List, Dict, Optional, Any, Iterable
+
+try:
+    import httpx
+except ImportError:  # The async engine is optional; the requests-based fetcher works without it
+    httpx = None
+
+from test_leetcode_auth import (
+    ANALYSIS_BACKENDS, AdaptiveRateLimiter, LeetCodeSubmissionFetcher, ProblemMetadataCache,
+    compose_graphql_query, load_bulk_accounts
+)
+
+
+class AsyncLeetCodeSubmissionFetcher(LeetCodeSubmissionFetcher):
+    """httpx-based fetcher whose network methods are coroutines
+
+    Merging, analysis and saving are inherited unchanged. Many fetchers (one per
+    account) can share one AsyncClient connection pool, one semaphore capping
+    requests in flight and one rate limiter, so a single event loop drives many
+    user syncs at once. Responses are not cached; response_cache only applies to
+    the requests engine. The cursor walk, incremental sync, streaming and resumable
+    stages are synchronous pipelines and raise NotImplementedError here.
+    """
+
+    def __init__(self, client: Optional['httpx.AsyncClient'] = None,
+                 semaphore: Optional[asyncio.Semaphore] = None):
+        if httpx is None:
+            raise RuntimeError("AsyncLeetCodeSubmissionFetcher requires httpx (pip install httpx)")
+        super().__init__()
+        self.client = client
+        self.owns_client = client is None
+        self.semaphore = semaphore
+        self.headers = {}
+        self.problem_cache_lock = None  # Shared by accounts using one problem_cache, so each slug is fetched once
+
+    def create_authenticated_session(self, cookies: Dict[str, str]) -> 'httpx.AsyncClient':
+        """Set this account's cookies and headers, creating a pooled client unless one is shared"""
+        self.headers = {
+            'Referer': 'https://leetcode.com/',
+            'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+            'Content-Type': 'application/json',
+            'Accept': 'application/json',
+            'Origin': 'https://leetcode.com',
+            # Sent per request so accounts can share one client without sharing a cookie jar
+            'Cookie': '; '.join(f'{name}={value}' for name, value in cookies.items())
+        }
+        if 'csrftoken' in cookies:
+            self.headers['X-CSRFToken'] = cookies['csrftoken']
+
+        if self.client is None:
+            self.client = create_async_client(self.pool_size)
+            self.owns_client = True
+        if self.semaphore is None:
+            self.semaphore = asyncio.Semaphore(self.page_concurrency)
+        return self.client
+
+    def sync_engine_only(self, name: str):
+        raise NotImplementedError(f"{name} is only available on the requests engine (LeetCodeSubmissionFetcher); "
+                                  f"the async engine fetches full histories with fetch_comprehensive_data")
+
+    def iter_rest_pages(self, *args, **kwargs):
+        self.sync_engine_only('iter_rest_pages')
+
+    def fetch_full_history_rest(self, *args, **kwargs):
+        self.sync_engine_only('fetch_full_history_rest')
+
+    def fetch_incremental_data(self, *args, **kwargs):
+        self.sync_engine_only('fetch_incremental_data')
+
+    def iter_submission_batches(self, *args, **kwargs):
+        self.sync_engine_only('iter_submission_batches')
+
+    def stream_comprehensive_data(self, *args, **kwargs):
+        self.sync_engine_only('stream_comprehensive_data')
+
+    def get_checkpointed_profile(self, *args, **kwargs):
+        self.sync_engine_only('get_checkpointed_profile')
+
+    async def close(self) -> None:
+        if self.owns_client and self.client is not None:
+            await self.client.aclose()
+            self.client = None
+
+    async def execute_request(self, method: str, url: str, endpoint: str, **kwargs) -> 'httpx.Response':
+        """Send a request on the shared client with retries on throttling and server errors"""
+        headers = dict(self.headers)
+        headers.update(kwargs.pop('headers', None) or {})
+        kwargs.setdefault('timeout', 30)
+        limiter = self.get_rate_limiter()
+        request_start = time.monotonic()
+        slept = 0.0
+
+        for attempt in range(self.max_retries + 1):
+            # reserve() never blocks, so the adaptive limiter is safe to share with the event loop
+            wait_time = limiter.reserve()
+            if wait_time > 0:
+                await asyncio.sleep(wait_time)
+            self.metrics.record_rate_limit_wait(wait_time)
+
+            start_time = time.monotonic()
+            try:
+                async with self.semaphore:
+                    response = await self.client.request(method, url, headers=headers, **kwargs)
+            except (httpx.TransportError, httpx.TimeoutException) as e:
+                limiter.on_response(None, time.monotonic() - start_time, self.throttle_status_codes, endpoint)
+                self.latency_histogram.record(endpoint, (time.monotonic() - start_time) * 1000)
+                if attempt >= self.max_retries:
+                    self.metrics.record_request(endpoint, method, e.__class__.__name__,
+                                                time.monotonic() - request_start, 0, attempt, slept)
+                    raise
+                delay = self.get_retry_delay(attempt)
+                print(f"   ⚠️ {endpoint} network error ({e.__class__.__name__}), retrying in {delay:.1f}s "
+                      f"({attempt + 1}/{self.max_retries})")
+                await asyncio.sleep(delay)
+                slept += delay
+                continue
+
+            limiter.on_response(response.status_code, time.monotonic() - start_time, self.throttle_status_codes,
+                                endpoint)
+            self.latency_histogram.record(endpoint, (time.monotonic() - start_time) * 1000)
+
+            if response.status_code not in self.retry_status_codes or attempt >= self.max_retries:
+                if response.status_code in self.retry_status_codes:
+                    print(f"   ❌ {endpoint} still failing with {response.status_code} after {self.max_retries} retries")
+                self.metrics.record_request(endpoint, method, response.status_code, time.monotonic() - request_start,
+                                            len(response.content), attempt, slept)
+                return response
+
+            delay = self.get_retry_delay(attempt, response)
+            print(f"   ⚠️ {endpoint} returned {response.status_code}, retrying in {delay:.1f}s "
+                  f"({attempt + 1}/{self.max_retries})")
+            await asyncio.sleep(delay)
+            slept += delay
+
+    async def test_authentication(self) -> bool:
+        """Test authentication using GraphQL whoami query"""
+        whoami_query = {
+            "query": "query globalData { userStatus { isSignedIn username realName avatar isPremium } }",
+            "operationName": "globalData"
+        }
+
+        try:
+            response = await self.execute_request('POST', f'{self.base_url}/graphql', 'graphql:globalData',
+                                                  json=whoami_query)
+            if response.status_code != 200:
+                print(f"❌ Authentication failed. Status code: {response.status_code}")
+                return False
+
+            user_status = (response.json().get('data') or {}).get('userStatus') or {}
+            if not user_status.get('isSignedIn'):
+                print("❌ Not signed in. Please check your session cookie.")
+                return False
+
+            print(f"✅ Authenticated as {user_status.get('username', 'Unknown')}")
+            return True
+
+        except Exception as e:
+            print(f"❌ Authentication test error: {e}")
+            return False
+
+    async def fetch_recent_submissions(self, username: str, limit: int = 20) -> List[Dict]:
+        """Fetch recent accepted submissions using GraphQL"""
+        submissions_query = {
+            "query": compose_graphql_query('recentAcSubmissions', {'recentAcSubmissionList': 'recentAcSubmissions'}),
+            "variables": {"username": username, "limit": limit},
+            "operationName": "recentAcSubmissions"
+        }
+
+        try:
+            response = await self.execute_request('POST', f'{self.base_url}/graphql', 'graphql:recentAcSubmissions',
+                                                  json=submissions_query)
+            if response.status_code != 200:
+                print(f"❌ Submissions request failed. Status: {response.status_code}")
+                return []
+
+            data = response.json()
+            if 'errors' in data:
+                print(f"❌ GraphQL errors: {data['errors']}")
+                return []
+
+            submissions = data.get('data', {}).get('recentAcSubmissionList', [])
+            for sub in submissions:
+                sub['_source'] = 'graphql'
+            return submissions
+
+        except Exception as e:
+            print(f"❌ Error fetching submissions: {e}")
+            return []
+
+    async def fetch_submission_page_rest(self, offset: int = 0, limit: int = 20, lastkey: str = '') -> Dict[str, Any]:
+        """Fetch one REST page along with its pagination cursor, or an empty page with its 'error'"""
+        page = {'submissions': [], 'has_next': False, 'last_key': ''}
+        try:
+            url = f'{self.base_url}/api/submissions/?offset={offset}&limit={limit}&lastkey={lastkey}'
+            response = await self.execute_request('GET', url, 'rest:submissions')
+            if response.status_code == 200:
+                return self.parse_rest_page(response.json())
+            page['error'] = f"status {response.status_code}"
+        except Exception as e:
+            page['error'] = str(e)
+            if self.debug_mode:
+                print(f"❌ REST API error: {e}")
+
+        return page
+
+    async def fetch_submission_history_rest(self, offset: int = 0, limit: int = 20, lastkey: str = '') -> List[Dict]:
+        """Fetch submissions using REST API"""
+        return (await self.fetch_submission_page_rest(offset, limit, lastkey))['submissions']
+
+    async def fetch_rest_pages_concurrent(self, max_pages: Optional[int] = 10, page_size: int = 20,
+                                          concurrency: Optional[int] = None) -> List[Dict]:
+        """Fetch REST pages in waves of `concurrency` tasks, returning rows in offset order
+
+        max_pages=None keeps going until the first empty page; self.last_rest_stop says
+        why the walk ended ('end', 'max_pages' or 'error').
+        """
+        concurrency = max(1, concurrency or self.page_concurrency)
+
+        async def fetch_page(page: int) -> Dict[str, Any]:
+            return await self.fetch_submission_page_rest(page * page_size, page_size)
+
+        rest_submissions = []
+        pages_fetched = 0
+        start_time = time.monotonic()
+        self.last_rest_stop, self.last_rest_error = 'max_pages', None
+
+        wave_start = 0
+        while max_pages is None or wave_start < max_pages:
+            wave_end = wave_start + concurrency if max_pages is None else min(max_pages, wave_start + concurrency)
+            results = await asyncio.gather(*(fetch_page(page) for page in range(wave_start, wave_end)))
+            wave_start = wave_end
+
+            # Only keep the contiguous run of pages before the first empty one
+            for result in results:
+                if not result['submissions']:
+                    self.last_rest_error = result.get('error')
+                    self.last_rest_stop = 'error' if self.last_rest_error else 'end'
+                    break
+                rest_submissions.extend(result['submissions'])
+                pages_fetched += 1
+            else:
+                continue
+            break
+
+        if self.last_rest_stop == 'error':
+            print(f"   ❌ REST page {pages_fetched + 1} failed ({self.last_rest_error}) before the end of history")
+
+        elapsed = time.monotonic() - start_time
+        pages_per_sec = pages_fetched / elapsed if elapsed > 0 else 0
+        self.last_fetch_stats = {
+            'pages_fetched': pages_fetched,
+            'elapsed_seconds': elapsed,
+            'pages_per_sec': pages_per_sec,
+            'concurrency': concurrency
+        }
+        print(f"   ⚡ {pages_fetched} pages in {elapsed:.1f}s "
+              f"({pages_per_sec:.2f} pages/sec, concurrency={concurrency})")
+
+        return rest_submissions
+
+    async def fetch_language_statistics(self, username: str) -> List[Dict[str, Any]]:
+        """Fetch language-wise problem statistics"""
+        lang_query = {
+            "query": compose_graphql_query('languageStats', {'matchedUser': 'languageStats'}),
+            "variables": {"username": username},
+            "operationName": "languageStats"
+        }
+
+        try:
+            response = await self.execute_request('POST', f'{self.base_url}/graphql', 'graphql:languageStats',
+                                                  json=lang_query)
+            if response.status_code == 200:
+                data = response.json()
+                if 'errors' not in data:
+                    return (data.get('data', {}).get('matchedUser') or {}).get('languageProblemCount', [])
+        except Exception as e:
+            if self.debug_mode:
+                print(f"❌ Language stats error: {e}")
+
+        return []
+
+    async def fetch_problem_metadata(self, title_slugs: List[str]) -> Dict[str, Optional[Dict]]:
+        """Look up difficulty and topic tags for a batch of problems in one GraphQL request"""
+        try:
+            response = await self.execute_request('POST', f'{self.base_url}/graphql', 'graphql:questionBatch',
+                                                  json=self.question_batch_payload(title_slugs))
+            if response.status_code == 200:
+                return self.parse_question_batch(response.json(), title_slugs)
+        except Exception as e:
+            if self.debug_mode:
+                print(f"❌ Problem metadata error: {e}")
+
+        return {}
+
+    async def update_problem_cache(self, title_slugs: Iterable[str]) -> int:
+        """Fetch metadata for problems missing from (or stale in) the cache, returns how many were cached"""
+        cache = self.get_problem_cache()
+        if cache is None:
+            return 0
+
+        async with self.problem_cache_lock or asyncio.Lock():
+            missing = cache.stale_slugs(title_slugs)
+            if not missing:
+                return 0
+
+            batches = [missing[i:i + self.problem_batch_size]
+                       for i in range(0, len(missing), self.problem_batch_size)]
+            cached = 0
+            for questions in await asyncio.gather(*(self.fetch_problem_metadata(batch) for batch in batches)):
+                for slug, question in questions.items():
+                    cache.put(slug, question)
+                cached += len(questions)
+            cache.save()
+
+        print(f"   📚 Cached metadata for {cached:,} problems in {len(batches)} requests")
+        return cached
+
+    async def fetch_user_bundle(self, username: str, recent_limit: int = 200) -> Optional[Dict[str, Any]]:
+        """Fetch profile, language stats and recent submissions in one GraphQL round trip"""
+        bundle_query = {
+            "query": compose_graphql_query('userBundle', {
+                'profile': 'profile',
+                'languageStats': 'languageStats',
+                'recentSubmissions': 'recentAcSubmissions'
+            }),
+            "variables": {"username": username, "limit": recent_limit},
+            "operationName": "userBundle"
+        }
+
+        try:
+            response = await self.execute_request('POST', f'{self.base_url}/graphql', 'graphql:userBundle',
+                                                  json=bundle_query)
+            if response.status_code != 200:
+                print(f"❌ Profile request failed. Status: {response.status_code}")
+                return None
+            return self.parse_user_bundle(response.json())
+        except Exception as e:
+            print(f"❌ Profile fetch error: {e}")
+            return None
+
+    async def get_comprehensive_profile(self, username: str) -> Optional[Dict]:
+        """Get comprehensive user profile with enhanced statistics"""
+        print(f"\n=== Fetching Comprehensive Profile for '{username}' ===")
+        return self.use_profile_bundle(username, await self.fetch_user_bundle(username))
+
+    async def fetch_comprehensive_data(self, username: str) -> List[Dict]:
+        """Fetch recent accepted (GraphQL) and paged (REST) submissions concurrently, then merge"""
+        print("\n=== Comprehensive Data Fetching ===")
+
+        graphql_accepted = self.prefetched_submissions.pop(username, None)
+        graphql_task = None
+        if graphql_accepted is None:
+            graphql_task = asyncio.ensure_future(self.fetch_recent_submissions(username, limit=200))
+
+        # Offset pages overlap well on one event loop, so the async engine does not walk the cursor
+        rest_submissions = await self.fetch_rest_pages_concurrent(self.max_rest_pages, self.rest_page_size)
+        if graphql_task is not None:
+            graphql_accepted = await graphql_task
+        self.check_rest_complete()
+
+        if graphql_accepted:
+            print(f"   ✓ Found {len(graphql_accepted)} recent accepted submissions")
+        else:
+            print("   ⚠️ No GraphQL accepted submissions found")
+            graphql_accepted = []
+
+        return self.merge_comprehensive_data(username, graphql_accepted, rest_submissions)
+
+
+def create_async_client(pool_size: int = 100) -> 'httpx.AsyncClient':
+    """Keep-alive connection pool shared by every account on the event loop"""
+    if httpx is None:
+        raise RuntimeError("The async fetcher requires httpx (pip install httpx)")
+    limits = httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size)
+    return httpx.AsyncClient(limits=limits)
+
+
+async def sync_account(account: Dict[str, Any], client: 'httpx.AsyncClient', semaphore: asyncio.Semaphore,
+                       base_url: Optional[str] = None,
+                       problem_cache: Optional[ProblemMetadataCache] = None,
+                       problem_cache_lock: Optional[asyncio.Lock] = None,
+                       analysis_backend: str = 'python',
+                       rate_limiter: Optional[AdaptiveRateLimiter] = None) -> Dict[str, Any]:
+    """Fetch, analyze and save one account on the shared client
+
+    With a shared rate_limiter the caller persists the learned rate once every account is done.
+    """
+    username = account['username']
+    result = {'username': username, 'status': 'ok', 'error': None, 'total_submissions': 0}
+    fetcher = AsyncLeetCodeSubmissionFetcher(client, semaphore)
+    fetcher.problem_cache = problem_cache
+    fetcher.problem_cache_lock = problem_cache_lock
+    fetcher.analysis_backend = analysis_backend
+    fetcher.rate_limiter = rate_limiter
+    if base_url:
+        fetcher.base_url = base_url.rstrip('/')
+    fetcher.create_authenticated_session(account['cookies'])
+
+    try:
+        if not await fetcher.test_authentication():
+            raise RuntimeError("authentication failed")
+
+        with fetcher.metrics.stage('profile'):
+            profile_data = await fetcher.get_comprehensive_profile(username)
+        with fetcher.metrics.stage('fetch'):
+            all_submissions = await fetcher.fetch_comprehensive_data(username)
+        if not all_submissions:
+            raise RuntimeError("no submissions found")
+
+        # CPU-bound steps run inline; they are short next to the network time they overlap with
+        with fetcher.metrics.stage('analyze'):
+            aggregator = fetcher.get_updated_aggregator(username, all_submissions)
+            analysis = fetcher.analyze_comprehensive_data(
+                all_submissions, profile_data, aggregator, fetcher.cached_submission_records(username, all_submissions))
+            timeline = fetcher.get_updated_problem_timeline(username, all_submissions)
+            analysis['problem_timeline'] = timeline.snapshot()
+        with fetcher.metrics.stage('metadata'):
+            await fetcher.update_problem_cache(aggregator.problem_attempts)
+            analysis.update(fetcher.problem_breakdown(aggregator))
+        with fetcher.metrics.stage('save'):
+            fetcher.save_enhanced_data(username, profile_data, all_submissions, analysis)
+            fetcher.save_aggregator_state(username, aggregator)
+            fetcher.save_problem_timeline(username, timeline)
+            fetcher.save_submission_index(username)
+
+        result['total_submissions'] = len(all_submissions)
+        result['acceptance_rate'] = analysis.get('acceptance_rate', 0)
+    except Exception as e:
+        print(f"\n❌ Async fetch failed for '{username}': {e}")
+        result['status'] = 'error'
+        result['error'] = str(e)
+
+    if rate_limiter is None:
+        fetcher.save_rate_limit_state()
+    result['timings'] = fetcher.metrics.stage_timings()
+    return result
+
+
+async def run_async_bulk_fetch(accounts: List[Dict[str, Any]], max_in_flight: int = 64, pool_size: int = 100,
+                               base_url: Optional[str] = None,
+                               analysis_backend: str = 'python') -> List[Dict[str, Any]]:
+    """Sync many accounts on one event loop, sharing the connection pool, an in-flight cap, the
+    rate limiter learned for base_url and the problem cache"""
+    semaphore = asyncio.Semaphore(max_in_flight)
+    shared = LeetCodeSubmissionFetcher()
+    if base_url:
+        shared.base_url = base_url.rstrip('/')
+    rate_limiter = shared.get_rate_limiter()
+    problem_cache = shared.get_problem_cache()
+    problem_cache_lock = asyncio.Lock()
+    try:
+        async with create_async_client(pool_size) as client:
+            return await asyncio.gather(*(sync_account(account, client, semaphore, base_url, problem_cache,
+                                                       problem_cache_lock, analysis_backend, rate_limiter)
+                                          for account in accounts))
+    finally:
+        shared.save_rate_limit_state()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Async LeetCode bulk fetcher (requires httpx)")
+    parser.add_argument('accounts_file', help="CSV/JSON file of usernames and cookies, as for --bulk")
+    parser.add_argument('--max-in-flight', type=int, default=64, help="Requests in flight across all accounts")
+    parser.add_argument('--pool-size', type=int, default=100, help="Keep-alive connections in the shared pool")
+    parser.add_argument('--base-url', default='https://leetcode.com',
+                        help="API base URL, e.g. a local leetcode_mock_server.py instance")
+    parser.add_argument('--analysis-backend', choices=ANALYSIS_BACKENDS, default='python',
+                        help="Build full-history statistics with pure Python or vectorized with NumPy (columnar)")
+    args = parser.parse_args()
+
+    accounts = load_bulk_accounts(args.accounts_file)
+    print(f"🚀 Async bulk fetch: {len(accounts)} accounts, {args.max_in_flight} requests in flight")
+
+    start_time = time.monotonic()
+    results = asyncio.run(run_async_bulk_fetch(accounts, args.max_in_flight, args.pool_size, args.base_url,
+                                                   args.analysis_backend))
+    elapsed = time.monotonic() - start_time
+
+    succeeded = sum(1 for r in results if r['status'] == 'ok')
+    for result in sorted(results, key=lambda r: r['username']):
+        status_emoji = "✅" if result['status'] == 'ok' else "❌"
+        detail = f"{result['total_submissions']:,} submissions" if result['status'] == 'ok' else result['error']
+        print(f"   {status_emoji} {result['username']}: {detail}")
+    print(f"\n🎉 Async bulk run complete: {succeeded}/{len(accounts)} accounts in {elapsed:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,311 @@
+import os
+import glob
+import time
+import argparse
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from itertools import islice
+from typing import List, Dict, Optional, Any, Iterable
+
+from test_leetcode_auth import (
+    ANALYSIS_BACKENDS, Submission, SubmissionAggregator, SubmissionColumns, SubmissionStore, SnapshotFile,
+    np, positive_int, read_snapshot, write_json_atomic
+)
+
+
+SNAPSHOT_SUFFIX = '_comprehensive_leetcode_data'
+
+
+class CohortAggregate:
+    """Cross-user statistics: workers build partials with add_user(), merge() combines them"""
+
+    # Upper bounds (seconds) of the time-to-accept histogram; the last bucket is open-ended
+    TIME_TO_ACCEPT_BUCKETS = [(60, '<1m'), (600, '<10m'), (3600, '<1h'), (86400, '<1d'),
+                              (604800, '<1w'), (None, '1w+')]
+
+    def __init__(self):
+        self.users = 0
+        self.totals = SubmissionAggregator()
+        self.problem_users = defaultdict(int)  # titleSlug -> users who attempted it
+        self.problem_solvers = defaultdict(int)  # titleSlug -> users who solved it
+        self.time_to_accept_seconds = defaultdict(int)  # titleSlug -> summed first-attempt-to-accept time
+        self.time_to_accept_count = defaultdict(int)
+        self.time_to_accept_histogram = defaultdict(int)
+        self.primary_languages = defaultdict(int)  # language -> users who use it most
+        self.monthly_active_users = defaultdict(int)
+        self.leaderboard = []
+        self.failures = []  # {'source', 'error'} for histories that could not be read
+
+    def add_user(self, username: str, records: Iterable[Submission], batch_size: int = 10000) -> None:
+        """Fold one user's normalized history into the partial, batch by batch"""
+        user = SubmissionAggregator()
+        first_attempt, first_accept = {}, {}
+        records = iter(records)
+
+        while True:
+            batch = list(islice(records, batch_size))
+            if not batch:
+                break
+            user.update(batch)
+            for record in batch:
+                slug = record.title_slug
+                if not slug or not record.timestamp:
+                    continue
+                if record.timestamp < first_attempt.get(slug, float('inf')):
+                    first_attempt[slug] = record.timestamp
+                if record.is_accepted and record.timestamp < first_accept.get(slug, float('inf')):
+                    first_accept[slug] = record.timestamp
+
+        self.add_user_summary(username, user, first_attempt, first_accept)
+
+    def add_user_columns(self, username: str, columns: SubmissionColumns) -> None:
+        """Fold one user's history, already loaded as columns, into the partial"""
+        first_attempt, first_accept = columns.first_times()
+        self.add_user_summary(username, columns.to_aggregator(), first_attempt, first_accept)
+
+    def add_user_summary(self, username: str, user: SubmissionAggregator, first_attempt: Dict[str, int],
+                         first_accept: Dict[str, int]) -> None:
+        """Fold one user's aggregator and per-problem first attempt/accept times into the partial"""
+        for slug, accepted_at in first_accept.items():
+            elapsed = accepted_at - first_attempt[slug]
+            self.time_to_accept_seconds[slug] += elapsed
+            self.time_to_accept_count[slug] += 1
+            for bound, label in self.TIME_TO_ACCEPT_BUCKETS:
+                if bound is None or elapsed < bound:
+                    self.time_to_accept_histogram[label] += 1
+                    break
+
+        for slug in user.problem_attempts:
+            self.problem_users[slug] += 1
+        for slug in user.solved_problems:
+            self.problem_solvers[slug] += 1
+        for month in user.monthly_stats:
+            self.monthly_active_users[month] += 1
+        if user.language_stats:
+            self.primary_languages[max(user.language_stats, key=user.language_stats.get)] += 1
+
+        summary = user.snapshot()
+        self.leaderboard.append({
+            'username': username,
+            'total_submissions': summary['total_submissions'],
+            'accepted_submissions': summary['accepted_submissions'],
+            'acceptance_rate': summary['acceptance_rate'],
+            'problems_attempted': summary['unique_problems_attempted'],
+            'problems_solved': summary['unique_problems_solved']
+        })
+        self.totals.merge(user)
+        self.users += 1
+
+    def merge(self, other: 'CohortAggregate') -> 'CohortAggregate':
+        """Fold a partial built over other users into this one"""
+        self.users += other.users
+        self.totals.merge(other.totals)
+        self.leaderboard.extend(other.leaderboard)
+        self.failures.extend(other.failures)
+
+        for mine, theirs in ((self.problem_users, other.problem_users),
+                             (self.problem_solvers, other.problem_solvers),
+                             (self.time_to_accept_seconds, other.time_to_accept_seconds),
+                             (self.time_to_accept_count, other.time_to_accept_count),
+                             (self.time_to_accept_histogram, other.time_to_accept_histogram),
+                             (self.primary_languages, other.primary_languages),
+                             (self.monthly_active_users, other.monthly_active_users)):
+            for key, count in theirs.items():
+                mine[key] += count
+
+        return self
+
+    def snapshot(self, top: int = 20) -> Dict[str, Any]:
+        """Cohort report: totals, language mix, per-problem solve rates, time-to-accept and monthly activity"""
+        totals = self.totals.snapshot()
+        total = totals['total_submissions']
+
+        problems = {}
+        for slug, users in sorted(self.problem_users.items(), key=lambda item: item[1], reverse=True):
+            solvers = self.problem_solvers.get(slug, 0)
+            accepts = self.time_to_accept_count.get(slug, 0)
+            problems[slug] = {
+                'attempted_users': users,
+                'solved_users': solvers,
+                'solve_rate': solvers / users * 100,
+                'avg_time_to_accept_seconds': self.time_to_accept_seconds[slug] / accepts if accepts else None
+            }
+
+        accepts = sum(self.time_to_accept_count.values())
+        leaderboard = sorted(self.leaderboard, key=lambda row: (-row['problems_solved'], row['username']))
+
+        return {
+            'users': self.users,
+            'totals': totals,
+            'language_mix': {lang: count / total * 100 for lang, count in
+                             sorted(totals['language_stats'].items(), key=lambda item: item[1], reverse=True)},
+            'primary_languages': dict(sorted(self.primary_languages.items(), key=lambda item: item[1], reverse=True)),
+            'problems': problems,
+            'time_to_accept': {
+                'problems_accepted': accepts,
+                'mean_seconds': sum(self.time_to_accept_seconds.values()) / accepts if accepts else None,
+                'histogram': {label: self.time_to_accept_histogram.get(label, 0)
+                              for _, label in self.TIME_TO_ACCEPT_BUCKETS}
+            },
+            'monthly_activity': {month: {'submissions': totals['monthly_stats'][month],
+                                         'active_users': self.monthly_active_users[month]}
+                                 for month in sorted(totals['monthly_stats'])},
+            'leaderboard': leaderboard[:top],
+            'failures': self.failures
+        }
+
+
+def snapshot_username(path: str) -> str:
+    """Username a snapshot file was saved for, from its {username}_comprehensive_leetcode_data name"""
+    return os.path.basename(path).split(SNAPSHOT_SUFFIX)[0]
+
+
+def find_snapshots(paths: List[str]) -> List[str]:
+    """Expand files and directories into one snapshot per user, the newest if several exist"""
+    candidates = []
+    for path in paths:
+        if os.path.isdir(path):
+            for extension in ('.json', SnapshotFile.EXTENSION):
+                candidates.extend(glob.glob(os.path.join(path, f'*{SNAPSHOT_SUFFIX}{extension}')))
+        else:
+            candidates.append(path)
+
+    newest = {}
+    for path in candidates:
+        username = snapshot_username(path)
+        if username not in newest or os.path.getmtime(path) > os.path.getmtime(newest[username]):
+            newest[username] = path
+    return sorted(newest.values())
+
+
+def add_history(cohort: CohortAggregate, username: str, history: Iterable[Dict], backend: str) -> None:
+    """Fold one user's raw history into a partial with the selected analysis backend"""
+    if backend == 'columnar':
+        cohort.add_user_columns(username, SubmissionColumns(list(history)))
+    else:
+        cohort.add_user(username, (Submission.from_api(sub) for sub in history))
+
+
+def aggregate_snapshots(paths: List[str], backend: str = 'python') -> CohortAggregate:
+    """Map step: one partial over a chunk of snapshot files, loading one history at a time"""
+    cohort = CohortAggregate()
+    for path in paths:
+        try:
+            if path.endswith(SnapshotFile.EXTENSION):
+                # Compressed snapshots stream their history without loading it
+                snapshot = SnapshotFile(path)
+                username, history = snapshot.metadata.get('username'), snapshot.iter_submissions()
+            else:
+                data = read_snapshot(path)
+                username, history = data.get('metadata', {}).get('username'), data.get('submission_history') or []
+            # A user's counts are only folded in once their whole history was read
+            add_history(cohort, username or snapshot_username(path), history, backend)
+        except Exception as e:
+            cohort.failures.append({'source': path, 'error': f'{e.__class__.__name__}: {e}'})
+    return cohort
+
+
+def aggregate_store_users(store_path: str, usernames: List[str], backend: str = 'python') -> CohortAggregate:
+    """Map step: one partial over a chunk of users in the SQLite store"""
+    cohort = CohortAggregate()
+    store = SubmissionStore(store_path)
+    try:
+        for username in usernames:
+            try:
+                add_history(cohort, username, store.load_submissions(username), backend)
+            except Exception as e:
+                cohort.failures.append({'source': f'{store_path}:{username}', 'error': f'{e.__class__.__name__}: {e}'})
+    finally:
+        store.close()
+    return cohort
+
+
+def chunked(items: List[Any], chunks: int) -> List[List[Any]]:
+    size = max(1, -(-len(items) // max(1, chunks)))
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def run_cohort_analysis(paths: Optional[List[str]] = None, store_path: Optional[str] = None,
+                        max_workers: Optional[int] = None, top: int = 20,
+                        backend: str = 'python') -> Dict[str, Any]:
+    """Map users onto worker processes in chunks and reduce their partials as they finish
+
+    Each user is counted once: the store takes precedence over snapshot files of the
+    same username, since it holds every history upserted into it.
+    """
+    max_workers = max_workers or os.cpu_count() or 1
+    if backend == 'columnar' and np is None:
+        print("⚠️ numpy is not installed, using the pure Python analysis backend")
+        backend = 'python'
+    tasks = []
+    store_usernames = []
+    if store_path:
+        store = SubmissionStore(store_path)
+        try:
+            store_usernames = store.usernames()
+        finally:
+            store.close()
+        tasks.extend((aggregate_store_users, store_path, chunk, backend)
+                     for chunk in chunked(store_usernames, max_workers * 4))
+    if paths:
+        in_store = set(store_usernames)
+        snapshots = [path for path in find_snapshots(paths) if snapshot_username(path) not in in_store]
+        # A few chunks per worker keeps the pool busy when history sizes are uneven
+        tasks.extend((aggregate_snapshots, chunk, backend) for chunk in chunked(snapshots, max_workers * 4))
+
+    cohort = CohortAggregate()
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(*task): task for task in tasks}
+        for future in as_completed(futures):
+            try:
+                cohort.merge(future.result())
+            except Exception as e:
+                # The worker itself failed (e.g. it died); every source in its chunk is missing
+                for source in futures[future][-2]:
+                    cohort.failures.append({'source': source, 'error': f'{e.__class__.__name__}: {e}'})
+
+    return cohort.snapshot(top)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cross-user analytics over saved snapshots or a SQLite store")
+    parser.add_argument('paths', nargs='*',
+                        help="Snapshot files or directories holding *_comprehensive_leetcode_data.json/.lcsnap")
+    parser.add_argument('--store', metavar='DB_PATH', help="Also aggregate every user in this SQLite store")
+    parser.add_argument('--workers', type=positive_int, help="Worker processes (default: CPU count)")
+    parser.add_argument('--top', type=int, default=20, help="Leaderboard size")
+    parser.add_argument('--output', default='cohort_analysis.json', help="Where to write the JSON report")
+    parser.add_argument('--analysis-backend', choices=ANALYSIS_BACKENDS, default='python',
+                        help="Aggregate each history with pure Python or vectorized with NumPy (columnar)")
+    args = parser.parse_args()
+
+    if not args.paths and not args.store:
+        parser.error("give snapshot paths and/or --store")
+
+    start_time = time.monotonic()
+    report = run_cohort_analysis(args.paths, args.store, args.workers, args.top, args.analysis_backend)
+    elapsed = time.monotonic() - start_time
+
+    totals = report['totals']
+    print(f"👥 {report['users']:,} users, {totals['total_submissions']:,} submissions in {elapsed:.1f}s")
+    print(f"   Acceptance rate: {totals['acceptance_rate']:.1f}%, "
+          f"{totals['unique_problems_solved']:,} distinct problems solved")
+    for lang, share in list(report['language_mix'].items())[:5]:
+        print(f"   {lang}: {share:.1f}% of submissions")
+
+    if report['failures']:
+        print(f"   ⚠️ {len(report['failures'])} histories skipped:")
+        for failure in report['failures']:
+            print(f"     {failure['source']}: {failure['error']}")
+
+    print(f"\n🏆 Leaderboard (problems solved):")
+    for rank, row in enumerate(report['leaderboard'], 1):
+        print(f"   {rank:2d}. {row['username']:<24} {row['problems_solved']:>5,} solved "
+              f"({row['acceptance_rate']:.1f}% acceptance)")
+
+    write_json_atomic(args.output, report, indent=2, ensure_ascii=False)
+    print(f"\n💾 Cohort report written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,288 @@
+import json
+import time
+import zlib
+import random
+import argparse
+import threading
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Dict, Optional, Any, Iterable
+from urllib.parse import urlparse, parse_qs
+
+
+class LeetCodeFixture:
+    """Recorded LeetCode payloads replayed by the mock server"""
+
+    def __init__(self, username: str, profile: Optional[Dict], graphql_submissions: List[Dict],
+                 rest_submissions: List[Dict]):
+        self.username = username
+        self.profile = profile
+        self.graphql_submissions = graphql_submissions
+        self.rest_submissions = rest_submissions
+        self.language_stats = self.build_language_stats()
+
+    @classmethod
+    def from_snapshot(cls, snapshot_file: str, rest_rows: Optional[int] = None) -> 'LeetCodeFixture':
+        """Load a saved *_comprehensive_leetcode_data.json/.lcsnap, optionally padded to rest_rows REST rows"""
+        from test_leetcode_auth import read_snapshot
+
+        snapshot = read_snapshot(snapshot_file)
+        history = snapshot.get('submission_history') or []
+
+        def strip_marker(sub: Dict) -> Dict:
+            return {key: value for key, value in sub.items() if key != '_source'}
+
+        graphql_submissions = [strip_marker(sub) for sub in history if sub.get('_source') == 'graphql']
+        rest_submissions = [strip_marker(sub) for sub in history if sub.get('_source') != 'graphql']
+        rest_submissions.sort(key=lambda sub: int(sub.get('timestamp') or 0), reverse=True)
+
+        if rest_rows is not None:
+            rest_submissions = cls.synthesize_rows(rest_submissions, rest_rows)
+
+        return cls(snapshot.get('metadata', {}).get('username', 'mockuser'),
+                   snapshot.get('user_profile'), graphql_submissions, rest_submissions)
+
+    @staticmethod
+    def synthesize_rows(recorded: List[Dict], count: int) -> List[Dict]:
+        """Repeat recorded rows with older timestamps and fresh ids until count rows exist"""
+        if not recorded or count <= len(recorded):
+            return recorded[:count]
+
+        rows = list(recorded)
+        oldest = int(recorded[-1].get('timestamp') or 0)
+        base_id = min(int(sub.get('id') or 0) for sub in recorded)
+
+        for i in range(len(recorded), count):
+            row = dict(recorded[i % len(recorded)])
+            row['id'] = base_id - i
+            row['timestamp'] = oldest - (i - len(recorded) + 1) * 60
+            rows.append(row)
+
+        return rows
+
+    def build_language_stats(self) -> List[Dict[str, Any]]:
+        """Distinct accepted problems per language, as languageProblemCount reports them"""
+        solved = defaultdict(set)
+        for sub in self.graphql_submissions + self.rest_submissions:
+            status = sub.get('statusDisplay') or sub.get('status_display')
+            if status == 'Accepted' or sub.get('status') == 10:
+                solved[sub.get('lang_name') or sub.get('lang', 'Unknown')].add(
+                    sub.get('titleSlug') or sub.get('title_slug'))
+
+        stats = [{'languageName': lang, 'problemsSolved': len(slugs)} for lang, slugs in solved.items()]
+        return sorted(stats, key=lambda stat: stat['problemsSolved'], reverse=True)
+
+
+class MockLeetCodeServer:
+    """Local stand-in for leetcode.com's /graphql and /api/submissions/ endpoints
+
+    Injects configurable latency and 429 responses so the fetcher's concurrency and
+    retry behavior can be benchmarked without touching the real site. REST pages
+    carry an ETag and honor If-None-Match; pages starting at an offset in
+    fail_offsets are answered with a 500.
+    """
+
+    def __init__(self, fixture: LeetCodeFixture, host: str = '127.0.0.1', port: int = 0,
+                 latency_ms: float = 0.0, jitter_ms: float = 0.0, throttle_rate: float = 0.0,
+                 retry_after: float = 0.1, max_page_size: int = 20, fail_offsets: Iterable[int] = ()):
+        self.fixture = fixture
+        self.fail_offsets = set(fail_offsets)
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self.max_page_size = max_page_size
+        self.stats = defaultdict(int)
+        self.stats_lock = threading.Lock()
+
+        self.httpd = ThreadingHTTPServer((host, port), self.make_handler())
+        self.httpd.daemon_threads = True
+        self.thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(self) -> 'MockLeetCodeServer':
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def count(self, name: str) -> None:
+        with self.stats_lock:
+            self.stats[name] += 1
+
+    def graphql_response(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Answer the operations the fetcher sends, including the composed userBundle"""
+        operation = payload.get('operationName')
+        variables = payload.get('variables') or {}
+        fixture = self.fixture
+
+        known_user = variables.get('username', fixture.username) == fixture.username
+        profile = fixture.profile if known_user else None
+        recent = fixture.graphql_submissions[:variables.get('limit', 20)] if known_user else []
+        languages = {'languageProblemCount': fixture.language_stats} if known_user else None
+
+        if operation == 'globalData':
+            return {'data': {'userStatus': {'isSignedIn': True, 'username': fixture.username,
+                                            'realName': fixture.username, 'avatar': '', 'isPremium': False}}}
+        if operation == 'recentAcSubmissions':
+            return {'data': {'recentAcSubmissionList': recent}}
+        if operation == 'languageStats':
+            return {'data': {'matchedUser': languages}}
+        if operation == 'getUserProfile':
+            return {'data': {'matchedUser': profile}}
+        if operation == 'userBundle':
+            return {'data': {'profile': profile, 'languageStats': languages, 'recentSubmissions': recent}}
+        if operation == 'questionBatch':
+            return {'data': {f'q{name[4:]}': self.question(slug) for name, slug in variables.items()
+                             if name.startswith('slug')}}
+
+        return {'errors': [{'message': f'Unknown operation {operation}'}]}
+
+    @staticmethod
+    def question(title_slug: str) -> Dict[str, Any]:
+        """Stable synthetic difficulty and topic tags for a problem"""
+        digest = zlib.crc32(title_slug.encode('utf-8'))
+        tags = ['Array', 'String', 'Hash Table', 'Dynamic Programming', 'Math', 'Sorting', 'Greedy', 'Database']
+        return {
+            'questionFrontendId': str(digest % 3000 + 1),
+            'titleSlug': title_slug,
+            'difficulty': ('Easy', 'Medium', 'Hard')[digest % 3],
+            'topicTags': [{'name': tag, 'slug': tag.lower().replace(' ', '-')}
+                          for tag in (tags[digest % len(tags)], tags[(digest >> 8) % len(tags)])]
+        }
+
+    @staticmethod
+    def rest_offset(query: Dict[str, List[str]]) -> int:
+        """Offset a REST request starts at; lastkey (when given) is the next offset"""
+        lastkey = query.get('lastkey', [''])[0]
+        return int(lastkey) if lastkey else int(query.get('offset', ['0'])[0] or 0)
+
+    def rest_response(self, query: Dict[str, List[str]]) -> Dict[str, Any]:
+        """One /api/submissions/ page"""
+        limit = min(int(query.get('limit', ['20'])[0] or 20), self.max_page_size)
+        start = self.rest_offset(query)
+
+        rows = self.fixture.rest_submissions
+        end = start + limit
+        return {
+            'submissions_dump': rows[start:end],
+            'has_next': end < len(rows),
+            'last_key': str(end) if end < len(rows) else ''
+        }
+
+    def make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def send_json(self, status: int, body: Any, headers: Optional[Dict[str, str]] = None) -> None:
+                data = json.dumps(body).encode('utf-8') if body is not None else b''
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def simulate_network(self) -> bool:
+                """Apply latency, then maybe throttle; returns False if a 429 was sent"""
+                delay = server.latency_ms + random.uniform(0, server.jitter_ms)
+                if delay > 0:
+                    time.sleep(delay / 1000)
+
+                if server.throttle_rate and random.random() < server.throttle_rate:
+                    server.count('throttled')
+                    self.send_json(429, {'error': 'Too Many Requests'},
+                                   {'Retry-After': str(server.retry_after)})
+                    return False
+                return True
+
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                body = self.rfile.read(length)
+
+                if urlparse(self.path).path.rstrip('/') != '/graphql':
+                    self.send_json(404, {'error': 'Not Found'})
+                    return
+                if not self.simulate_network():
+                    return
+
+                try:
+                    payload = json.loads(body or b'{}')
+                except ValueError:
+                    self.send_json(400, {'error': 'Invalid JSON'})
+                    return
+
+                server.count(f"graphql:{payload.get('operationName')}")
+                self.send_json(200, server.graphql_response(payload))
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                if url.path.rstrip('/') != '/api/submissions':
+                    self.send_json(404, {'error': 'Not Found'})
+                    return
+                if not self.simulate_network():
+                    return
+
+                query = parse_qs(url.query)
+                if server.rest_offset(query) in server.fail_offsets:
+                    server.count('failed')
+                    self.send_json(500, {'error': 'Internal Server Error'})
+                    return
+
+                body = server.rest_response(query)
+                etag = f'"{zlib.crc32(json.dumps(body).encode("utf-8")):08x}"'
+                if self.headers.get('If-None-Match') == etag:
+                    server.count('not_modified')
+                    self.send_json(304, None, {'ETag': etag})
+                    return
+
+                server.count('rest:submissions')
+                self.send_json(200, body, {'ETag': etag})
+
+            def log_message(self, format, *args):
+                pass  # Keep benchmark output clean
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local mock LeetCode API replaying a saved snapshot")
+    parser.add_argument('snapshot', help="A saved *_comprehensive_leetcode_data.json or .lcsnap to replay")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--rest-rows', type=int, help="Pad or trim the REST history to this many rows")
+    parser.add_argument('--latency-ms', type=float, default=0.0, help="Fixed latency per request")
+    parser.add_argument('--jitter-ms', type=float, default=0.0, help="Extra random latency per request")
+    parser.add_argument('--throttle-rate', type=float, default=0.0, help="Fraction of requests answered with 429")
+    parser.add_argument('--retry-after', type=float, default=0.1, help="Retry-After seconds sent with 429s")
+    parser.add_argument('--fail-offset', type=int, action='append', default=[],
+                        help="Answer REST pages starting at this offset with a 500 (repeatable)")
+    args = parser.parse_args()
+
+    fixture = LeetCodeFixture.from_snapshot(args.snapshot, args.rest_rows)
+    server = MockLeetCodeServer(fixture, args.host, args.port, args.latency_ms, args.jitter_ms,
+                                args.throttle_rate, args.retry_after, fail_offsets=args.fail_offset)
+
+    print(f"🧪 Mock LeetCode API for '{fixture.username}' at {server.base_url}")
+    print(f"   {len(fixture.graphql_submissions)} GraphQL and {len(fixture.rest_submissions)} REST rows")
+    print(f"   Run the fetcher with --base-url {server.base_url}")
+
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        print("\n⚠️ Mock server stopped.")
+        print(f"   Requests served: {dict(server.stats)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+import pytest
+
+from conftest import make_fetcher
+from test_leetcode_auth import (
+    LeetCodeSubmissionFetcher, ProblemTimelineIndex, SubmissionAggregator, SubmissionColumns, SubmissionIndex,
+    normalize_submissions
+)
+
+
+def graphql_copy(rest_row):
+    """The same submission as the GraphQL recentAcSubmissionList reports it"""
+    return {
+        'id': str(rest_row['id']),
+        'title': rest_row['title'],
+        'titleSlug': rest_row['title_slug'],
+        'timestamp': str(rest_row['timestamp']),
+        'statusDisplay': rest_row['status_display'],
+        'lang': rest_row['lang'],
+        '_source': 'graphql'
+    }
+
+
+def test_merge_dedups_rows_seen_by_both_apis(history):
+    rest = history[:30]
+    graphql = [graphql_copy(sub) for sub in rest[:10]]
+    fetcher = LeetCodeSubmissionFetcher()
+
+    merged = fetcher.smart_merge_submissions(graphql, rest)
+
+    assert len(merged) == 30
+    assert fetcher.last_merge_report['duplicates'] == 10
+    assert fetcher.last_merge_report['sources'] == {'graphql': {'rows': 10, 'added': 10},
+                                                   'rest': {'rows': 30, 'added': 20}}
+    # The GraphQL payload is kept and filled in with the fields only REST has
+    assert merged[0]['titleSlug'] == rest[0]['title_slug'] and merged[0]['code'] == rest[0]['code']
+    assert [record.canonical_key for record in fetcher.last_merged_records] == [str(sub['id']) for sub in rest]
+
+
+def test_merge_skips_rows_already_in_the_index(history):
+    fetcher = LeetCodeSubmissionFetcher()
+    index = SubmissionIndex.from_submissions(history[50:])
+
+    merged = fetcher.smart_merge_submissions([], history, index)
+
+    assert merged == history[:50]
+    assert fetcher.last_merge_report['known'] == len(history) - 50
+    assert len(index) == len(history)
+
+
+def test_merge_reports_conflicting_duplicates(history):
+    row = dict(history[-1])
+    changed = dict(row, lang='python3' if row['lang'] != 'python3' else 'java')
+    fetcher = LeetCodeSubmissionFetcher()
+
+    merged = fetcher.merge_submission_sources([('rest', [row]), ('retry', [changed])])
+
+    assert merged == [row]
+    assert len(fetcher.last_merge_report['conflicts']) == 1
+
+
+def test_aggregator_merge_matches_a_single_pass(history):
+    single = SubmissionAggregator()
+    single.update(history)
+
+    partials = []
+    for start in range(0, len(history), 70):
+        partial = SubmissionAggregator()
+        partial.update(history[start:start + 70])
+        partials.append(partial)
+    merged = partials[0]
+    for partial in partials[1:]:
+        merged.merge(partial)
+
+    assert merged.to_dict() == single.to_dict()
+    assert merged.snapshot() == single.snapshot()
+
+
+def test_aggregator_state_round_trips(history):
+    aggregator = SubmissionAggregator()
+    aggregator.update(history)
+
+    restored = SubmissionAggregator.from_dict(aggregator.to_dict())
+
+    assert restored.snapshot() == aggregator.snapshot()
+
+
+def test_columnar_backend_matches_python_backend(history):
+    pytest.importorskip('numpy')
+    python = SubmissionAggregator()
+    python.update(history)
+
+    for rows in (history, normalize_submissions(history)):
+        assert SubmissionColumns(rows).to_aggregator().to_dict() == python.to_dict()
+
+
+def test_columnar_first_times_match_the_problem_timeline(history):
+    pytest.importorskip('numpy')
+    timeline = ProblemTimelineIndex()
+    timeline.update(history)
+
+    first_attempt, first_accept = SubmissionColumns(history).first_times()
+
+    assert first_attempt == {slug: t.first_attempt for slug, t in timeline.timelines.items()}
+    assert first_accept == {slug: t.first_accept for slug, t in timeline.timelines.items() if t.solved}
+
+
+def test_fetcher_columnar_backend_falls_back_without_numpy(history, monkeypatch):
+    import test_leetcode_auth
+    fetcher = LeetCodeSubmissionFetcher()
+    fetcher.analysis_backend = 'columnar'
+    monkeypatch.setattr(test_leetcode_auth, 'np', None)
+
+    assert fetcher.build_aggregator(history).total_submissions == len(history)
+
+
+def test_timeline_ignores_rows_without_a_timestamp(history):
+    row = dict(history[0], timestamp=0, title_slug='never-timed', id=1)
+    timeline = ProblemTimelineIndex()
+
+    timeline.update([row] + history)
+
+    assert timeline.get('never-timed') is None
+    assert timeline.submission_count == len(history) + 1
+
+
+def test_full_fetch_merges_graphql_and_rest_once(history, serve, rest_fixture):
+    rest_fixture.graphql_submissions = [graphql_copy(sub) for sub in rest_fixture.rest_submissions[:15]]
+    fetcher = make_fetcher(serve(rest_fixture).base_url)
+
+    merged = fetcher.fetch_comprehensive_data(rest_fixture.username)
+
+    assert len(merged) == 200
+    assert fetcher.last_merge_report['duplicates'] == 15
+    assert fetcher.get_submission_records(rest_fixture.username, merged) is fetcher.submission_records[
+        rest_fixture.username][1]
@@ -1,10 +1,1989 @@
 import requests
+from requests.adapters import HTTPAdapter
 import json
+import csv
 from datetime import datetime
+from email.utils import parsedate_to_datetime
 import time
-from typing import List, Dict, Optional, Any
+import random
+import hashlib
+import bisect
+import gzip
+import zlib
+import struct
+from typing import List, Dict, Optional, Any, Iterator, Iterable
+from enum import Enum
 import sys
-from collections import defaultdict
+import os
+import sqlite3
+import argparse
+import threading
+import tracemalloc
+from collections import defaultdict, deque
+from contextlib import redirect_stdout, contextmanager
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, FIRST_COMPLETED, wait, as_completed
+
+try:
+    import numpy as np
+except ImportError:  # Columnar analytics backend is optional
+    np = None
+
+
+# Root field selections shared by the single-operation queries and the batched bundle query
+GRAPHQL_SELECTIONS = {
+    'profile': {
+        'field': 'matchedUser(username: $username)',
+        'variables': {'username': 'String!'},
+        'body': """
+                    username
+                    profile {
+                        realName
+                        userAvatar
+                        ranking
+                        reputation
+                        aboutMe
+                        countryName
+                        company
+                        jobTitle
+                        school
+                        skillTags
+                        postViewCount
+                        solutionCount
+                    }
+                    submitStatsGlobal {
+                        acSubmissionNum {
+                            difficulty
+                            count
+                            submissions
+                        }
+                        totalSubmissionNum {
+                            difficulty
+                            count
+                            submissions
+                        }
+                    }
+                    badges {
+                        id
+                        displayName
+                        icon
+                        hoverText
+                    }
+                    userCalendar {
+                        activeYears
+                        streak
+                        totalActiveDays
+                        submissionCalendar
+                    }
+        """
+    },
+    'languageStats': {
+        'field': 'matchedUser(username: $username)',
+        'variables': {'username': 'String!'},
+        'body': """
+                    languageProblemCount {
+                        languageName
+                        problemsSolved
+                    }
+        """
+    },
+    'recentAcSubmissions': {
+        'field': 'recentAcSubmissionList(username: $username, limit: $limit)',
+        'variables': {'username': 'String!', 'limit': 'Int!'},
+        'body': """
+                    id
+                    title
+                    titleSlug
+                    timestamp
+                    statusDisplay
+                    lang
+                    runtime
+                    url
+                    isPending
+                    memory
+                    topicTags {
+                        name
+                        slug
+                    }
+        """
+    },
+    'question': {
+        'field': 'question(titleSlug: $titleSlug)',
+        'variables': {'titleSlug': 'String!'},
+        'body': """
+                    questionFrontendId
+                    titleSlug
+                    difficulty
+                    topicTags {
+                        name
+                        slug
+                    }
+        """
+    }
+}
+
+
+def compose_graphql_query(operation_name: str, selections: Dict[str, str]) -> str:
+    """Merge named selections into one GraphQL document, keyed by response alias"""
+    variables = {}
+    fields = []
+    
+    for alias, selection_name in selections.items():
+        selection = GRAPHQL_SELECTIONS[selection_name]
+        variables.update(selection['variables'])
+        
+        field = selection['field']
+        if alias != field.split('(')[0]:
+            field = f"{alias}: {field}"
+        fields.append(f"{field} {{{selection['body']}}}")
+    
+    variable_decl = ", ".join(f"${name}: {type_}" for name, type_ in variables.items())
+    return f"query {operation_name}({variable_decl}) {{\n" + "\n".join(fields) + "\n}"
+
+
+def compose_question_batch_query(count: int) -> str:
+    """Look up `count` questions in one document, aliased q0..qN with variables $slug0..$slugN"""
+    selection = GRAPHQL_SELECTIONS['question']
+    variable_decl = ", ".join(f"$slug{i}: String!" for i in range(count))
+    fields = [f"q{i}: {selection['field'].replace('$titleSlug', f'$slug{i}')} {{{selection['body']}}}"
+              for i in range(count)]
+    return f"query questionBatch({variable_decl}) {{\n" + "\n".join(fields) + "\n}"
+
+
+CSV_FIELDNAMES = ['title', 'titleSlug', 'lang', 'statusDisplay', 'timestamp', 'source', 'runtime', 'memory']
+ANALYSIS_BACKENDS = ['python', 'columnar']  # columnar needs NumPy
+
+
+# Epochs some payloads are offset by, tried in order for timestamps in the future
+EPOCH_ADJUSTMENTS = [
+    1577836800,  # 2020-01-01
+    1609459200,  # 2021-01-01
+    1640995200,  # 2022-01-01
+    1672531200,  # 2023-01-01
+    1704067200,  # 2024-01-01
+]
+MIN_TIMESTAMP = 946684800  # 2000-01-01
+
+
+class TimestampNormalizer:
+    """Memoized raw timestamp -> epoch seconds normalization
+    
+    Each distinct raw value is resolved once; normalize_many() is the bulk path,
+    vectorized with NumPy when it is installed. Rejected values are counted by
+    reason when debug_mode is on.
+    """
+    
+    def __init__(self, max_size: int = 200000):
+        self.max_size = max_size
+        self.cache = {}
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.rejected = defaultdict(int)  # reason -> count, debug mode only
+    
+    def compute(self, timestamp: Any, debug_mode: bool = False) -> int:
+        """Uncached normalization, 0 when missing or invalid"""
+        if not timestamp:
+            return 0
+            
+        try:
+            # Convert to int
+            ts = int(timestamp)
+            
+            # Handle different timestamp formats
+            current_time = time.time()
+            
+            # If timestamp is in milliseconds, convert to seconds
+            if ts > 10000000000:
+                ts = ts // 1000
+            
+            # If timestamp is still in the future, it might need adjustment
+            if ts > current_time:
+                for adjustment in EPOCH_ADJUSTMENTS:
+                    adjusted_ts = ts - adjustment
+                    if MIN_TIMESTAMP <= adjusted_ts <= current_time:  # Between 2000 and now
+                        ts = adjusted_ts
+                        break
+            
+            # Final validation - timestamp should be reasonable
+            if MIN_TIMESTAMP <= ts <= current_time:  # Between 2000 and now
+                return ts
+            else:
+                if debug_mode:
+                    self.rejected['out_of_range'] += 1
+                    print(f"   Debug: Invalid timestamp {timestamp} -> {ts}")
+                return 0
+                
+        except (TypeError, ValueError) as e:
+            if debug_mode:
+                self.rejected['unparseable'] += 1
+                print(f"   Debug: Timestamp parsing error for {timestamp}: {e}")
+            return 0
+    
+    def normalize(self, timestamp: Any, debug_mode: bool = False) -> int:
+        """Cached normalization of one raw timestamp"""
+        try:
+            ts = self.cache.get(timestamp)
+        except TypeError:  # Unhashable payload value
+            return self.compute(timestamp, debug_mode)
+        
+        if ts is not None:
+            if debug_mode:
+                self.cache_hits += 1
+            return ts
+        
+        if debug_mode:
+            self.cache_misses += 1
+        ts = self.compute(timestamp, debug_mode)
+        
+        if len(self.cache) >= self.max_size:
+            self.cache.clear()
+        self.cache[timestamp] = ts
+        return ts
+    
+    def normalize_many(self, values: Any, debug_mode: bool = False) -> Any:
+        """Bulk normalization: a NumPy int64 array in gives an array out, anything else a list"""
+        if np is None or not isinstance(values, np.ndarray):
+            return [self.normalize(value, debug_mode) for value in values]
+        
+        raw = values.astype(np.int64, copy=False)
+        now = int(time.time())
+        ts = np.where(raw > 10000000000, raw // 1000, raw)
+        
+        # Future timestamps get the first epoch adjustment that lands between 2000 and now
+        adjusted = ts.copy()
+        pending = ts > now
+        for adjustment in EPOCH_ADJUSTMENTS:
+            candidate = ts - adjustment
+            fits = pending & (candidate >= MIN_TIMESTAMP) & (candidate <= now)
+            adjusted = np.where(fits, candidate, adjusted)
+            pending &= ~fits
+        
+        valid = (adjusted >= MIN_TIMESTAMP) & (adjusted <= now)
+        if debug_mode:
+            self.rejected['out_of_range'] += int(((raw != 0) & ~valid).sum())
+        return np.where(valid, adjusted, 0)
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'cached_values': len(self.cache),
+            'cache_hits': self.cache_hits,
+            'cache_misses': self.cache_misses,
+            'rejected': dict(self.rejected)
+        }
+
+
+TIMESTAMP_NORMALIZER = TimestampNormalizer()
+
+
+def normalize_epoch(timestamp: Any, debug_mode: bool = False) -> int:
+    """Normalize a raw API timestamp to epoch seconds, 0 when missing or invalid"""
+    return TIMESTAMP_NORMALIZER.normalize(timestamp, debug_mode)
+
+
+def parse_timestamp(timestamp: Any, debug_mode: bool = False) -> Optional[datetime]:
+    """Enhanced timestamp parsing with multiple format support"""
+    ts = normalize_epoch(timestamp, debug_mode)
+    try:
+        return datetime.fromtimestamp(ts) if ts else None
+    except (ValueError, OSError) as e:
+        if debug_mode:
+            print(f"   Debug: Timestamp parsing error for {timestamp}: {e}")
+        return None
+
+
+def get_submission_status(submission: Dict) -> Any:
+    """Status of a submission in either GraphQL or REST format"""
+    return (submission.get('statusDisplay') or
+            submission.get('status_display') or
+            submission.get('status') or
+            'Unknown')
+
+
+def is_accepted_status(status: Any) -> bool:
+    """Acceptance detection for display strings and numeric REST codes"""
+    return (
+        status == 'Accepted' or
+        status == 10 or
+        'Accepted' in str(status) or
+        str(status).lower() == 'accepted'
+    )
+
+
+class SubmissionStatus(Enum):
+    """Submission verdicts, valued by their display string"""
+    ACCEPTED = 'Accepted'
+    WRONG_ANSWER = 'Wrong Answer'
+    MEMORY_LIMIT_EXCEEDED = 'Memory Limit Exceeded'
+    OUTPUT_LIMIT_EXCEEDED = 'Output Limit Exceeded'
+    TIME_LIMIT_EXCEEDED = 'Time Limit Exceeded'
+    RUNTIME_ERROR = 'Runtime Error'
+    INTERNAL_ERROR = 'Internal Error'
+    COMPILE_ERROR = 'Compile Error'
+    UNKNOWN_ERROR = 'Unknown Error'
+    TIMEOUT = 'Timeout'
+    UNKNOWN = 'Unknown'
+    
+    @classmethod
+    def from_raw(cls, status: Any) -> 'SubmissionStatus':
+        """Map a display string or numeric REST status code to a status"""
+        if isinstance(status, cls):
+            return status
+        
+        found = STATUS_BY_RAW.get(status)
+        if found is not None:
+            return found
+        
+        if is_accepted_status(status):
+            return cls.ACCEPTED
+        return STATUS_BY_RAW.get(str(status).strip().lower(), cls.UNKNOWN)
+
+
+# Display strings (lowercased) and REST numeric codes
+STATUS_BY_RAW = {status.value.lower(): status for status in SubmissionStatus}
+STATUS_BY_RAW.update({status.value: status for status in SubmissionStatus})
+STATUS_BY_RAW.update({
+    10: SubmissionStatus.ACCEPTED,
+    11: SubmissionStatus.WRONG_ANSWER,
+    12: SubmissionStatus.MEMORY_LIMIT_EXCEEDED,
+    13: SubmissionStatus.OUTPUT_LIMIT_EXCEEDED,
+    14: SubmissionStatus.TIME_LIMIT_EXCEEDED,
+    15: SubmissionStatus.RUNTIME_ERROR,
+    16: SubmissionStatus.INTERNAL_ERROR,
+    20: SubmissionStatus.COMPILE_ERROR,
+    21: SubmissionStatus.UNKNOWN_ERROR,
+    30: SubmissionStatus.TIMEOUT
+})
+
+
+class SubmissionSource(Enum):
+    GRAPHQL = 'graphql'
+    REST = 'rest'
+    UNKNOWN = 'unknown'
+
+
+class Submission:
+    """Normalized submission record built once from a GraphQL or REST payload"""
+    
+    __slots__ = ('id', 'title', 'title_slug', 'lang', 'status', 'timestamp',
+                 'source', 'runtime', 'memory')
+    
+    def __init__(self, id: str, title: str, title_slug: str, lang: str, status: SubmissionStatus,
+                 timestamp: int, source: SubmissionSource, runtime: str = '', memory: str = ''):
+        self.id = id
+        self.title = title
+        self.title_slug = title_slug
+        self.lang = lang
+        self.status = status
+        self.timestamp = timestamp  # Normalized epoch seconds, 0 when unknown
+        self.source = source
+        self.runtime = runtime
+        self.memory = memory
+    
+    @classmethod
+    def from_api(cls, payload: Dict, debug_mode: bool = False) -> 'Submission':
+        """Normalize a raw API dict (either schema) into a record"""
+        submission_id = payload.get('id')
+        try:
+            source = SubmissionSource(payload.get('_source', 'unknown'))
+        except ValueError:
+            source = SubmissionSource.UNKNOWN
+        
+        return cls(
+            id=str(submission_id) if submission_id is not None else '',
+            title=payload.get('title') or payload.get('problem_title', 'Unknown'),
+            title_slug=sys.intern(payload.get('titleSlug') or payload.get('title_slug') or ''),
+            lang=sys.intern(payload.get('lang') or payload.get('language') or 'Unknown'),
+            status=SubmissionStatus.from_raw(get_submission_status(payload)),
+            timestamp=normalize_epoch(payload.get('timestamp'), debug_mode),
+            source=source,
+            runtime=payload.get('runtime') or '',
+            memory=payload.get('memory') or ''
+        )
+    
+    @property
+    def is_accepted(self) -> bool:
+        return self.status is SubmissionStatus.ACCEPTED
+    
+    @property
+    def key(self) -> tuple:
+        """Deduplication key independent of the source schema"""
+        return (self.title_slug, self.lang, self.timestamp, self.status)
+    
+    @property
+    def canonical_key(self) -> str:
+        """Submission id, or a normalized fallback key for payloads without one"""
+        if self.id:
+            return self.id
+        return f"{self.title_slug}|{self.lang}|{self.timestamp}|{self.status.value}"
+    
+    def datetime(self) -> Optional[datetime]:
+        return datetime.fromtimestamp(self.timestamp) if self.timestamp else None
+
+
+def normalize_submissions(payloads: List[Dict], debug_mode: bool = False) -> List[Submission]:
+    """Run the single normalization stage over raw API payloads"""
+    return [Submission.from_api(payload, debug_mode) for payload in payloads]
+
+
+class SubmissionIndex:
+    """Hash index of merged submissions: canonical key -> normalized fingerprint
+    
+    Lookups match on the submission id first and fall back to the normalized
+    (titleSlug, lang, timestamp, status) fingerprint, so rows from either API
+    schema, with or without an id, resolve to the same entry. The index can be
+    persisted so later runs don't rebuild it from the full history.
+    """
+    
+    def __init__(self):
+        self.fingerprints = {}  # canonical key -> record.key
+        self.by_fingerprint = {}  # record.key -> canonical key
+        self.submission_count = 0  # Rows of history the index was built from
+    
+    def __len__(self) -> int:
+        return len(self.fingerprints)
+    
+    def lookup(self, record: Submission) -> Optional[str]:
+        """Canonical key of an indexed submission matching record, if any"""
+        if record.canonical_key in self.fingerprints:
+            return record.canonical_key
+        return self.by_fingerprint.get(record.key)
+    
+    def add(self, record: Submission) -> None:
+        self.fingerprints[record.canonical_key] = record.key
+        self.by_fingerprint.setdefault(record.key, record.canonical_key)
+    
+    @property
+    def newest_timestamp(self) -> int:
+        return max((fingerprint[2] for fingerprint in self.fingerprints.values()), default=0)
+    
+    @classmethod
+    def from_submissions(cls, submissions: List[Any], debug_mode: bool = False) -> 'SubmissionIndex':
+        """Index raw payloads or already normalized Submission records"""
+        index = cls()
+        for sub in submissions:
+            index.add(sub if isinstance(sub, Submission) else Submission.from_api(sub, debug_mode))
+        index.submission_count = len(submissions)
+        return index
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'submission_count': self.submission_count,
+            'fingerprints': {
+                key: [slug, lang, timestamp, status.value]
+                for key, (slug, lang, timestamp, status) in self.fingerprints.items()
+            }
+        }
+    
+    @classmethod
+    def from_dict(cls, state: Dict[str, Any]) -> 'SubmissionIndex':
+        index = cls()
+        for key, (slug, lang, timestamp, status) in state['fingerprints'].items():
+            fingerprint = (sys.intern(slug), sys.intern(lang), timestamp, SubmissionStatus(status))
+            index.fingerprints[key] = fingerprint
+            index.by_fingerprint.setdefault(fingerprint, key)
+        index.submission_count = state.get('submission_count', 0)
+        return index
+
+
+class SubmissionAggregator:
+    """Running submission statistics fed batch by batch
+    
+    Aggregators built over disjoint sets of submissions can be combined exactly
+    with merge(), and to_dict()/from_dict() persist the state next to the data so
+    later runs only need to update() with new submissions.
+    """
+    
+    STATE_VERSION = 1
+    
+    def __init__(self, debug_mode: bool = False):
+        self.debug_mode = debug_mode
+        self.total_submissions = 0
+        self.accepted_submissions = 0
+        self.language_stats = defaultdict(int)
+        self.status_stats = defaultdict(int)
+        self.problem_attempts = defaultdict(int)  # titleSlug -> attempt count
+        self.solved_problems = set()
+        self.yearly_stats = defaultdict(int)
+        self.monthly_stats = defaultdict(int)
+    
+    def update(self, batch: List[Any]) -> None:
+        """Add a batch of Submission records (raw dicts are normalized first) to the running totals"""
+        for submission in batch:
+            if not isinstance(submission, Submission):
+                submission = Submission.from_api(submission, self.debug_mode)
+            
+            title_slug = submission.title_slug
+            
+            self.total_submissions += 1
+            if title_slug:
+                self.problem_attempts[title_slug] += 1
+            
+            if submission.is_accepted:
+                self.accepted_submissions += 1
+                if title_slug:
+                    self.solved_problems.add(title_slug)
+            
+            self.language_stats[submission.lang] += 1
+            self.status_stats[submission.status.value] += 1
+            
+            if submission.timestamp:
+                dt = datetime.fromtimestamp(submission.timestamp)
+                self.yearly_stats[dt.year] += 1
+                self.monthly_stats[f"{dt.year}-{dt.month:02d}"] += 1
+    
+    def merge(self, other: 'SubmissionAggregator') -> 'SubmissionAggregator':
+        """Fold another aggregator over disjoint submissions into this one"""
+        self.total_submissions += other.total_submissions
+        self.accepted_submissions += other.accepted_submissions
+        self.solved_problems |= other.solved_problems
+        
+        for mine, theirs in ((self.language_stats, other.language_stats),
+                             (self.status_stats, other.status_stats),
+                             (self.problem_attempts, other.problem_attempts),
+                             (self.yearly_stats, other.yearly_stats),
+                             (self.monthly_stats, other.monthly_stats)):
+            for key, count in theirs.items():
+                mine[key] += count
+        
+        return self
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-serializable aggregator state"""
+        return {
+            'version': self.STATE_VERSION,
+            'total_submissions': self.total_submissions,
+            'accepted_submissions': self.accepted_submissions,
+            'language_stats': dict(self.language_stats),
+            'status_stats': {str(status): count for status, count in self.status_stats.items()},
+            'problem_attempts': dict(self.problem_attempts),
+            'solved_problems': sorted(self.solved_problems),
+            'yearly_stats': {str(year): count for year, count in self.yearly_stats.items()},
+            'monthly_stats': dict(self.monthly_stats)
+        }
+    
+    @classmethod
+    def from_dict(cls, state: Dict[str, Any], debug_mode: bool = False) -> 'SubmissionAggregator':
+        """Restore an aggregator saved with to_dict"""
+        if state.get('version') != cls.STATE_VERSION:
+            raise ValueError(f"Unsupported aggregator state version: {state.get('version')}")
+        
+        aggregator = cls(debug_mode)
+        aggregator.total_submissions = state['total_submissions']
+        aggregator.accepted_submissions = state['accepted_submissions']
+        aggregator.language_stats.update(state['language_stats'])
+        aggregator.status_stats.update(state['status_stats'])
+        aggregator.problem_attempts.update(state['problem_attempts'])
+        aggregator.solved_problems.update(state['solved_problems'])
+        aggregator.yearly_stats.update({int(year): count for year, count in state['yearly_stats'].items()})
+        aggregator.monthly_stats.update(state['monthly_stats'])
+        return aggregator
+    
+    def snapshot(self) -> Dict[str, Any]:
+        """Analysis dict with the same keys as analyze_comprehensive_data"""
+        total = self.total_submissions
+        attempted = len(self.problem_attempts)
+        solved = len(self.solved_problems)
+        
+        return {
+            'total_submissions': total,
+            'accepted_submissions': self.accepted_submissions,
+            'failed_submissions': total - self.accepted_submissions,
+            'acceptance_rate': (self.accepted_submissions / total * 100) if total > 0 else 0,
+            'unique_problems_attempted': attempted,
+            'unique_problems_solved': solved,
+            'problem_solving_rate': (solved / attempted * 100) if attempted > 0 else 0,
+            'avg_attempts_per_problem': total / attempted if attempted > 0 else 0,
+            'problems_with_multiple_attempts': sum(1 for count in self.problem_attempts.values() if count > 1),
+            'language_stats': dict(self.language_stats),
+            'status_stats': dict(self.status_stats),
+            'yearly_stats': dict(self.yearly_stats),
+            'monthly_stats': dict(self.monthly_stats)
+        }
+
+
+class ProblemTimeline:
+    """One problem's attempts in time order plus the retry summary derived from them
+    
+    Attempts are (timestamp, status, lang) with the status display string. Appending
+    in time order updates the summary in O(1); an out-of-order attempt is inserted
+    in place and only this problem's summary is recomputed.
+    """
+    
+    __slots__ = ('attempts', 'first_accept', 'failed_before_accept', 'wrong_before_accept', 'language_switches')
+    
+    def __init__(self):
+        self.attempts = []
+        self.first_accept = None
+        self.failed_before_accept = 0
+        self.wrong_before_accept = 0
+        self.language_switches = 0
+    
+    def add(self, timestamp: int, status: str, lang: str) -> None:
+        attempt = (timestamp, status, lang)
+        if self.attempts and timestamp < self.attempts[-1][0]:
+            bisect.insort(self.attempts, attempt)
+            self.refresh()
+            return
+        
+        if self.attempts and lang != self.attempts[-1][2]:
+            self.language_switches += 1
+        self.attempts.append(attempt)
+        self.count_attempt(attempt)
+    
+    def count_attempt(self, attempt: tuple) -> None:
+        timestamp, status, _ = attempt
+        if self.first_accept is not None:
+            return
+        if status == SubmissionStatus.ACCEPTED.value:
+            self.first_accept = timestamp
+        else:
+            self.failed_before_accept += 1
+            if status == SubmissionStatus.WRONG_ANSWER.value:
+                self.wrong_before_accept += 1
+    
+    def refresh(self) -> None:
+        """Recompute the summary from the attempts"""
+        self.first_accept = None
+        self.failed_before_accept = self.wrong_before_accept = 0
+        self.language_switches = sum(1 for previous, attempt in zip(self.attempts, self.attempts[1:])
+                                     if previous[2] != attempt[2])
+        for attempt in self.attempts:
+            self.count_attempt(attempt)
+    
+    @property
+    def first_attempt(self) -> int:
+        return self.attempts[0][0]
+    
+    @property
+    def solved(self) -> bool:
+        return self.first_accept is not None
+    
+    @property
+    def time_to_accept(self) -> Optional[int]:
+        """Seconds from the first attempt to the first accept"""
+        return self.first_accept - self.first_attempt if self.solved else None
+    
+    def summary(self) -> Dict[str, Any]:
+        return {
+            'attempts': len(self.attempts),
+            'first_attempt': self.first_attempt,
+            'first_accept': self.first_accept,
+            'last_attempt': self.attempts[-1][0],
+            'time_to_accept_seconds': self.time_to_accept,
+            'failed_before_accept': self.failed_before_accept,
+            'wrong_before_accept': self.wrong_before_accept,
+            'language_switches': self.language_switches,
+            'languages': sorted(set(attempt[2] for attempt in self.attempts))
+        }
+
+
+class ProblemTimelineIndex:
+    """Persistent titleSlug -> ProblemTimeline index of a user's history
+    
+    Fed with update() like SubmissionAggregator, so later runs only add new
+    submissions; queries read the per-problem summaries instead of rescanning
+    the history.
+    """
+    
+    STATE_VERSION = 2
+    
+    def __init__(self, debug_mode: bool = False):
+        self.debug_mode = debug_mode
+        self.timelines = {}
+        self.unsolved = set()  # titleSlugs never accepted
+        self.submission_count = 0  # Rows of history the index was built from
+    
+    def __len__(self) -> int:
+        return len(self.timelines)
+    
+    def update(self, batch: List[Any]) -> None:
+        """Add a batch of Submission records (raw dicts are normalized first)"""
+        for submission in batch:
+            if not isinstance(submission, Submission):
+                submission = Submission.from_api(submission, self.debug_mode)
+            self.submission_count += 1
+            
+            # Rows without a timestamp can't be placed on the timeline
+            title_slug = submission.title_slug
+            if not title_slug or not submission.timestamp:
+                continue
+            timeline = self.timelines.get(title_slug)
+            if timeline is None:
+                timeline = self.timelines[title_slug] = ProblemTimeline()
+            timeline.add(submission.timestamp, submission.status.value, submission.lang)
+            
+            if timeline.solved:
+                self.unsolved.discard(title_slug)
+            else:
+                self.unsolved.add(title_slug)
+    
+    def get(self, title_slug: str) -> Optional[Dict[str, Any]]:
+        timeline = self.timelines.get(title_slug)
+        return timeline.summary() if timeline else None
+    
+    def unsolved_after(self, min_attempts: int) -> List['tuple']:
+        """(titleSlug, attempts) of never-accepted problems tried at least min_attempts times, most tried first"""
+        stuck = [(slug, len(self.timelines[slug].attempts)) for slug in self.unsolved
+                 if len(self.timelines[slug].attempts) >= min_attempts]
+        return sorted(stuck, key=lambda item: (-item[1], item[0]))
+    
+    def snapshot(self, top: int = 10) -> Dict[str, Any]:
+        """Retry analytics across all problems"""
+        solved = [timeline for timeline in self.timelines.values() if timeline.solved]
+        first_try = sum(1 for timeline in solved if timeline.failed_before_accept == 0)
+        
+        return {
+            'problems_tracked': len(self.timelines),
+            'problems_solved': len(solved),
+            'problems_unsolved': len(self.unsolved),
+            'solved_first_try': first_try,
+            'first_try_rate': (first_try / len(solved) * 100) if solved else 0,
+            'avg_failed_before_accept': (sum(t.failed_before_accept for t in solved) / len(solved)) if solved else 0,
+            'avg_wrong_before_accept': (sum(t.wrong_before_accept for t in solved) / len(solved)) if solved else 0,
+            'avg_time_to_accept_seconds': (sum(t.time_to_accept for t in solved) / len(solved)) if solved else 0,
+            'problems_with_language_switches': sum(1 for t in self.timelines.values() if t.language_switches),
+            'most_attempted_unsolved': [{'titleSlug': slug, 'attempts': attempts}
+                                        for slug, attempts in self.unsolved_after(1)[:top]]
+        }
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-serializable index state"""
+        return {
+            'version': self.STATE_VERSION,
+            'submission_count': self.submission_count,
+            'timelines': {slug: timeline.attempts for slug, timeline in self.timelines.items()}
+        }
+    
+    @classmethod
+    def from_dict(cls, state: Dict[str, Any], debug_mode: bool = False) -> 'ProblemTimelineIndex':
+        """Restore an index saved with to_dict"""
+        if state.get('version') != cls.STATE_VERSION:
+            raise ValueError(f"Unsupported problem timeline version: {state.get('version')}")
+        
+        index = cls(debug_mode)
+        for slug, attempts in state['timelines'].items():
+            timeline = ProblemTimeline()
+            timeline.attempts = [(timestamp, sys.intern(status), sys.intern(lang))
+                                 for timestamp, status, lang in attempts]
+            timeline.refresh()
+            index.timelines[sys.intern(slug)] = timeline
+            if not timeline.solved:
+                index.unsolved.add(slug)
+        index.submission_count = state['submission_count']
+        return index
+
+
+class SubmissionColumns:
+    """Columnar view of a submission history for vectorized analytics (requires NumPy)
+    
+    Field names, statuses and timestamps are normalized once while building the
+    columns (Submission records are taken as already normalized); every statistic
+    afterwards is a NumPy group-by over integer codes.
+    """
+    
+    def __init__(self, submissions: List[Any]):
+        if np is None:
+            raise ImportError("The columnar analytics backend requires numpy")
+        
+        self.slug_values, slug_codes = [], {}
+        self.lang_values, lang_codes = [], {}
+        self.status_values, status_codes = [], {}
+        
+        def factorize(value, codes, values):
+            code = codes.get(value)
+            if code is None:
+                code = codes[value] = len(values)
+                values.append(value)
+            return code
+        
+        size = len(submissions)
+        slugs = np.empty(size, dtype=np.int32)
+        langs = np.empty(size, dtype=np.int32)
+        statuses = np.empty(size, dtype=np.int32)
+        raw_timestamps = np.zeros(size, dtype=np.int64)
+        
+        for i, submission in enumerate(submissions):
+            if isinstance(submission, Submission):
+                slugs[i] = factorize(submission.title_slug, slug_codes, self.slug_values)
+                langs[i] = factorize(submission.lang, lang_codes, self.lang_values)
+                statuses[i] = factorize(submission.status.value, status_codes, self.status_values)
+                raw_timestamps[i] = submission.timestamp
+                continue
+            slugs[i] = factorize(submission.get('titleSlug') or submission.get('title_slug') or '',
+                                 slug_codes, self.slug_values)
+            langs[i] = factorize(submission.get('lang') or submission.get('language') or 'Unknown',
+                                 lang_codes, self.lang_values)
+            statuses[i] = factorize(SubmissionStatus.from_raw(get_submission_status(submission)).value,
+                                    status_codes, self.status_values)
+            try:
+                raw_timestamps[i] = int(submission.get('timestamp') or 0)
+            except (TypeError, ValueError):
+                pass
+        
+        self.slugs = slugs
+        self.langs = langs
+        self.statuses = statuses
+        self.timestamps = TIMESTAMP_NORMALIZER.normalize_many(raw_timestamps)
+        
+        status_accepted = np.array([is_accepted_status(status) for status in self.status_values], dtype=bool)
+        self.accepted = status_accepted[statuses] if size else np.zeros(0, dtype=bool)
+    
+    def local_year_month(self) -> 'tuple':
+        """Local-time (year, month) arrays for rows with a valid timestamp"""
+        timestamps = self.timestamps[self.timestamps > 0]
+        if not len(timestamps):
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        
+        # UTC offsets only change on hour boundaries, so resolve them once per distinct hour
+        hours, inverse = np.unique(timestamps // 3600, return_inverse=True)
+        offsets = np.array([time.localtime(hour * 3600).tm_gmtoff for hour in hours.tolist()], dtype=np.int64)
+        
+        months = (timestamps + offsets[inverse]).astype('datetime64[s]').astype('datetime64[M]').astype(np.int64)
+        return months // 12 + 1970, months % 12 + 1
+    
+    def to_aggregator(self, debug_mode: bool = False) -> SubmissionAggregator:
+        """SubmissionAggregator holding the same counts, so the result can be persisted and updated"""
+        aggregator = SubmissionAggregator(debug_mode)
+        aggregator.total_submissions = len(self.slugs)
+        aggregator.accepted_submissions = int(self.accepted.sum())
+        
+        for lang, count in zip(self.lang_values, np.bincount(self.langs, minlength=len(self.lang_values)).tolist()):
+            if count:
+                aggregator.language_stats[lang] += count
+        for status, count in zip(self.status_values,
+                                 np.bincount(self.statuses, minlength=len(self.status_values)).tolist()):
+            if count:
+                aggregator.status_stats[status] += count
+        
+        slug_counts = np.bincount(self.slugs, minlength=len(self.slug_values)).tolist()
+        solved_counts = np.bincount(self.slugs[self.accepted], minlength=len(self.slug_values)).tolist()
+        for slug, attempts, solves in zip(self.slug_values, slug_counts, solved_counts):
+            if slug and attempts:
+                aggregator.problem_attempts[slug] = attempts
+                if solves:
+                    aggregator.solved_problems.add(slug)
+        
+        years, months = self.local_year_month()
+        for year, count in zip(*np.unique(years, return_counts=True)):
+            aggregator.yearly_stats[int(year)] = int(count)
+        month_values, month_counts = np.unique(years * 100 + months, return_counts=True)
+        for value, count in zip(month_values.tolist(), month_counts.tolist()):
+            aggregator.monthly_stats[f"{value // 100}-{value % 100:02d}"] = count
+        return aggregator
+    
+    def first_times(self) -> 'tuple':
+        """(first attempt, first accept) timestamp per titleSlug, over rows with a slug and a timestamp"""
+        sentinel = np.iinfo(np.int64).max
+        valid = self.timestamps > 0
+        first_attempt = np.full(len(self.slug_values), sentinel, dtype=np.int64)
+        first_accept = np.full(len(self.slug_values), sentinel, dtype=np.int64)
+        np.minimum.at(first_attempt, self.slugs[valid], self.timestamps[valid])
+        np.minimum.at(first_accept, self.slugs[valid & self.accepted], self.timestamps[valid & self.accepted])
+        
+        def to_dict(values):
+            return {slug: int(value) for slug, value in zip(self.slug_values, values.tolist())
+                    if slug and value != sentinel}
+        return to_dict(first_attempt), to_dict(first_accept)
+
+
+class SubmissionStore:
+    """SQLite (WAL) store of submissions for many users, keyed by submission id"""
+    
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS submissions (
+        username TEXT NOT NULL,
+        submission_key TEXT NOT NULL,
+        title TEXT,
+        titleSlug TEXT,
+        lang TEXT,
+        status TEXT,
+        timestamp INTEGER,
+        source TEXT,
+        runtime TEXT,
+        memory TEXT,
+        payload TEXT NOT NULL,
+        PRIMARY KEY (username, submission_key)
+    );
+    CREATE INDEX IF NOT EXISTS idx_submissions_user_time ON submissions (username, timestamp);
+    CREATE INDEX IF NOT EXISTS idx_submissions_slug ON submissions (titleSlug);
+    CREATE INDEX IF NOT EXISTS idx_submissions_lang_status ON submissions (lang, status);
+    CREATE TABLE IF NOT EXISTS profiles (
+        username TEXT PRIMARY KEY,
+        fetch_timestamp TEXT,
+        profile TEXT,
+        analysis TEXT
+    );
+    """
+    
+    def __init__(self, path: str = 'leetcode_submissions.db'):
+        self.path = path
+        self.conn = sqlite3.connect(path, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(self.SCHEMA)
+    
+    def close(self) -> None:
+        self.conn.close()
+    
+    def upsert_submissions(self, username: str, submissions: List[Dict], debug_mode: bool = False,
+                           records: Optional[List[Submission]] = None) -> int:
+        """Bulk upsert raw submissions; REST payloads (which carry more fields) win over GraphQL ones
+        
+        records, if given, are the already normalized submissions in the same order.
+        """
+        if records is None:
+            records = normalize_submissions(submissions, debug_mode)
+        rows = []
+        for sub, record in zip(submissions, records):
+            rows.append((
+                username, record.canonical_key, record.title, record.title_slug, record.lang,
+                record.status.value, record.timestamp, record.source.value, record.runtime, record.memory,
+                json.dumps(sub, ensure_ascii=False)
+            ))
+        
+        with self.conn:
+            self.conn.executemany("""
+                INSERT INTO submissions (username, submission_key, title, titleSlug, lang, status,
+                                         timestamp, source, runtime, memory, payload)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (username, submission_key) DO UPDATE SET
+                    title = excluded.title, titleSlug = excluded.titleSlug, lang = excluded.lang,
+                    status = excluded.status, timestamp = excluded.timestamp, source = excluded.source,
+                    runtime = excluded.runtime, memory = excluded.memory, payload = excluded.payload
+                WHERE excluded.source = 'rest' OR submissions.source != 'rest'
+            """, rows)
+        return len(rows)
+    
+    def load_submissions(self, username: str) -> List[Dict]:
+        """Raw payloads for a user, newest first"""
+        cursor = self.conn.execute(
+            "SELECT payload FROM submissions WHERE username = ? ORDER BY timestamp DESC",
+            (username,)
+        )
+        return [json.loads(payload) for (payload,) in cursor]
+    
+    def save_profile(self, username: str, profile_data: Optional[Dict], analysis: Optional[Dict]) -> None:
+        with self.conn:
+            self.conn.execute("""
+                INSERT INTO profiles (username, fetch_timestamp, profile, analysis) VALUES (?, ?, ?, ?)
+                ON CONFLICT (username) DO UPDATE SET fetch_timestamp = excluded.fetch_timestamp,
+                    profile = excluded.profile, analysis = excluded.analysis
+            """, (username, datetime.now().isoformat(), json.dumps(profile_data, ensure_ascii=False),
+                  json.dumps(analysis, ensure_ascii=False)))
+    
+    def load_profile(self, username: str) -> 'tuple':
+        """(profile_data, analysis) saved for a user, (None, None) if unknown"""
+        row = self.conn.execute(
+            "SELECT profile, analysis FROM profiles WHERE username = ?", (username,)
+        ).fetchone()
+        if row is None:
+            return None, None
+        return json.loads(row[0]), json.loads(row[1])
+    
+    def usernames(self) -> List[str]:
+        return [row[0] for row in self.conn.execute("SELECT DISTINCT username FROM submissions ORDER BY username")]
+    
+    def language_status_counts(self, username: Optional[str] = None) -> List['tuple']:
+        """(lang, status, count) rows for one user or across every stored user"""
+        if username is None:
+            return self.conn.execute(
+                "SELECT lang, status, COUNT(*) FROM submissions GROUP BY lang, status ORDER BY 3 DESC"
+            ).fetchall()
+        return self.conn.execute(
+            "SELECT lang, status, COUNT(*) FROM submissions WHERE username = ? GROUP BY lang, status ORDER BY 3 DESC",
+            (username,)
+        ).fetchall()
+    
+    def problem_attempts(self, title_slug: str) -> List['tuple']:
+        """(username, status, timestamp) for every stored attempt at a problem"""
+        return self.conn.execute(
+            "SELECT username, status, timestamp FROM submissions WHERE titleSlug = ? ORDER BY timestamp",
+            (title_slug,)
+        ).fetchall()
+
+
+class ResponseCache:
+    """On-disk HTTP response cache with per-operation TTLs, LRU eviction and offline replay
+    
+    Entries are keyed by endpoint, URL and GraphQL variables, plus the account for
+    endpoints whose response depends on who is logged in (ACCOUNT_SCOPED). Stale
+    entries that carried an ETag/Last-Modified are revalidated with a conditional
+    request. In offline mode every cached entry is served regardless of age and
+    misses fail without touching the network.
+    """
+    
+    DEFAULT_TTLS = {
+        'graphql:getUserProfile': 6 * 3600,
+        'graphql:languageStats': 6 * 3600,
+        'graphql:userBundle': 3600,
+        'graphql:recentAcSubmissions': 300,
+        'graphql:globalData': 0,
+        'graphql:questionBatch': 7 * 24 * 3600,
+        'rest:submissions': 300
+    }
+    ACCOUNT_SCOPED = frozenset({'graphql:globalData', 'rest:submissions'})
+    
+    def __init__(self, directory: str = '.leetcode_cache', max_bytes: int = 200 * 1024 * 1024,
+                 ttls: Optional[Dict[str, int]] = None, offline: bool = False):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.ttls = dict(self.DEFAULT_TTLS, **(ttls or {}))
+        self.offline = offline
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        
+        os.makedirs(directory, exist_ok=True)
+        self.total_bytes = sum(
+            os.path.getsize(os.path.join(directory, name))
+            for name in os.listdir(directory) if name.endswith('.json')
+        )
+    
+    def make_key(self, method: str, url: str, endpoint: str, payload: Optional[Dict] = None,
+                 account: Optional[str] = None) -> str:
+        variables = json.dumps((payload or {}).get('variables') or {}, sort_keys=True)
+        parts = [endpoint, method.upper(), url, variables]
+        if endpoint in self.ACCOUNT_SCOPED:
+            parts.append(account or '')
+        raw_key = "\n".join(parts)
+        return hashlib.sha256(raw_key.encode('utf-8')).hexdigest()
+    
+    def entry_path(self, key: str) -> str:
+        return os.path.join(self.directory, f'{key}.json')
+    
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        path = self.entry_path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+            os.utime(path)  # mtime doubles as the LRU access time
+            return entry
+        except FileNotFoundError:
+            return None
+        except (ValueError, OSError):
+            return None
+    
+    def is_fresh(self, entry: Dict[str, Any]) -> bool:
+        ttl = self.ttls.get(entry.get('endpoint'), 0)
+        return time.time() - entry.get('stored_at', 0) < ttl
+    
+    def conditional_headers(self, entry: Dict[str, Any]) -> Dict[str, str]:
+        headers = {}
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+    
+    def put(self, key: str, endpoint: str, response: requests.Response) -> None:
+        entry = {
+            'endpoint': endpoint,
+            'url': response.url,
+            'status_code': response.status_code,
+            'body': response.text,
+            'stored_at': time.time(),
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified')
+        }
+        self.write_entry(key, entry)
+    
+    def refresh(self, key: str, entry: Dict[str, Any]) -> None:
+        """Mark an entry fresh again after a 304 revalidation"""
+        entry['stored_at'] = time.time()
+        self.write_entry(key, entry)
+    
+    def write_entry(self, key: str, entry: Dict[str, Any]) -> None:
+        path = self.entry_path(key)
+        data = json.dumps(entry, ensure_ascii=False).encode('utf-8')
+        
+        with self.lock:
+            old_size = os.path.getsize(path) if os.path.exists(path) else 0
+            temp_path = f'{path}.{threading.get_ident()}.tmp'
+            with open(temp_path, 'wb') as f:
+                f.write(data)
+            os.replace(temp_path, path)
+            
+            self.total_bytes += len(data) - old_size
+            if self.total_bytes > self.max_bytes:
+                self.evict()
+    
+    def evict(self) -> None:
+        """Drop least recently used entries until the cache is under 90% of max_bytes"""
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith('.json'):
+                path = os.path.join(self.directory, name)
+                stat = os.stat(path)
+                entries.append((stat.st_mtime, stat.st_size, path))
+        
+        entries.sort()
+        target = self.max_bytes * 0.9
+        for _, size, path in entries:
+            if self.total_bytes <= target:
+                break
+            os.remove(path)
+            self.total_bytes -= size
+    
+    @staticmethod
+    def to_response(entry: Dict[str, Any]) -> requests.Response:
+        """Rebuild a requests.Response from a cached entry"""
+        response = requests.Response()
+        response.status_code = entry['status_code']
+        response.url = entry['url']
+        response._content = entry['body'].encode('utf-8')
+        response.encoding = 'utf-8'
+        response.headers['X-Cache'] = 'HIT'
+        return response
+
+
+class ProblemMetadataCache:
+    """Long-lived titleSlug -> difficulty/topic tags cache shared by every user we process
+    
+    Problem metadata rarely changes, so entries are only refetched after ttl_seconds.
+    Slugs the API does not know are cached too, so they are not asked for every run.
+    save() merges with the file on disk first, so processes sharing the file keep
+    each other's entries.
+    """
+    
+    STATE_VERSION = 1
+    DIFFICULTIES = ('Easy', 'Medium', 'Hard')
+    
+    def __init__(self, path: str = '.leetcode_problems.json', ttl_seconds: int = 30 * 24 * 3600):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.lock = threading.Lock()
+        self.updated = {}  # Entries fetched since the last save
+        self.entries = self.read()
+    
+    def read(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+            if state.get('version') != self.STATE_VERSION:
+                return {}
+            return state['problems']
+        except FileNotFoundError:
+            return {}
+        except (ValueError, KeyError, AttributeError, OSError) as e:
+            print(f"⚠️ Ignoring unreadable problem metadata cache {self.path}: {e}")
+            return {}
+    
+    def get(self, title_slug: str) -> Optional[Dict[str, Any]]:
+        return self.entries.get(title_slug)
+    
+    def stale_slugs(self, title_slugs: Iterable[str]) -> List[str]:
+        """Slugs with no cached entry or one older than the TTL"""
+        cutoff = time.time() - self.ttl_seconds
+        return sorted(slug for slug in set(title_slugs)
+                      if slug and self.entries.get(slug, {}).get('fetched_at', 0) < cutoff)
+    
+    def put(self, title_slug: str, question: Optional[Dict[str, Any]]) -> None:
+        """Cache a GraphQL question payload, or None for a slug the API does not know"""
+        question = question or {}
+        entry = {
+            'difficulty': question.get('difficulty'),
+            'topicTags': list(dict.fromkeys(tag.get('name') for tag in question.get('topicTags') or []
+                                            if tag.get('name'))),
+            'questionFrontendId': question.get('questionFrontendId'),
+            'fetched_at': time.time()
+        }
+        with self.lock:
+            self.entries[title_slug] = entry
+            self.updated[title_slug] = entry
+    
+    def save(self) -> None:
+        with self.lock:
+            if not self.updated:
+                return
+            entries = self.read()
+            entries.update(self.updated)
+            write_json_atomic(self.path, {'version': self.STATE_VERSION, 'problems': entries}, ensure_ascii=False)
+            self.entries = entries
+            self.updated = {}
+    
+    def breakdown(self, problem_attempts: Dict[str, int], solved_problems: Iterable[str]) -> Dict[str, Any]:
+        """Attempted/solved problems and submissions per difficulty and per topic tag"""
+        def new_stats() -> Dict[str, int]:
+            return {'attempted': 0, 'solved': 0, 'submissions': 0}
+        
+        difficulty_stats = {difficulty: new_stats() for difficulty in self.DIFFICULTIES}
+        topic_stats = defaultdict(new_stats)
+        solved_problems = set(solved_problems)
+        
+        for slug, attempts in problem_attempts.items():
+            entry = self.entries.get(slug) or {}
+            difficulty = entry.get('difficulty') or 'Unknown'
+            buckets = [difficulty_stats.setdefault(difficulty, new_stats())]
+            buckets.extend(topic_stats[tag] for tag in entry.get('topicTags', []))
+            
+            for stats in buckets:
+                stats['attempted'] += 1
+                stats['submissions'] += attempts
+                if slug in solved_problems:
+                    stats['solved'] += 1
+        
+        return {
+            'difficulty_stats': difficulty_stats,
+            'topic_stats': dict(sorted(topic_stats.items(), key=lambda item: item[1]['solved'], reverse=True))
+        }
+
+
+def write_json_atomic(path: str, data: Any, **dump_kwargs) -> None:
+    """Write JSON to a temp file and rename it over path, so readers never see a partial file"""
+    temp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, **dump_kwargs)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
+
+
+def write_jsonl_atomic(path: str, rows: List[Dict]) -> None:
+    """Write one JSON object per line to a temp file and rename it over path"""
+    temp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        for row in rows:
+            f.write(json.dumps(row, ensure_ascii=False) + '\n')
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
+
+
+class RunCheckpoint:
+    """Per-user record of finished pipeline stages, so --resume can skip them after a crash
+    
+    {username}_run_checkpoint.json holds the profile, the merge index and the aggregator
+    state (the analysis is its snapshot). The merged history lives in {username}_run_submissions.jsonl.
+    Every write is a temp file plus rename. The REST crawl keeps its own page checkpoint
+    (see fetch_full_history_rest).
+    """
+    
+    VERSION = 1
+    STAGES = ('profile', 'fetch', 'analyze')
+    
+    def __init__(self, username: str):
+        self.username = username
+        self.path = f'{username}_run_checkpoint.json'
+        self.submissions_path = f'{username}_run_submissions.jsonl'
+        self.state = {'version': self.VERSION, 'username': username, 'stages': {}}
+    
+    def load(self) -> bool:
+        """Restore the last checkpoint, returns False if there is none"""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            return False
+        except (ValueError, OSError) as e:
+            print(f"⚠️ Ignoring unreadable run checkpoint {self.path}: {e}")
+            return False
+        
+        if state.get('version') != self.VERSION or state.get('username') != self.username:
+            return False
+        if 'fetch' in state['stages'] and not os.path.exists(self.submissions_path):
+            # The history file is gone; everything from the fetch stage on has to be redone
+            state['stages'] = {stage: data for stage, data in state['stages'].items() if stage == 'profile'}
+        self.state = state
+        return True
+    
+    def has(self, stage: str) -> bool:
+        return stage in self.state['stages']
+    
+    def completed_stages(self) -> List[str]:
+        return [stage for stage in self.STAGES if self.has(stage)]
+    
+    def save_stage(self, stage: str, data: Dict[str, Any]) -> None:
+        self.state['stages'][stage] = dict(data, completed_at=datetime.now().isoformat())
+        write_json_atomic(self.path, self.state, ensure_ascii=False)
+    
+    def save_profile(self, profile_data: Optional[Dict], recent_submissions: Optional[List[Dict]]) -> None:
+        self.save_stage('profile', {'profile_data': profile_data, 'recent_submissions': recent_submissions})
+    
+    def save_submissions(self, submissions: List[Dict], index: Optional[SubmissionIndex],
+                         incremental: bool = False) -> None:
+        # History first: a checkpoint must never point at a file that was not fully written
+        write_jsonl_atomic(self.submissions_path, submissions)
+        self.save_stage('fetch', {
+            'count': len(submissions),
+            'incremental': incremental,
+            'index': index.to_dict() if index is not None else None
+        })
+    
+    def load_submissions(self) -> 'tuple':
+        """(submissions, index) saved by the fetch stage"""
+        with open(self.submissions_path, 'r', encoding='utf-8') as f:
+            submissions = [json.loads(line) for line in f if line.strip()]
+        index_state = self.state['stages']['fetch'].get('index')
+        return submissions, SubmissionIndex.from_dict(index_state) if index_state else None
+    
+    def save_analysis(self, aggregator: SubmissionAggregator) -> None:
+        self.save_stage('analyze', {'aggregator': aggregator.to_dict()})
+    
+    def load_analysis(self, debug_mode: bool = False) -> 'tuple':
+        """(analysis, aggregator) saved by the analyze stage"""
+        aggregator = SubmissionAggregator.from_dict(self.state['stages']['analyze']['aggregator'], debug_mode)
+        return aggregator.snapshot(), aggregator
+    
+    def clear(self) -> None:
+        """Forget the checkpoint, e.g. once the run's output files are saved"""
+        self.state['stages'] = {}
+        for path in (self.path, self.submissions_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+
+class SnapshotFile:
+    """Compact snapshot: a small JSON header index followed by independently gzipped sections
+    
+    Layout is MAGIC, an 8-byte big-endian header length, the header JSON, then the
+    sections. The header holds the metadata inline plus each section's offset and
+    length, so a reader can decompress one section, or stream the history line by
+    line, without touching the rest. The history is gzipped JSONL and always comes last.
+    """
+    
+    MAGIC = b'LCSNAP1\n'
+    EXTENSION = '.lcsnap'
+    HISTORY_SECTION = 'submission_history'
+    
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as f:
+            if f.read(len(self.MAGIC)) != self.MAGIC:
+                raise ValueError(f"{path} is not a compressed LeetCode snapshot")
+            (header_length,) = struct.unpack('>Q', f.read(8))
+            self.header = json.loads(f.read(header_length).decode('utf-8'))
+        self.data_offset = len(self.MAGIC) + 8 + header_length
+    
+    @property
+    def metadata(self) -> Dict[str, Any]:
+        return self.header['metadata']
+    
+    @property
+    def sections(self) -> List[str]:
+        return list(self.header['sections'])
+    
+    def section(self, name: str) -> Any:
+        """Decode one section, e.g. 'user_profile' or 'comprehensive_analysis'"""
+        if name == self.HISTORY_SECTION:
+            return list(self.iter_submissions())
+        
+        section = self.header['sections'][name]
+        with open(self.path, 'rb') as f:
+            f.seek(self.data_offset + section['offset'])
+            return json.loads(gzip.decompress(f.read(section['length'])))
+    
+    def iter_submissions(self) -> Iterator[Dict]:
+        """Stream the history without loading it, decompressing as lines are consumed"""
+        section = self.header['sections'][self.HISTORY_SECTION]
+        with open(self.path, 'rb') as f:
+            f.seek(self.data_offset + section['offset'])
+            with gzip.GzipFile(fileobj=f, mode='rb') as history:
+                for line in history:
+                    if line.strip():
+                        yield json.loads(line)
+    
+    def load(self) -> Dict[str, Any]:
+        """The whole snapshot, shaped like the JSON snapshot"""
+        data = {'metadata': self.metadata}
+        for name in self.sections:
+            data[name] = self.section(name)
+        return data
+    
+    @classmethod
+    def write(cls, path: str, metadata: Dict[str, Any], sections: Dict[str, Any],
+              submissions: Iterable[Dict], compresslevel: int = 6) -> int:
+        """Atomically write a snapshot, returns its size in bytes"""
+        blobs = []
+        index = {}
+        offset = 0
+        for name, value in sections.items():
+            blob = gzip.compress(json.dumps(value, ensure_ascii=False).encode('utf-8'), compresslevel)
+            index[name] = {'offset': offset, 'length': len(blob), 'format': 'json'}
+            blobs.append(blob)
+            offset += len(blob)
+        
+        # wbits=31 makes zlib emit a gzip member, compressed incrementally in batches of rows
+        compressor = zlib.compressobj(compresslevel, zlib.DEFLATED, 31)
+        count = 0
+        pending = []
+        for sub in submissions:
+            pending.append(json.dumps(sub, ensure_ascii=False))
+            count += 1
+            if len(pending) >= 1000:
+                blobs.append(compressor.compress(('\n'.join(pending) + '\n').encode('utf-8')))
+                pending = []
+        if pending:
+            blobs.append(compressor.compress(('\n'.join(pending) + '\n').encode('utf-8')))
+        blobs.append(compressor.flush())
+        index[cls.HISTORY_SECTION] = {'offset': offset, 'length': sum(len(blob) for blob in blobs[len(sections):]),
+                                      'format': 'jsonl', 'count': count}
+        
+        header = json.dumps({'version': 1, 'compression': 'gzip', 'metadata': metadata, 'sections': index},
+                            ensure_ascii=False).encode('utf-8')
+        temp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(temp_path, 'wb') as f:
+            f.write(cls.MAGIC)
+            f.write(struct.pack('>Q', len(header)))
+            f.write(header)
+            for blob in blobs:
+                f.write(blob)
+            f.flush()
+            os.fsync(f.fileno())
+            size = f.tell()
+        os.replace(temp_path, path)
+        return size
+
+
+def read_snapshot(path: str) -> Dict[str, Any]:
+    """Load a saved snapshot in either format, following a streamed snapshot's JSONL history"""
+    if path.endswith(SnapshotFile.EXTENSION):
+        return SnapshotFile(path).load()
+    
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    
+    # Snapshots written in streaming mode keep the history in a JSONL file
+    history_file = data.get('submission_history_file')
+    if history_file and 'submission_history' not in data:
+        # Stored relative to the snapshot, which may not be in the current directory
+        data['submission_history'] = list(iter_jsonl(os.path.join(os.path.dirname(path), history_file)))
+    return data
+
+
+def iter_jsonl(path: str) -> Iterator[Dict]:
+    """Read a JSONL submission history one row at a time"""
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def convert_snapshot(json_path: str) -> str:
+    """Write a compressed copy of a JSON snapshot next to it, returns the new path"""
+    data = read_snapshot(json_path)
+    snapshot_path = os.path.splitext(json_path)[0] + SnapshotFile.EXTENSION
+    sections = {name: value for name, value in data.items()
+                if name not in ('metadata', SnapshotFile.HISTORY_SECTION, 'submission_history_file')}
+    size = SnapshotFile.write(snapshot_path, data.get('metadata', {}), sections, data.get('submission_history') or [])
+    print(f"📦 {json_path} ({os.path.getsize(json_path):,} bytes) -> {snapshot_path} ({size:,} bytes)")
+    return snapshot_path
+
+
+class SaveContext:
+    """Inputs shared by the output sinks of one save_enhanced_data call
+    
+    Submissions are normalized at most once, on first use by any sink (or reused
+    from the fetcher's merge), and the records are then shared read-only across
+    the sink threads. A streamed run passes its JSONL history_file instead of
+    submissions; sinks then read it back one row at a time.
+    """
+    
+    def __init__(self, fetcher: 'LeetCodeSubmissionFetcher', username: str, profile_data: Optional[Dict],
+                 submissions: List[Dict], analysis: Dict[str, Any], records: Optional[List['Submission']] = None,
+                 history_file: Optional[str] = None, data_sources: Optional[Iterable[str]] = None):
+        self.fetcher = fetcher
+        self.username = username
+        self.profile_data = profile_data
+        self.submissions = submissions
+        self.analysis = analysis
+        self.history_file = history_file
+        self.timestamp = datetime.now()
+        if data_sources is None:
+            data_sources = set(sub.get('_source', 'unknown') for sub in submissions)
+        self.metadata = {
+            'username': username,
+            'fetch_timestamp': self.timestamp.isoformat(),
+            'total_submissions_fetched': analysis.get('total_submissions', 0) if history_file else len(submissions),
+            'fetcher_version': '4.0_comprehensive',
+            'data_sources': list(data_sources)
+        }
+        self.normalized = records
+        self.lock = threading.Lock()
+    
+    def records(self) -> List['Submission']:
+        with self.lock:
+            if self.normalized is None:
+                self.normalized = self.fetcher.get_submission_records(self.username, self.submissions)
+            return self.normalized
+    
+    def iter_submissions(self) -> Iterator[Dict]:
+        if self.history_file is None:
+            yield from self.submissions
+            return
+        yield from iter_jsonl(self.history_file)
+    
+    def iter_records(self) -> Iterator['Submission']:
+        if self.history_file is None:
+            return iter(self.records())
+        return (Submission.from_api(sub, self.fetcher.debug_mode) for sub in self.iter_submissions())
+
+
+class OutputSink:
+    """One output format written by save_enhanced_data
+    
+    Subclasses set name/label/suffix and implement write(), which fills a temp
+    path; save() then renames it over the real file so readers never see a
+    partial write.
+    """
+    
+    name = None
+    label = None
+    suffix = None
+    
+    def filename(self, username: str) -> str:
+        return f'{username}{self.suffix}'
+    
+    def write(self, path: str, context: SaveContext) -> None:
+        raise NotImplementedError
+    
+    def save(self, context: SaveContext) -> str:
+        path = self.filename(context.username)
+        temp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        try:
+            self.write(temp_path, context)
+            os.replace(temp_path, path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        return path
+
+
+class JsonSnapshotSink(OutputSink):
+    name = 'json'
+    label = '📄 Comprehensive JSON'
+    suffix = '_comprehensive_leetcode_data.json'
+    
+    def write(self, path: str, context: SaveContext) -> None:
+        complete_data = {'metadata': context.metadata, 'user_profile': context.profile_data}
+        if context.history_file:
+            # Point at the streamed JSONL history instead of embedding it
+            complete_data['submission_history_file'] = os.path.basename(context.history_file)
+        else:
+            complete_data['submission_history'] = context.submissions
+        complete_data['comprehensive_analysis'] = context.analysis
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(complete_data, f, indent=2, ensure_ascii=False)
+
+
+class CompressedSnapshotSink(OutputSink):
+    name = 'compressed'
+    label = '📦 Compressed snapshot'
+    suffix = f'_comprehensive_leetcode_data{SnapshotFile.EXTENSION}'
+    
+    def save(self, context: SaveContext) -> str:
+        # SnapshotFile.write already renames a temp file into place
+        path = self.filename(context.username)
+        SnapshotFile.write(path, context.metadata,
+                           {'user_profile': context.profile_data, 'comprehensive_analysis': context.analysis},
+                           context.iter_submissions())
+        return path
+
+
+class TextReportSink(OutputSink):
+    name = 'report'
+    label = '📝 Detailed Report'
+    suffix = '_detailed_report.txt'
+    
+    def write(self, path: str, context: SaveContext) -> None:
+        context.fetcher.write_text_report(path, context.username, context.profile_data,
+                                          context.analysis, context.timestamp)
+
+
+class CsvSink(OutputSink):
+    name = 'csv'
+    label = '📊 CSV Data'
+    suffix = '_submissions_data.csv'
+    
+    def write(self, path: str, context: SaveContext) -> None:
+        with open(path, 'w', newline='', encoding='utf-8') as csvfile:
+            if context.metadata['total_submissions_fetched']:
+                writer = csv.DictWriter(csvfile, fieldnames=CSV_FIELDNAMES)
+                writer.writeheader()
+                build_csv_row = context.fetcher.build_csv_row
+                writer.writerows(build_csv_row(record) for record in context.iter_records())
+
+
+# Sinks selectable by name from --outputs; register custom OutputSink subclasses here
+OUTPUT_SINKS = {sink.name: sink for sink in (JsonSnapshotSink, CompressedSnapshotSink, TextReportSink, CsvSink)}
+
+
+def parse_output_sinks(value: str) -> List[str]:
+    """argparse type for --outputs: a comma-separated list of OUTPUT_SINKS names"""
+    names = [name.strip() for name in value.split(',') if name.strip()]
+    unknown = [name for name in names if name not in OUTPUT_SINKS]
+    if unknown or not names:
+        raise argparse.ArgumentTypeError(f"unknown outputs {unknown or value!r}; "
+                                         f"choose from {', '.join(OUTPUT_SINKS)}")
+    return names
+
+
+def positive_int(value: str) -> int:
+    """argparse type for counts that must be at least 1"""
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid int value: {value!r}")
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {number}")
+    return number
+
+
+class TokenBucket:
+    """Thread-safe token bucket shared by all workers of a fetcher"""
+    
+    def __init__(self, rate: float, capacity: int = 1):
+        self.rate = rate  # tokens added per second
+        self.capacity = max(1, capacity)
+        self.tokens = float(self.capacity)
+        self.last_refill = time.monotonic()
+        self.lock = threading.Lock()
+    
+    def acquire(self) -> float:
+        """Block until a token is available, returns seconds spent waiting"""
+        waited = 0.0
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.last_refill) * self.rate)
+                self.last_refill = now
+                
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                
+                wait_time = (1 - self.tokens) / self.rate
+            
+            time.sleep(wait_time)
+            waited += wait_time
+
+
+class AdaptiveRateLimiter(TokenBucket):
+    """AIMD token bucket that learns how fast the server lets us go
+
+    The rate grows by about increase_per_second each second while responses succeed,
+    and is cut multiplicatively on throttling responses (429/403) or when an endpoint's
+    smoothed latency climbs well above its recent best. The baseline is a minimum over
+    the last latency_window smoothed samples of that endpoint, so it follows the server
+    as it drifts and is never carried over between runs. Cuts are spaced by
+    cooldown_seconds so one burst of concurrent 429s counts once. Thread-safe; reserve()
+    lets coroutines share the limiter without blocking the event loop.
+    """
+    
+    STATE_VERSION = 1
+    
+    def __init__(self, rate: float, capacity: int = 1, min_rate: float = 0.2, max_rate: float = 20.0,
+                 increase_per_second: float = 0.5, decrease_factor: float = 0.5,
+                 latency_decrease_factor: float = 0.8, latency_factor: float = 2.0,
+                 latency_slack: float = 0.25, cooldown_seconds: float = 1.0,
+                 latency_window: int = 50, latency_warmup: int = 5):
+        super().__init__(min(max(rate, min_rate), max_rate), capacity)
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase_per_second = increase_per_second
+        self.decrease_factor = decrease_factor
+        self.latency_decrease_factor = latency_decrease_factor
+        self.latency_factor = latency_factor
+        self.latency_slack = latency_slack  # Seconds of extra latency tolerated before backing off
+        self.cooldown_seconds = cooldown_seconds
+        self.latency_window = latency_window  # Smoothed samples the baseline minimum is taken over
+        self.latency_warmup = latency_warmup  # Samples before an endpoint's latency is judged
+        self.latency = {}  # endpoint -> {'ewma', 'samples', 'window'}
+        self.last_decrease = 0.0
+        self.throttled = 0
+        self.decreases = 0
+    
+    def reserve(self) -> float:
+        """Take a token now (possibly going into debt) and return how long to wait before sending"""
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.last_refill) * self.rate)
+            self.last_refill = now
+            self.tokens -= 1
+            return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+    
+    def acquire(self) -> float:
+        wait_time = self.reserve()
+        if wait_time > 0:
+            time.sleep(wait_time)
+        return wait_time
+    
+    def decrease(self, factor: float, now: float) -> None:
+        if now - self.last_decrease >= self.cooldown_seconds:
+            self.rate = max(self.min_rate, self.rate * factor)
+            self.last_decrease = now
+            self.decreases += 1
+    
+    def latency_baseline(self, endpoint: str) -> Optional[float]:
+        """Lowest recent smoothed latency of an endpoint, None while it is still warming up"""
+        with self.lock:
+            stats = self.latency.get(endpoint)
+            return min(stats['window']) if stats and stats['window'] else None
+    
+    def on_response(self, status_code: Optional[int], latency_s: float,
+                    throttle_status_codes: frozenset = frozenset({429, 403}), endpoint: str = 'default') -> None:
+        """Feed one request outcome back into the rate"""
+        with self.lock:
+            now = time.monotonic()
+            
+            if status_code in throttle_status_codes:
+                self.throttled += 1
+                self.decrease(self.decrease_factor, now)
+                return
+            
+            stats = self.latency.get(endpoint)
+            if stats is None:
+                stats = {'ewma': latency_s, 'samples': 0, 'window': deque(maxlen=self.latency_window)}
+                self.latency[endpoint] = stats
+            stats['ewma'] = 0.8 * stats['ewma'] + 0.2 * latency_s
+            stats['samples'] += 1
+            
+            # The first samples only settle the EWMA; a lone fast response must not become the baseline
+            too_slow = False
+            if stats['samples'] > self.latency_warmup:
+                stats['window'].append(stats['ewma'])
+                baseline = min(stats['window'])
+                threshold = max(baseline * self.latency_factor, baseline + self.latency_slack)
+                too_slow = stats['ewma'] > threshold
+            
+            if too_slow:
+                self.decrease(self.latency_decrease_factor, now)
+            elif status_code is not None and status_code < 400:
+                # One increment per request is increase_per_second per second at the current rate
+                self.rate = min(self.max_rate, self.rate + self.increase_per_second / self.rate)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        with self.lock:
+            return {
+                'version': self.STATE_VERSION,
+                'rate': round(self.rate, 4),
+                'throttled': self.throttled,
+                'updated_at': datetime.now().isoformat()
+            }
+    
+    def restore(self, state: Dict[str, Any]) -> None:
+        """Start from a previously learned rate; latency baselines are relearned every run"""
+        if state.get('version') != self.STATE_VERSION:
+            return
+        with self.lock:
+            self.rate = min(max(float(state['rate']), self.min_rate), self.max_rate)
+            self.latency = {}
+
+
+class LatencyHistogram:
+    """Thread-safe latency histogram per key (an endpoint, or an (endpoint, status) pair)"""
+    
+    BUCKETS_MS = [50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000]
+    
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.endpoints = {}
+    
+    def record(self, endpoint: str, latency_ms: float) -> None:
+        with self.lock:
+            stats = self.endpoints.get(endpoint)
+            if stats is None:
+                stats = {'count': 0, 'total_ms': 0.0, 'max_ms': 0.0,
+                         'buckets': [0] * (len(self.BUCKETS_MS) + 1)}
+                self.endpoints[endpoint] = stats
+            
+            stats['count'] += 1
+            stats['total_ms'] += latency_ms
+            stats['max_ms'] = max(stats['max_ms'], latency_ms)
+            
+            for i, bound in enumerate(self.BUCKETS_MS):
+                if latency_ms <= bound:
+                    stats['buckets'][i] += 1
+                    break
+            else:
+                stats['buckets'][-1] += 1
+    
+    def bucket_counts(self, endpoint: Any) -> List[int]:
+        """Per-bucket counts for one key, the last bucket being above BUCKETS_MS[-1]"""
+        with self.lock:
+            stats = self.endpoints.get(endpoint)
+            return list(stats['buckets']) if stats else [0] * (len(self.BUCKETS_MS) + 1)
+    
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Copy of the histogram with bucket labels and mean latency"""
+        labels = [f"<={bound}ms" for bound in self.BUCKETS_MS] + [f">{self.BUCKETS_MS[-1]}ms"]
+        with self.lock:
+            return {
+                endpoint: {
+                    'count': stats['count'],
+                    'mean_ms': stats['total_ms'] / stats['count'] if stats['count'] else 0,
+                    'max_ms': stats['max_ms'],
+                    'buckets': dict(zip(labels, stats['buckets']))
+                }
+                for endpoint, stats in self.endpoints.items()
+            }
+
+
+class FetchMetrics:
+    """Thread-safe request and stage metrics, exported as JSON lines or Prometheus text
+
+    Every finished request and stage becomes an event. Events are kept in memory and,
+    when events_file is set, also appended to it as they happen so a long run can be
+    watched live. cProfile and tracemalloc only run for stages when enabled. Logical
+    request latency uses the same LatencyHistogram buckets as the per-attempt report.
+    """
+
+    def __init__(self, events_file: Optional[str] = None, profile_dir: Optional[str] = None,
+                 trace_memory: bool = False):
+        self.lock = threading.Lock()
+        self.events = []
+        self.events_file = events_file
+        self.profile_dir = profile_dir
+        self.trace_memory = trace_memory
+        self.profiling = False  # Only the outermost stage is profiled
+        self.requests = {}  # (endpoint, status) -> counters
+        self.request_latency = LatencyHistogram()  # Keyed by (endpoint, status)
+        self.stages = {}  # stage -> counters
+        self.rate_limit_wait_seconds = 0.0
+
+        if events_file:
+            open(events_file, 'w', encoding='utf-8').close()
+
+    def emit(self, event: Dict[str, Any]) -> None:
+        event['ts'] = round(time.time(), 3)
+        with self.lock:
+            self.events.append(event)
+            if self.events_file:
+                with open(self.events_file, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(event) + '\n')
+
+    def record_request(self, endpoint: str, method: str, status: Any, latency_s: float, size: int,
+                       retries: int, sleep_s: float, cache: Optional[str] = None) -> None:
+        """One logical request, after all of its retries"""
+        with self.lock:
+            stats = self.requests.get((endpoint, str(status)))
+            if stats is None:
+                stats = {'count': 0, 'latency_s': 0.0, 'bytes': 0, 'retries': 0, 'sleep_s': 0.0}
+                self.requests[(endpoint, str(status))] = stats
+
+            stats['count'] += 1
+            stats['latency_s'] += latency_s
+            stats['bytes'] += size
+            stats['retries'] += retries
+            stats['sleep_s'] += sleep_s
+            self.request_latency.record((endpoint, str(status)), latency_s * 1000)
+
+        event = {'event': 'request', 'endpoint': endpoint, 'method': method, 'status': status,
+                 'latency_ms': round(latency_s * 1000, 2), 'bytes': size, 'retries': retries,
+                 'sleep_ms': round(sleep_s * 1000, 2)}
+        if cache:
+            event['cache'] = cache
+        self.emit(event)
+
+    def record_rate_limit_wait(self, waited_s: float) -> None:
+        if waited_s > 0:
+            with self.lock:
+                self.rate_limit_wait_seconds += waited_s
+
+    @contextmanager
+    def stage(self, name: str):
+        """Time a pipeline stage (wall and process CPU), optionally under cProfile/tracemalloc"""
+        profiler = None
+        tracing = False
+        with self.lock:
+            outermost = not self.profiling
+            self.profiling = True
+
+        if outermost and self.profile_dir:
+            import cProfile
+            profiler = cProfile.Profile()
+        if outermost and self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            tracing = True
+
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        if profiler is not None:
+            profiler.enable()
+        try:
+            yield
+        finally:
+            if profiler is not None:
+                profiler.disable()
+            wall_s = time.perf_counter() - wall_start
+            cpu_s = time.process_time() - cpu_start
+
+            event = {'event': 'stage', 'stage': name, 'wall_seconds': round(wall_s, 6), 'cpu_seconds': round(cpu_s, 6)}
+            if tracing:
+                event['peak_memory_bytes'] = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+            if profiler is not None:
+                os.makedirs(self.profile_dir, exist_ok=True)
+                event['profile'] = os.path.join(self.profile_dir, f'{name}.prof')
+                profiler.dump_stats(event['profile'])
+
+            with self.lock:
+                if outermost:
+                    self.profiling = False
+                stats = self.stages.setdefault(name, {'count': 0, 'wall_s': 0.0, 'cpu_s': 0.0})
+                stats['count'] += 1
+                stats['wall_s'] += wall_s
+                stats['cpu_s'] += cpu_s
+            self.emit(event)
+
+    def stage_timings(self) -> Dict[str, float]:
+        with self.lock:
+            return {name: round(stats['wall_s'], 3) for name, stats in self.stages.items()}
+
+    def to_prometheus(self, labels: Optional[Dict[str, str]] = None) -> str:
+        """Prometheus text exposition of the counters collected so far"""
+        def fmt(extra: Dict[str, str]) -> str:
+            merged = dict(labels or {}, **extra)
+            return '{' + ','.join(f'{key}="{value}"' for key, value in merged.items()) + '}'
+
+        lines = []
+        with self.lock:
+            requests_stats = sorted(self.requests.items())
+            latency_buckets = {key: self.request_latency.bucket_counts(key) for key, _ in requests_stats}
+            stages = sorted(self.stages.items())
+            rate_limit_wait = self.rate_limit_wait_seconds
+
+        counters = [
+            ('leetcode_requests_total', 'Requests sent, by endpoint and final status', 'count'),
+            ('leetcode_request_bytes_total', 'Response body bytes received', 'bytes'),
+            ('leetcode_request_retries_total', 'Retries after throttling or server errors', 'retries'),
+            ('leetcode_request_retry_sleep_seconds_total', 'Seconds slept between retries', 'sleep_s'),
+        ]
+        for metric, help_text, field in counters:
+            lines += [f'# HELP {metric} {help_text}', f'# TYPE {metric} counter']
+            for (endpoint, status), stats in requests_stats:
+                lines.append(f"{metric}{fmt({'endpoint': endpoint, 'status': status})} {stats[field]}")
+
+        metric = 'leetcode_request_latency_seconds'
+        lines += [f'# HELP {metric} Request latency including retries', f'# TYPE {metric} histogram']
+        bounds = [f'{bound_ms / 1000:g}' for bound_ms in LatencyHistogram.BUCKETS_MS] + ['+Inf']
+        for (endpoint, status), stats in requests_stats:
+            cumulative = 0
+            for bound, count in zip(bounds, latency_buckets[(endpoint, status)]):
+                cumulative += count
+                lines.append(f"{metric}_bucket{fmt({'endpoint': endpoint, 'status': status, 'le': str(bound)})} {cumulative}")
+            lines.append(f"{metric}_sum{fmt({'endpoint': endpoint, 'status': status})} {stats['latency_s']:.6f}")
+            lines.append(f"{metric}_count{fmt({'endpoint': endpoint, 'status': status})} {stats['count']}")
+
+        metric = 'leetcode_rate_limit_wait_seconds_total'
+        lines += [f'# HELP {metric} Seconds workers waited on the client-side rate limiter', f'# TYPE {metric} counter',
+                  f'{metric}{fmt({})} {rate_limit_wait:.6f}']
+
+        for metric, help_text, field in [('leetcode_stage_wall_seconds', 'Wall time per pipeline stage', 'wall_s'),
+                                         ('leetcode_stage_cpu_seconds', 'Process CPU time per pipeline stage', 'cpu_s')]:
+            lines += [f'# HELP {metric} {help_text}', f'# TYPE {metric} gauge']
+            for name, stats in stages:
+                lines.append(f"{metric}{fmt({'stage': name})} {stats[field]:.6f}")
+
+        return '\n'.join(lines) + '\n'
+
+    def write(self, filename: str, labels: Optional[Dict[str, str]] = None) -> None:
+        """Write Prometheus text for *.prom files, otherwise all events as JSON lines"""
+        with open(filename, 'w', encoding='utf-8') as f:
+            if filename.endswith('.prom'):
+                f.write(self.to_prometheus(labels))
+            else:
+                with self.lock:
+                    events = list(self.events)
+                for event in events:
+                    f.write(json.dumps(dict(labels or {}, **event)) + '\n')
 
 
 class LeetCodeSubmissionFetcher:
@@ -12,9 +1991,85 @@ class LeetCodeSubmissionFetcher:
     
     def __init__(self):
         self.session = None
-        self.rate_limit_delay = 1.0
+        self.base_url = 'https://leetcode.com'  # Point at a mock server for offline benchmarking
+        self.rate_limit_delay = 0.3  # Starting average seconds between requests, before any learned rate
+        self.rate_limit_state_file = '.leetcode_rate_limit.json'  # Learned rates per base_url; None disables
+        self.throttle_status_codes = frozenset({429, 403})
         self.max_retries = 3
         self.debug_mode = False
+        self.page_concurrency = 4  # REST pages kept in flight at once
+        self.rate_limiter = None
+        self.last_fetch_stats = {}
+        self.pool_size = 16  # Keep-alive connections per host
+        self.retry_backoff_base = 0.5
+        self.retry_backoff_max = 30.0
+        self.retry_status_codes = {429, 500, 502, 503, 504}
+        self.latency_histogram = LatencyHistogram()
+        self.prefetched_submissions = {}  # username -> recent submissions from the bundle query
+        self.last_incremental_delta = None  # New rows found by the last fetch_incremental_data call
+        self.last_incremental_records = None  # Their normalized records, in the same order
+        self.last_merged_records = []  # Normalized records of the last merge's rows, in the same order
+        self.submission_records = {}  # username -> (merged submissions, their normalized records)
+        self.analysis_backend = 'python'  # One of ANALYSIS_BACKENDS; 'columnar' needs NumPy
+        self.store = None  # Optional SubmissionStore used instead of the JSON snapshot
+        self.submission_indexes = {}  # username -> SubmissionIndex from the last merge
+        self.last_merge_report = {}
+        self.response_cache = None  # Optional ResponseCache for API responses
+        self.cache_account = None  # Session cookie digest, then the signed-in username; scopes per-account cache entries
+        self.pagination = 'cursor'  # 'cursor' (sequential last_key walk) or 'offset' (concurrent offset pages)
+        self.max_rest_pages = None  # None follows the cursor to the end of the history
+        self.last_rest_stop = None  # Why the last iter_rest_pages walk ended: 'end', 'max_pages' or 'error'
+        self.last_rest_error = None
+        self.rest_page_size = 20  # Starting page size, tuned per request
+        self.max_rest_page_size = 100
+        self.page_latency_target = 2.0  # Seconds; slower pages shrink the page size
+        self.checkpoint_every_pages = 10
+        self.resume = False  # Continue interrupted REST crawls from their checkpoint
+        self.snapshot_format = 'json'  # 'json', 'compressed' (SnapshotFile) or 'both'
+        self.output_sinks = None  # OUTPUT_SINKS names or OutputSink instances; None follows snapshot_format
+        self.problem_cache_file = '.leetcode_problems.json'  # Shared by every user; None disables lookups
+        self.problem_cache = None  # ProblemMetadataCache, loaded on first use and shareable between fetchers
+        self.problem_batch_size = 50  # Questions looked up per GraphQL request
+        self.store_batch_size = 1000  # Streamed rows upserted into the store per transaction
+        self.metrics = FetchMetrics()
+    
+    def get_rate_limiter(self) -> AdaptiveRateLimiter:
+        """Adaptive limiter shared by every request of this fetcher, resuming the persisted rate"""
+        if self.rate_limiter is None:
+            if self.rate_limit_delay > 0:
+                self.rate_limiter = AdaptiveRateLimiter(1.0 / self.rate_limit_delay, capacity=self.page_concurrency)
+                state = self.load_rate_limit_states().get(self.base_url)
+                if state:
+                    self.rate_limiter.restore(state)
+            else:
+                # No delay means no limiting, e.g. against a local mock server
+                self.rate_limiter = AdaptiveRateLimiter(float('inf'), capacity=self.page_concurrency,
+                                                        max_rate=float('inf'))
+        return self.rate_limiter
+
+    def load_rate_limit_states(self) -> Dict[str, Any]:
+        if not self.rate_limit_state_file:
+            return {}
+        try:
+            with open(self.rate_limit_state_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (ValueError, OSError) as e:
+            print(f"⚠️ Ignoring unreadable rate limit state {self.rate_limit_state_file}: {e}")
+            return {}
+
+    def save_rate_limit_state(self) -> None:
+        """Persist the learned rate for base_url so the next run starts from it"""
+        if not self.rate_limit_state_file or self.rate_limiter is None or self.rate_limit_delay <= 0:
+            return
+        
+        states = self.load_rate_limit_states()
+        states[self.base_url] = self.rate_limiter.to_dict()
+        write_json_atomic(self.rate_limit_state_file, states, indent=2)
+        
+        if self.debug_mode:
+            print(f"   Debug: learned rate {states[self.base_url]['rate']:.2f} req/s saved for {self.base_url}")
     
     def extract_cookies_manual(self) -> Dict[str, str]:
         """Manual cookie input method with validation"""
@@ -56,9 +2111,133 @@ class LeetCodeSubmissionFetcher:
             headers['X-CSRFToken'] = cookies['csrftoken']
         
         session.headers.update(headers)
+        
+        # Until whoami names the account, its cache entries are keyed by a digest of the session cookie
+        session_cookie = cookies.get('LEETCODE_SESSION', '')
+        self.cache_account = hashlib.sha256(session_cookie.encode('utf-8')).hexdigest()[:16] if session_cookie else None
+        
+        # Pooled keep-alive connections; retries are handled by execute_request
+        adapter = HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size, max_retries=0)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        
         self.session = session
         return session
 
+    def get_retry_delay(self, attempt: int, response: Optional[requests.Response] = None) -> float:
+        """Exponential backoff with full jitter, honoring Retry-After when present"""
+        if response is not None:
+            retry_after = response.headers.get('Retry-After')
+            if retry_after:
+                try:
+                    return min(float(retry_after), self.retry_backoff_max)
+                except ValueError:
+                    try:
+                        retry_at = parsedate_to_datetime(retry_after)
+                        return min(max(0.0, retry_at.timestamp() - time.time()), self.retry_backoff_max)
+                    except (TypeError, ValueError):
+                        pass
+        
+        return random.uniform(0, min(self.retry_backoff_max, self.retry_backoff_base * (2 ** attempt)))
+
+    def execute_request(self, method: str, url: str, endpoint: str, **kwargs) -> requests.Response:
+        """Send a request through the response cache (if enabled) and the retrying session"""
+        cache = self.response_cache
+        if cache is None:
+            return self.send_with_retries(method, url, endpoint, **kwargs)
+        
+        cache_key = cache.make_key(method, url, endpoint, kwargs.get('json'), self.cache_account)
+        entry = cache.get(cache_key)
+        
+        if entry is not None and (cache.offline or cache.is_fresh(entry)):
+            cache.hits += 1
+            response = cache.to_response(entry)
+            self.metrics.record_request(endpoint, method, response.status_code, 0.0, len(response.content),
+                                        0, 0.0, cache='hit')
+            return response
+        
+        cache.misses += 1
+        if cache.offline:
+            if self.debug_mode:
+                print(f"   Debug: offline cache miss for {endpoint} {url}")
+            response = requests.Response()
+            response.status_code = 504
+            response.url = url
+            response._content = b''
+            return response
+        
+        if entry is not None:
+            headers = dict(kwargs.get('headers') or {})
+            headers.update(cache.conditional_headers(entry))
+            kwargs['headers'] = headers
+        
+        response = self.send_with_retries(method, url, endpoint, **kwargs)
+        
+        if response.status_code == 304 and entry is not None:
+            cache.refresh(cache_key, entry)
+            return cache.to_response(entry)
+        if response.status_code == 200:
+            cache.put(cache_key, endpoint, response)
+        return response
+
+    def send_with_retries(self, method: str, url: str, endpoint: str, **kwargs) -> requests.Response:
+        """Send a request through the shared session with retries on throttling and server errors"""
+        kwargs.setdefault('timeout', 30)
+        limiter = self.get_rate_limiter()
+        request_start = time.monotonic()
+        slept = 0.0
+        
+        for attempt in range(self.max_retries + 1):
+            self.metrics.record_rate_limit_wait(limiter.acquire())
+            start_time = time.monotonic()
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                limiter.on_response(None, time.monotonic() - start_time, self.throttle_status_codes, endpoint)
+                self.latency_histogram.record(endpoint, (time.monotonic() - start_time) * 1000)
+                if attempt >= self.max_retries:
+                    self.metrics.record_request(endpoint, method, e.__class__.__name__,
+                                                time.monotonic() - request_start, 0, attempt, slept)
+                    raise
+                delay = self.get_retry_delay(attempt)
+                print(f"   ⚠️ {endpoint} network error ({e.__class__.__name__}), retrying in {delay:.1f}s "
+                      f"({attempt + 1}/{self.max_retries})")
+                time.sleep(delay)
+                slept += delay
+                continue
+            
+            limiter.on_response(response.status_code, time.monotonic() - start_time, self.throttle_status_codes,
+                                endpoint)
+            self.latency_histogram.record(endpoint, (time.monotonic() - start_time) * 1000)
+            
+            if response.status_code not in self.retry_status_codes or attempt >= self.max_retries:
+                if response.status_code in self.retry_status_codes:
+                    print(f"   ❌ {endpoint} still failing with {response.status_code} after {self.max_retries} retries")
+                self.metrics.record_request(endpoint, method, response.status_code, time.monotonic() - request_start,
+                                            len(response.content or b''), attempt, slept)
+                return response
+            
+            delay = self.get_retry_delay(attempt, response)
+            print(f"   ⚠️ {endpoint} returned {response.status_code}, retrying in {delay:.1f}s "
+                  f"({attempt + 1}/{self.max_retries})")
+            time.sleep(delay)
+            slept += delay
+
+    def print_latency_report(self) -> None:
+        """Print the per-endpoint latency histogram"""
+        report = self.latency_histogram.snapshot()
+        if not report:
+            return
+        
+        print("\n⏱️ Request Latency by Endpoint:")
+        if self.rate_limiter is not None:
+            print(f"   Adaptive rate: {self.rate_limiter.rate:.2f} req/s "
+                  f"({self.rate_limiter.throttled} throttled responses, {self.rate_limiter.decreases} backoffs)")
+        for endpoint, stats in sorted(report.items()):
+            print(f"   {endpoint}: {stats['count']} requests, mean {stats['mean_ms']:.0f}ms, max {stats['max_ms']:.0f}ms")
+            buckets = ", ".join(f"{label}: {count}" for label, count in stats['buckets'].items() if count)
+            print(f"     {buckets}")
+
     def test_authentication(self) -> bool:
         """Test authentication using GraphQL whoami query"""
         print("\n=== Testing Authentication ===")
@@ -79,10 +2258,11 @@ class LeetCodeSubmissionFetcher:
         }
         
         try:
-            response = self.session.post(
-                'https://leetcode.com/graphql',
-                json=whoami_query,
-                timeout=30
+            response = self.execute_request(
+                'POST',
+                f'{self.base_url}/graphql',
+                'graphql:globalData',
+                json=whoami_query
             )
             
             if response.status_code == 200:
@@ -95,6 +2275,7 @@ class LeetCodeSubmissionFetcher:
                 user_status = data.get('data', {}).get('userStatus', {})
                 if user_status.get('isSignedIn'):
                     username = user_status.get('username', 'Unknown')
+                    self.cache_account = username
                     print(f"✅ Authentication successful!")
                     print(f"   Logged in as: {username}")
                     print(f"   Premium: {'Yes' if user_status.get('isPremium') else 'No'}")
@@ -112,74 +2293,13 @@ class LeetCodeSubmissionFetcher:
 
     def fix_timestamp(self, timestamp: Any) -> Optional[datetime]:
         """Enhanced timestamp parsing with multiple format support"""
-        if not timestamp:
-            return None
-            
-        try:
-            # Convert to int
-            ts = int(timestamp)
-            
-            # Handle different timestamp formats
-            current_time = time.time()
-            
-            # If timestamp is in milliseconds, convert to seconds
-            if ts > 10000000000:
-                ts = ts // 1000
-            
-            # If timestamp is still in the future, it might need adjustment
-            if ts > current_time:
-                # Try different epoch adjustments
-                possible_adjustments = [
-                    1577836800,  # 2020-01-01
-                    1609459200,  # 2021-01-01
-                    1640995200,  # 2022-01-01
-                    1672531200,  # 2023-01-01
-                    1704067200,  # 2024-01-01
-                ]
-                
-                for adjustment in possible_adjustments:
-                    adjusted_ts = ts - adjustment
-                    if 946684800 <= adjusted_ts <= current_time:  # Between 2000 and now
-                        ts = adjusted_ts
-                        break
-            
-            # Final validation - timestamp should be reasonable
-            if 946684800 <= ts <= current_time:  # Between 2000 and now
-                return datetime.fromtimestamp(ts)
-            else:
-                if self.debug_mode:
-                    print(f"   Debug: Invalid timestamp {timestamp} -> {ts}")
-                return None
-                
-        except (ValueError, OSError) as e:
-            if self.debug_mode:
-                print(f"   Debug: Timestamp parsing error for {timestamp}: {e}")
-            return None
+        return parse_timestamp(timestamp, self.debug_mode)
 
     def fetch_recent_submissions(self, username: str, limit: int = 20) -> List[Dict]:
         """Fetch recent accepted submissions using GraphQL"""
         
         submissions_query = {
-            "query": """
-            query recentAcSubmissions($username: String!, $limit: Int!) {
-                recentAcSubmissionList(username: $username, limit: $limit) {
-                    id
-                    title
-                    titleSlug
-                    timestamp
-                    statusDisplay
-                    lang
-                    runtime
-                    url
-                    isPending
-                    memory
-                    topicTags {
-                        name
-                        slug
-                    }
-                }
-            }
-            """,
+            "query": compose_graphql_query('recentAcSubmissions', {'recentAcSubmissionList': 'recentAcSubmissions'}),
             "variables": {
                 "username": username,
                 "limit": limit
@@ -188,10 +2308,11 @@ class LeetCodeSubmissionFetcher:
         }
         
         try:
-            response = self.session.post(
-                'https://leetcode.com/graphql',
-                json=submissions_query,
-                timeout=30
+            response = self.execute_request(
+                'POST',
+                f'{self.base_url}/graphql',
+                'graphql:recentAcSubmissions',
+                json=submissions_query
             )
             
             if response.status_code == 200:
@@ -216,53 +2337,275 @@ class LeetCodeSubmissionFetcher:
             print(f"❌ Error fetching submissions: {e}")
             return []
 
-    def fetch_submission_history_rest(self, offset: int = 0, limit: int = 20) -> List[Dict]:
-        """Fetch submissions using REST API"""
+    def fetch_submission_page_rest(self, offset: int = 0, limit: int = 20, lastkey: str = '') -> Dict[str, Any]:
+        """Fetch one REST page along with its pagination cursor
+        
+        A page that could not be fetched comes back empty with its reason in 'error'.
+        """
+        page = {'submissions': [], 'has_next': False, 'last_key': ''}
         
         try:
-            url = f'https://leetcode.com/api/submissions/?offset={offset}&limit={limit}&lastkey='
-            response = self.session.get(url, timeout=30)
+            url = f'{self.base_url}/api/submissions/?offset={offset}&limit={limit}&lastkey={lastkey}'
+            response = self.execute_request('GET', url, 'rest:submissions')
             
             if response.status_code == 200:
-                data = response.json()
-                submissions = data.get('submissions_dump', [])
-                
-                # Add source marker
-                for sub in submissions:
-                    sub['_source'] = 'rest'
-                    
-                return submissions
+                page = self.parse_rest_page(response.json())
             else:
-                return []
+                page['error'] = f"status {response.status_code}"
                 
         except Exception as e:
+            page['error'] = str(e)
             if self.debug_mode:
                 print(f"❌ REST API error: {e}")
-            return []
+        
+        return page
+
+    @staticmethod
+    def parse_rest_page(data: Dict[str, Any]) -> Dict[str, Any]:
+        """Submissions and pagination cursor from an /api/submissions/ response body"""
+        submissions = data.get('submissions_dump', [])
+        
+        # Add source marker
+        for sub in submissions:
+            sub['_source'] = 'rest'
+        
+        return {
+            'submissions': submissions,
+            'has_next': bool(data.get('has_next', False)),
+            'last_key': data.get('last_key') or ''
+        }
+
+    def fetch_submission_history_rest(self, offset: int = 0, limit: int = 20, lastkey: str = '') -> List[Dict]:
+        """Fetch submissions using REST API"""
+        return self.fetch_submission_page_rest(offset, limit, lastkey)['submissions']
+
+    def fetch_rest_pages_concurrent(self, max_pages: Optional[int] = 10, page_size: int = 20,
+                                    concurrency: Optional[int] = None) -> List[Dict]:
+        """Fetch REST pages with a bounded worker pool, returning rows in offset order
+        
+        max_pages=None keeps going until the first empty page. Like iter_rest_pages,
+        self.last_rest_stop says why the walk ended ('end', 'max_pages' or 'error').
+        """
+        concurrency = max(1, concurrency or self.page_concurrency)
+        
+        def fetch_page(page: int) -> Dict[str, Any]:
+            return self.fetch_submission_page_rest(page * page_size, page_size)
+        
+        pages = {}
+        errors = {}  # page -> why it could not be fetched
+        stop_page = max_pages if max_pages is not None else float('inf')  # First page known to be empty
+        next_page = 0
+        start_time = time.monotonic()
+        
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            in_flight = {}
+            
+            while in_flight or next_page < stop_page:
+                # Keep the pool full without scheduling past a known empty page
+                while len(in_flight) < concurrency and next_page < stop_page:
+                    in_flight[executor.submit(fetch_page, next_page)] = next_page
+                    next_page += 1
+                
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    page = in_flight.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        result = {'submissions': [], 'error': str(e)}
+                    
+                    if result['submissions']:
+                        pages[page] = result['submissions']
+                    else:
+                        if result.get('error'):
+                            errors[page] = result['error']
+                        stop_page = min(stop_page, page)
+        
+        elapsed = time.monotonic() - start_time
+        
+        # Only keep the contiguous run of pages before the first empty one
+        rest_submissions = []
+        pages_fetched = 0
+        while pages_fetched < stop_page and pages_fetched in pages:
+            rest_submissions.extend(pages[pages_fetched])
+            pages_fetched += 1
+        
+        # A failed page is not the end of the history; callers must not save what came before it as complete
+        self.last_rest_error = errors.get(stop_page)
+        if self.last_rest_error:
+            self.last_rest_stop = 'error'
+            print(f"   ❌ REST page {pages_fetched + 1} failed ({self.last_rest_error}) before the end of history")
+        elif max_pages is not None and pages_fetched >= max_pages:
+            self.last_rest_stop = 'max_pages'
+        else:
+            self.last_rest_stop = 'end'
+        
+        pages_per_sec = pages_fetched / elapsed if elapsed > 0 else 0
+        self.last_fetch_stats = {
+            'pages_fetched': pages_fetched,
+            'requests_sent': next_page,
+            'elapsed_seconds': elapsed,
+            'pages_per_sec': pages_per_sec,
+            'concurrency': concurrency
+        }
+        print(f"   ⚡ {pages_fetched} pages in {elapsed:.1f}s "
+              f"({pages_per_sec:.2f} pages/sec, concurrency={concurrency})")
+        
+        return rest_submissions
+
+    def tune_page_size(self, requested: int, received: int, has_next: bool, latency_s: float) -> int:
+        """Next REST page size: learn the server's cap, grow while pages are fast, shrink when slow"""
+        if has_next and 0 < received < requested:
+            # The server caps page size; asking for more only costs bytes in the query string
+            self.max_rest_page_size = received
+            return received
+        if latency_s > self.page_latency_target:
+            return max(1, requested // 2)
+        if latency_s < self.page_latency_target / 4:
+            return min(self.max_rest_page_size, requested * 2)
+        return requested
+
+    def iter_rest_pages(self, max_pages: Optional[int] = None, page_size: Optional[int] = None,
+                        offset: int = 0, lastkey: str = '') -> Iterator[Dict[str, Any]]:
+        """Follow the last_key/has_next cursor from offset until the history ends or max_pages
+        
+        Yields each non-empty page with the 'offset' and 'page_size' it was requested with
+        and the 'next_offset'/'last_key'/'has_next' needed to continue after it. Once
+        exhausted, self.last_rest_stop says why: 'end' of the history, 'max_pages', or
+        'error' (with the reason in self.last_rest_error).
+        """
+        page_size = page_size or self.rest_page_size
+        pages = 0
+        self.last_rest_stop, self.last_rest_error = 'max_pages', None
+        
+        while max_pages is None or pages < max_pages:
+            start_time = time.monotonic()
+            result = self.fetch_submission_page_rest(offset, page_size, lastkey)
+            latency = time.monotonic() - start_time
+            
+            received = len(result['submissions'])
+            if not received:
+                self.last_rest_error = result.get('error')
+                self.last_rest_stop = 'error' if self.last_rest_error else 'end'
+                return
+            
+            result['offset'] = offset
+            result['page_size'] = page_size
+            result['next_offset'] = offset + received
+            yield result
+            
+            pages += 1
+            if not result['has_next']:
+                self.last_rest_stop = 'end'
+                return
+            offset += received
+            lastkey = result['last_key']
+            page_size = self.tune_page_size(page_size, received, result['has_next'], latency)
+
+    def load_pagination_checkpoint(self, username: str) -> Optional[Dict[str, Any]]:
+        checkpoint_filename = f'{username}_rest_checkpoint.json'
+        try:
+            with open(checkpoint_filename, 'r', encoding='utf-8') as f:
+                checkpoint = json.load(f)
+            return checkpoint if checkpoint.get('version') == 1 else None
+        except FileNotFoundError:
+            return None
+        except (ValueError, OSError) as e:
+            print(f"⚠️ Ignoring unreadable pagination checkpoint {checkpoint_filename}: {e}")
+            return None
+
+    def fetch_full_history_rest(self, username: str, max_pages: Optional[int] = None) -> List[Dict]:
+        """Walk the whole REST history by cursor, checkpointing so an interrupted crawl resumes
+        
+        Pages are appended to {username}_rest_pages.jsonl and the cursor is saved atomically to
+        {username}_rest_checkpoint.json every checkpoint_every_pages pages. The checkpoint records
+        how many bytes of the JSONL file it covers, so rows written after it are dropped on resume.
+        Both files are removed once the end of the history is reached.
+        """
+        checkpoint_filename = f'{username}_rest_checkpoint.json'
+        rows_filename = f'{username}_rest_pages.jsonl'
+        checkpoint = self.load_pagination_checkpoint(username)
+        rest_submissions = []
+        
+        if self.resume and checkpoint and os.path.exists(rows_filename):
+            with open(rows_filename, 'r+b') as f:
+                f.truncate(checkpoint['rows_bytes'])
+                f.seek(0)
+                rest_submissions = [json.loads(line) for line in f if line.strip()]
+            print(f"   ↪ Resuming REST crawl at {checkpoint['pages']} pages / {len(rest_submissions)} rows")
+        else:
+            checkpoint = {'version': 1, 'offset': 0, 'last_key': '', 'pages': 0, 'rows_bytes': 0,
+                          'page_size': self.rest_page_size}
+            open(rows_filename, 'wb').close()
+        
+        remaining_pages = None if max_pages is None else max(0, max_pages - checkpoint['pages'])
+        start_time = time.monotonic()
+        
+        with open(rows_filename, 'ab') as rows_file:
+            for result in self.iter_rest_pages(remaining_pages, checkpoint['page_size'],
+                                               checkpoint['offset'], checkpoint['last_key']):
+                rows_file.write(b''.join(json.dumps(sub, ensure_ascii=False).encode('utf-8') + b'\n'
+                                         for sub in result['submissions']))
+                rest_submissions.extend(result['submissions'])
+                
+                checkpoint.update({
+                    'offset': result['next_offset'],
+                    'last_key': result['last_key'],
+                    'pages': checkpoint['pages'] + 1,
+                    'page_size': result['page_size']
+                })
+                if not result['has_next'] or checkpoint['pages'] % self.checkpoint_every_pages == 0:
+                    rows_file.flush()
+                    os.fsync(rows_file.fileno())
+                    checkpoint['rows_bytes'] = rows_file.tell()
+                    write_json_atomic(checkpoint_filename, checkpoint)
+                    print(f"   📄 {checkpoint['pages']} pages, {len(rest_submissions):,} rows "
+                          f"(page size {result['page_size']})")
+            
+            rows_file.flush()
+            os.fsync(rows_file.fileno())
+            checkpoint['rows_bytes'] = rows_file.tell()
+        
+        elapsed = time.monotonic() - start_time
+        completed = self.last_rest_stop == 'end'
+        if completed or not checkpoint['pages']:
+            # Nothing to resume from when the crawl ended or never got a page
+            for filename in (checkpoint_filename, rows_filename):
+                if os.path.exists(filename):
+                    os.remove(filename)
+            if not completed:
+                print(f"   ❌ REST crawl failed on its first page: {self.last_rest_error or 'page limit reached'}")
+        else:
+            write_json_atomic(checkpoint_filename, checkpoint)
+            reason = f"page {checkpoint['pages'] + 1} failed ({self.last_rest_error})" \
+                if self.last_rest_stop == 'error' else "stopped at the page limit"
+            print(f"   ⚠️ REST crawl {reason} before the end of history; rerun with --resume to continue "
+                  f"from page {checkpoint['pages']}")
+        
+        self.last_fetch_stats = {
+            'pages_fetched': checkpoint['pages'],
+            'elapsed_seconds': elapsed,
+            'rows': len(rest_submissions),
+            'complete': completed,
+            'page_size': checkpoint['page_size']
+        }
+        return rest_submissions
 
     def fetch_language_statistics(self, username: str) -> Dict[str, Any]:
         """Fetch language-wise problem statistics"""
         
         lang_query = {
-            "query": """
-            query languageStats($username: String!) {
-                matchedUser(username: $username) {
-                    languageProblemCount {
-                        languageName
-                        problemsSolved
-                    }
-                }
-            }
-            """,
+            "query": compose_graphql_query('languageStats', {'matchedUser': 'languageStats'}),
             "variables": {"username": username},
             "operationName": "languageStats"
         }
         
         try:
-            response = self.session.post(
-                'https://leetcode.com/graphql',
-                json=lang_query,
-                timeout=30
+            response = self.execute_request(
+                'POST',
+                f'{self.base_url}/graphql',
+                'graphql:languageStats',
+                json=lang_query
             )
             
             if response.status_code == 200:
@@ -280,63 +2623,214 @@ class LeetCodeSubmissionFetcher:
             
         return []
 
-    def smart_merge_submissions(self, graphql_subs: List[Dict], rest_subs: List[Dict]) -> List[Dict]:
-        """Intelligently merge submissions from different sources, avoiding duplicates"""
+    def get_problem_cache(self) -> Optional[ProblemMetadataCache]:
+        if self.problem_cache is None and self.problem_cache_file:
+            self.problem_cache = ProblemMetadataCache(self.problem_cache_file)
+        return self.problem_cache
+
+    @staticmethod
+    def question_batch_payload(title_slugs: List[str]) -> Dict[str, Any]:
+        return {
+            "query": compose_question_batch_query(len(title_slugs)),
+            "variables": {f"slug{i}": slug for i, slug in enumerate(title_slugs)},
+            "operationName": "questionBatch"
+        }
+
+    @staticmethod
+    def parse_question_batch(data: Dict[str, Any], title_slugs: List[str]) -> Dict[str, Optional[Dict]]:
+        """titleSlug -> question payload (None for unknown slugs) from a questionBatch response"""
+        questions = data.get('data')
+        if not isinstance(questions, dict):
+            return {}
+        return {slug: questions.get(f'q{i}') for i, slug in enumerate(title_slugs)}
+
+    def fetch_problem_metadata(self, title_slugs: List[str]) -> Dict[str, Optional[Dict]]:
+        """Look up difficulty and topic tags for a batch of problems in one GraphQL request"""
+        try:
+            response = self.execute_request('POST', f'{self.base_url}/graphql', 'graphql:questionBatch',
+                                            json=self.question_batch_payload(title_slugs))
+            if response.status_code == 200:
+                return self.parse_question_batch(response.json(), title_slugs)
+        except Exception as e:
+            if self.debug_mode:
+                print(f"❌ Problem metadata error: {e}")
         
-        print("🔄 Smart merging submissions from multiple sources...")
+        return {}
+
+    def update_problem_cache(self, title_slugs: Iterable[str]) -> int:
+        """Fetch metadata for problems missing from (or stale in) the cache, returns how many were cached"""
+        cache = self.get_problem_cache()
+        if cache is None:
+            return 0
+        missing = cache.stale_slugs(title_slugs)
+        if not missing:
+            return 0
+        
+        batches = [missing[i:i + self.problem_batch_size] for i in range(0, len(missing), self.problem_batch_size)]
+        cached = 0
+        with ThreadPoolExecutor(max_workers=max(1, min(self.page_concurrency, len(batches)))) as executor:
+            for questions in executor.map(self.fetch_problem_metadata, batches):
+                for slug, question in questions.items():
+                    cache.put(slug, question)
+                cached += len(questions)
+        cache.save()
+        
+        print(f"   📚 Cached metadata for {cached:,} problems in {len(batches)} requests")
+        return cached
+
+    def problem_breakdown(self, aggregator: SubmissionAggregator) -> Dict[str, Any]:
+        """Difficulty and topic breakdown of the aggregated problems from the metadata cache"""
+        cache = self.get_problem_cache()
+        if cache is None:
+            return {}
+        return cache.breakdown(aggregator.problem_attempts, aggregator.solved_problems)
+
+    def merge_submission_sources(self, sources: List[tuple], index: Optional[SubmissionIndex] = None) -> List[Dict]:
+        """Merge any number of (name, submissions) sources in one pass, earlier sources taking priority
+        
+        Submissions already in index (e.g. from a prior run) are skipped. Duplicates
+        within this merge keep the first payload, filled in with any fields only the
+        later payload has. Per-source counts and conflicting duplicates (same id but
+        different slug/lang/timestamp/status) are kept in self.last_merge_report.
+        A source may be (name, submissions, records) when its rows are already
+        normalized; the merged rows' records are left in self.last_merged_records.
+        """
+        if index is None:
+            index = SubmissionIndex()
         
-        # Create a comprehensive deduplication strategy
         merged_submissions = []
-        seen_submissions = set()
+        merged_records = []
+        positions = {}  # canonical key -> position in merged_submissions
+        report = {'sources': {}, 'duplicates': 0, 'known': 0, 'skipped': 0, 'conflicts': []}
         
-        # Priority: GraphQL submissions first (more reliable for accepted solutions)
-        print(f"   Processing {len(graphql_subs)} GraphQL submissions...")
-        for sub in graphql_subs:
-            # Create unique key based on multiple fields
-            key = (
-                sub.get('titleSlug', ''),
-                sub.get('lang', ''),
-                sub.get('timestamp', ''),
-                sub.get('statusDisplay', '')
-            )
-            
-            if key not in seen_submissions and any(key):  # At least one field must be non-empty
-                seen_submissions.add(key)
-                merged_submissions.append(sub)
-        
-        # Add REST submissions that aren't duplicates
-        print(f"   Processing {len(rest_subs)} REST API submissions...")
-        added_from_rest = 0
-        for sub in rest_subs:
-            # Create key for REST submission
-            key = (
-                sub.get('title_slug', sub.get('titleSlug', '')),
-                sub.get('lang', ''),
-                sub.get('timestamp', ''),
-                sub.get('status_display', sub.get('statusDisplay', ''))
-            )
+        for name, payloads, *normalized in sources:
+            records = normalized[0] if normalized else normalize_submissions(payloads, self.debug_mode)
+            added = 0
+            for sub, record in zip(payloads, records):
+                if not (record.title_slug or record.timestamp):
+                    report['skipped'] += 1
+                    continue
+                
+                existing_key = index.lookup(record)
+                if existing_key is None:
+                    index.add(record)
+                    positions[record.canonical_key] = len(merged_submissions)
+                    merged_submissions.append(sub)
+                    merged_records.append(record)
+                    added += 1
+                    continue
+                
+                existing_fingerprint = index.fingerprints[existing_key]
+                if existing_fingerprint != record.key:
+                    report['conflicts'].append({
+                        'key': existing_key,
+                        'source': name,
+                        'existing': [value.value if isinstance(value, Enum) else value for value in existing_fingerprint],
+                        'incoming': [value.value if isinstance(value, Enum) else value for value in record.key]
+                    })
+                
+                position = positions.get(existing_key)
+                if position is None:
+                    report['known'] += 1
+                else:
+                    report['duplicates'] += 1
+                    kept = merged_submissions[position]
+                    filled = [field for field in sub if field not in kept]
+                    for field in filled:
+                        kept[field] = sub[field]
+                    if filled:
+                        merged_records[position] = Submission.from_api(kept, self.debug_mode)
             
-            if key not in seen_submissions and any(key):
-                seen_submissions.add(key)
-                merged_submissions.append(sub)
-                added_from_rest += 1
+            report['sources'][name] = {'rows': len(payloads), 'added': added}
+        
+        index.submission_count += len(merged_submissions)
+        self.last_merge_report = report
+        self.last_merged_records = merged_records
+        return merged_submissions
+
+    def smart_merge_submissions(self, graphql_subs: List[Dict], rest_subs: List[Dict],
+                                index: Optional[SubmissionIndex] = None,
+                                graphql_records: Optional[List[Submission]] = None,
+                                rest_records: Optional[List[Submission]] = None) -> List[Dict]:
+        """Intelligently merge submissions from different sources, avoiding duplicates"""
+        
+        print("🔄 Smart merging submissions from multiple sources...")
+        print(f"   Processing {len(graphql_subs)} GraphQL and {len(rest_subs)} REST API submissions...")
+        
+        # Priority: GraphQL submissions first (more reliable for accepted solutions)
+        with self.metrics.stage('merge'):
+            sources = [('graphql', graphql_subs) if graphql_records is None else ('graphql', graphql_subs, graphql_records),
+                       ('rest', rest_subs) if rest_records is None else ('rest', rest_subs, rest_records)]
+            merged_submissions = self.merge_submission_sources(sources, index)
+        report = self.last_merge_report
         
         print(f"   ✓ Merged result: {len(merged_submissions)} unique submissions")
-        print(f"   ✓ GraphQL contributed: {len(graphql_subs)}")
-        print(f"   ✓ REST API contributed: {added_from_rest}")
+        print(f"   ✓ GraphQL contributed: {report['sources']['graphql']['added']}")
+        print(f"   ✓ REST API contributed: {report['sources']['rest']['added']}")
+        if report['known']:
+            print(f"   ✓ Already known from earlier runs: {report['known']}")
+        if report['conflicts']:
+            print(f"   ⚠️ {len(report['conflicts'])} conflicting duplicates (same id, different fields)")
+            if self.debug_mode:
+                for conflict in report['conflicts'][:10]:
+                    print(f"     {conflict}")
         
         return merged_submissions
 
+    def load_submission_index(self, username: str) -> Optional[SubmissionIndex]:
+        """Restore the persisted submission index, if any"""
+        index_filename = f'{username}_submission_index.json'
+        try:
+            with open(index_filename, 'r', encoding='utf-8') as f:
+                return SubmissionIndex.from_dict(json.load(f))
+        except FileNotFoundError:
+            return None
+        except (ValueError, KeyError, TypeError, OSError) as e:
+            print(f"⚠️ Ignoring unreadable submission index {index_filename}: {e}")
+            return None
+
+    def save_submission_index(self, username: str) -> None:
+        """Persist the index built during this run's merge"""
+        index = self.submission_indexes.get(username)
+        if index is None:
+            return
+        
+        write_json_atomic(f'{username}_submission_index.json', index.to_dict(), ensure_ascii=False)
+
+    def get_checkpointed_profile(self, username: str, checkpoint: RunCheckpoint) -> Optional[Dict]:
+        """Profile restored from the run checkpoint when present, otherwise fetched and checkpointed"""
+        if checkpoint.has('profile'):
+            stage = checkpoint.state['stages']['profile']
+            if stage.get('recent_submissions') is not None:
+                self.prefetched_submissions[username] = stage['recent_submissions']
+            print(f"↪ Profile for '{username}' restored from checkpoint")
+            return stage['profile_data']
+        
+        profile_data = self.get_comprehensive_profile(username)
+        checkpoint.save_profile(profile_data, self.prefetched_submissions.get(username))
+        return profile_data
+
+    def restore_checkpointed_submissions(self, username: str, checkpoint: RunCheckpoint) -> List[Dict]:
+        """Merged history and index saved by an interrupted run's fetch stage"""
+        submissions, index = checkpoint.load_submissions()
+        if index is not None:
+            self.submission_indexes[username] = index
+        print(f"↪ {len(submissions):,} merged submissions restored from checkpoint")
+        return submissions
+
     def fetch_comprehensive_data(self, username: str) -> List[Dict]:
         """Comprehensive data fetching using multiple strategies"""
         print("\n=== Comprehensive Data Fetching ===")
         
         all_submissions = []
+        graphql_accepted = []
         
-        # Strategy 1: GraphQL Recent Accepted (Higher limit)
+        # Strategy 1: GraphQL Recent Accepted (Higher limit), reusing the profile bundle if available
         print("📄 Fetching GraphQL recent accepted submissions...")
         try:
-            graphql_accepted = self.fetch_recent_submissions(username, limit=200)
+            graphql_accepted = self.prefetched_submissions.pop(username, None)
+            if graphql_accepted is None:
+                graphql_accepted = self.fetch_recent_submissions(username, limit=200)
             if graphql_accepted:
                 print(f"   ✓ Found {len(graphql_accepted)} recent accepted submissions")
                 all_submissions.extend(graphql_accepted)
@@ -345,167 +2839,373 @@ class LeetCodeSubmissionFetcher:
         except Exception as e:
             print(f"   ❌ GraphQL fetch failed: {e}")
         
-        # Strategy 2: REST API with pagination
-        print("📄 Fetching REST API submissions with pagination...")
-        rest_submissions = []
-        
-        for page in range(10):  # Increased from 5 to 10 pages
-            offset = page * 20
-            try:
-                batch = self.fetch_submission_history_rest(offset, 20)
-                if batch:
-                    rest_submissions.extend(batch)
-                    if page == 0:
-                        print(f"   ✓ REST API working, fetching more pages...")
-                    time.sleep(0.3)  # Respectful delay
-                else:
-                    if page == 0:
-                        print("   ⚠️ REST API returned no results")
-                    break
-            except Exception as e:
-                print(f"   ❌ REST API page {page} failed: {e}")
-                break
+        # Strategy 2: REST API with pagination
+        print("📄 Fetching REST API submissions with pagination...")
+        if self.pagination == 'cursor':
+            rest_submissions = self.fetch_full_history_rest(username, self.max_rest_pages)
+        else:
+            rest_submissions = self.fetch_rest_pages_concurrent(self.max_rest_pages, self.rest_page_size)
+        self.check_rest_complete()
         
-        if rest_submissions:
+        return self.merge_comprehensive_data(username, graphql_accepted, rest_submissions)
+
+    def check_rest_complete(self) -> None:
+        """Raise if the last REST walk stopped on a failed page, so a short history is never saved as complete"""
+        if self.last_rest_stop == 'error':
+            raise RuntimeError(f"REST history is incomplete: {self.last_rest_error}")
+
+    def merge_comprehensive_data(self, username: str, graphql_accepted: List[Dict],
+                                 rest_submissions: List[Dict]) -> List[Dict]:
+        """Merge the GraphQL and REST results of a full fetch, newest first"""
+        if not rest_submissions:
+            print("   ⚠️ REST API returned no results")
+        else:
             print(f"   ✓ Found {len(rest_submissions)} submissions via REST API")
         
         # Smart merge all submissions
+        index = SubmissionIndex()
         if graphql_accepted or rest_submissions:
-            merged_submissions = self.smart_merge_submissions(graphql_accepted, rest_submissions)
+            merged_submissions = self.smart_merge_submissions(graphql_accepted, rest_submissions, index)
+            records = self.last_merged_records
         else:
-            merged_submissions = []
+            merged_submissions, records = [], []
+        self.submission_indexes[username] = index
         
         # Sort by timestamp (newest first)
-        merged_submissions.sort(key=lambda x: int(x.get('timestamp', 0)), reverse=True)
+        merged_submissions, records = self.sort_newest_first(merged_submissions, records)
+        self.submission_records[username] = (merged_submissions, records)
         
         print(f"\n🎉 Total unique submissions collected: {len(merged_submissions)}")
         return merged_submissions
 
-    def get_comprehensive_profile(self, username: str) -> Optional[Dict]:
-        """Get comprehensive user profile with enhanced statistics"""
-        print(f"\n=== Fetching Comprehensive Profile for '{username}' ===")
+    @staticmethod
+    def sort_newest_first(submissions: List[Dict], records: Optional[List[Submission]]) -> 'tuple':
+        """Sort payloads newest first by their raw timestamp, keeping records (if any) aligned with them"""
+        order = sorted(range(len(submissions)), key=lambda i: int(submissions[i].get('timestamp', 0)), reverse=True)
+        return [submissions[i] for i in order], [records[i] for i in order] if records is not None else None
+
+    def cached_submission_records(self, username: str, submissions: List[Dict]) -> Optional[List[Submission]]:
+        """Records already normalized for this exact list (e.g. by the merge), without normalizing"""
+        cached = self.submission_records.get(username)
+        return cached[1] if cached is not None and cached[0] is submissions else None
+
+    def get_submission_records(self, username: str, submissions: List[Dict]) -> List[Submission]:
+        """Normalized records of submissions, normalizing them on first use only"""
+        records = self.cached_submission_records(username, submissions)
+        if records is not None:
+            return records
+        records = normalize_submissions(submissions, self.debug_mode)
+        self.submission_records[username] = (submissions, records)
+        return records
+
+    def load_saved_submissions(self, username: str) -> List[Dict]:
+        """Load the submission history from the store or the last saved snapshot, if any"""
+        if self.store is not None:
+            return self.store.load_submissions(username)
         
-        profile_query = {
-            "query": """
-            query getUserProfile($username: String!) {
-                matchedUser(username: $username) {
-                    username
-                    profile {
-                        realName
-                        userAvatar
-                        ranking
-                        reputation
-                        aboutMe
-                        countryName
-                        company
-                        jobTitle
-                        school
-                        skillTags
-                        postViewCount
-                        solutionCount
-                    }
-                    submitStatsGlobal {
-                        acSubmissionNum {
-                            difficulty
-                            count
-                            submissions
-                        }
-                        totalSubmissionNum {
-                            difficulty
-                            count
-                            submissions
-                        }
-                    }
-                    badges {
-                        id
-                        displayName
-                        icon
-                        hoverText
-                    }
-                    userCalendar {
-                        activeYears
-                        streak
-                        totalActiveDays
-                        submissionCalendar
-                    }
-                }
-            }
-            """,
-            "variables": {"username": username},
-            "operationName": "getUserProfile"
+        # Whichever format was written last is the current snapshot
+        candidates = [f'{username}_comprehensive_leetcode_data{extension}'
+                      for extension in ('.json', SnapshotFile.EXTENSION)]
+        existing = [path for path in candidates if os.path.exists(path)]
+        if not existing:
+            return []
+        snapshot_filename = max(existing, key=os.path.getmtime)
+        
+        try:
+            if snapshot_filename.endswith(SnapshotFile.EXTENSION):
+                return list(SnapshotFile(snapshot_filename).iter_submissions())
+            return read_snapshot(snapshot_filename).get('submission_history') or []
+        except (ValueError, OSError, EOFError, KeyError) as e:
+            print(f"⚠️ Could not read saved snapshot {snapshot_filename}: {e}")
+            return []
+
+    def fetch_incremental_data(self, username: str, known_submissions: List[Dict],
+                               max_pages: Optional[int] = None, page_size: Optional[int] = None) -> List[Dict]:
+        """Fetch only submissions newer than known_submissions and merge them in"""
+        print("\n=== Incremental Data Sync ===")
+        
+        # Reuse the persisted index when it matches the snapshot; only a rebuild normalizes the known rows
+        known_records = None
+        index = self.load_submission_index(username)
+        if index is None or index.submission_count != len(known_submissions):
+            known_records = normalize_submissions(known_submissions, self.debug_mode)
+            index = SubmissionIndex.from_submissions(known_records, self.debug_mode)
+        self.submission_indexes[username] = index
+        
+        newest_timestamp = index.newest_timestamp
+        print(f"   Saved snapshot: {len(known_submissions)} submissions, newest at "
+              f"{self.fix_timestamp(newest_timestamp) or 'unknown time'}")
+        
+        def new_rows(payloads: List[Dict]) -> 'tuple':
+            """(payloads, records) of the rows not yet known, each normalized once"""
+            rows, records = [], []
+            for sub in payloads:
+                record = Submission.from_api(sub, self.debug_mode)
+                if index.lookup(record) is None and record.timestamp >= newest_timestamp:
+                    rows.append(sub)
+                    records.append(record)
+            return rows, records
+        
+        # GraphQL only returns recent accepted submissions, so a small window is enough
+        print("📄 Checking GraphQL recent accepted submissions...")
+        recent_submissions = self.prefetched_submissions.pop(username, None)
+        if recent_submissions is None:
+            recent_submissions = self.fetch_recent_submissions(username, limit=20)
+        graphql_new, graphql_records = new_rows(recent_submissions)
+        
+        # REST pages are newest first: follow the cursor until we reach known data
+        print("📄 Paging REST API until known submissions are reached...")
+        rest_new, rest_records = [], []
+        pages_fetched = 0
+        reached_known = False
+        
+        for result in self.iter_rest_pages(max_pages, page_size):
+            batch = result['submissions']
+            pages_fetched += 1
+            
+            page_rows, page_records = new_rows(batch)
+            rest_new.extend(page_rows)
+            rest_records.extend(page_records)
+            
+            if len(page_rows) < len(batch):
+                reached_known = True  # Reached the saved snapshot
+                break
+        
+        # Merging a delta that stops short of the snapshot would move newest_timestamp
+        # past the rows in between, and later syncs would never fetch them
+        if not reached_known and self.last_rest_stop != 'end':
+            reason = f"page {pages_fetched + 1} failed ({self.last_rest_error})" \
+                if self.last_rest_stop == 'error' else f"the {pages_fetched}-page limit was reached"
+            raise RuntimeError(f"incremental sync stopped before reaching the saved snapshot: {reason}; "
+                               f"the snapshot was left unchanged")
+        
+        print(f"   ✓ {pages_fetched} REST pages, {len(graphql_new)} new GraphQL and {len(rest_new)} new REST rows")
+        
+        if not graphql_new and not rest_new:
+            print("   ✓ Snapshot is already up to date")
+            self.last_incremental_delta = []
+            self.last_incremental_records = []
+            if known_records is not None:
+                self.submission_records[username] = (known_submissions, known_records)
+            return known_submissions
+        
+        new_submissions = self.smart_merge_submissions(graphql_new, rest_new, index, graphql_records, rest_records)
+        self.last_incremental_delta = new_submissions
+        self.last_incremental_records = self.last_merged_records
+        merged_submissions, records = self.sort_newest_first(
+            new_submissions + known_submissions,
+            self.last_merged_records + known_records if known_records is not None else None)
+        if records is not None:
+            self.submission_records[username] = (merged_submissions, records)
+        
+        print(f"\n🎉 Added {len(new_submissions)} new submissions ({len(merged_submissions)} total)")
+        return merged_submissions
+
+    def fetch_user_bundle(self, username: str, recent_limit: int = 200) -> Optional[Dict[str, Any]]:
+        """Fetch profile, language stats and recent submissions in one GraphQL round trip"""
+        
+        bundle_query = {
+            "query": compose_graphql_query('userBundle', {
+                'profile': 'profile',
+                'languageStats': 'languageStats',
+                'recentSubmissions': 'recentAcSubmissions'
+            }),
+            "variables": {
+                "username": username,
+                "limit": recent_limit
+            },
+            "operationName": "userBundle"
         }
         
         try:
-            response = self.session.post(
-                'https://leetcode.com/graphql',
-                json=profile_query,
-                timeout=30
+            response = self.execute_request(
+                'POST',
+                f'{self.base_url}/graphql',
+                'graphql:userBundle',
+                json=bundle_query
             )
             
-            if response.status_code == 200:
-                data = response.json()
-                
-                if 'errors' in data:
-                    print(f"❌ GraphQL errors: {data['errors']}")
-                    return None
-                
-                user_data = data.get('data', {}).get('matchedUser')
-                if user_data:
-                    print("✅ Comprehensive profile fetched successfully!")
-                    
-                    # Display enhanced info
-                    profile = user_data.get('profile', {})
-                    print(f"   Real Name: {profile.get('realName', 'N/A')}")
-                    print(f"   Global Ranking: #{profile.get('ranking', 'N/A'):,}" if profile.get('ranking') else "   Global Ranking: N/A")
-                    print(f"   Country: {profile.get('countryName', 'N/A')}")
-                    print(f"   Company: {profile.get('company', 'N/A')}")
-                    print(f"   Solutions Posted: {profile.get('solutionCount', 0)}")
-                    
-                    # Display problem stats
-                    stats = user_data.get('submitStatsGlobal', {})
-                    ac_stats = stats.get('acSubmissionNum', [])
-                    total_stats = stats.get('totalSubmissionNum', [])
-                    
-                    if ac_stats:
-                        print("\n   📊 Problem Solving Statistics:")
-                        for ac, total in zip(ac_stats, total_stats):
-                            difficulty = ac.get('difficulty', 'Unknown')
-                            solved = ac.get('count', 0)
-                            total_attempts = total.get('count', 0)
-                            acceptance = (solved / total_attempts * 100) if total_attempts > 0 else 0
-                            print(f"     {difficulty}: {solved:,} solved / {total_attempts:,} attempted ({acceptance:.1f}%)")
-                    
-                    # Display calendar stats if available
-                    calendar = user_data.get('userCalendar', {})
-                    if calendar:
-                        print(f"\n   📅 Activity Statistics:")
-                        print(f"     Current Streak: {calendar.get('streak', 0)} days")
-                        print(f"     Total Active Days: {calendar.get('totalActiveDays', 0)}")
-                        print(f"     Active Years: {calendar.get('activeYears', [])}")
-                    
-                    # Fetch language statistics
-                    lang_stats = self.fetch_language_statistics(username)
-                    if lang_stats:
-                        print(f"\n   🔤 Language Proficiency:")
-                        for lang_stat in lang_stats[:5]:  # Show top 5
-                            lang_name = lang_stat.get('languageName', 'Unknown')
-                            problems_solved = lang_stat.get('problemsSolved', 0)
-                            print(f"     {lang_name}: {problems_solved} problems")
-                    
-                    return user_data
-                else:
-                    print(f"❌ User '{username}' not found")
-                    return None
-            else:
+            if response.status_code != 200:
                 print(f"❌ Profile request failed. Status: {response.status_code}")
                 return None
-                
+            
+            return self.parse_user_bundle(response.json())
+            
         except Exception as e:
             print(f"❌ Profile fetch error: {e}")
             return None
 
-    def analyze_comprehensive_data(self, submissions: List[Dict], profile_data: Optional[Dict] = None) -> Dict[str, Any]:
-        """Comprehensive analysis with enhanced statistics"""
+    def parse_user_bundle(self, data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Split a userBundle response into profile, language stats and recent submissions"""
+        result = data.get('data') or {}
+        
+        # Partial data is still usable, e.g. recent submissions can fail independently
+        if 'errors' in data:
+            if not result:
+                print(f"❌ GraphQL errors: {data['errors']}")
+                return None
+            if self.debug_mode:
+                print(f"   Debug: GraphQL errors in bundle: {data['errors']}")
+        
+        recent_submissions = result.get('recentSubmissions') or []
+        for sub in recent_submissions:
+            sub['_source'] = 'graphql'
+        
+        return {
+            'profile': result.get('profile'),
+            'language_stats': (result.get('languageStats') or {}).get('languageProblemCount', []),
+            'recent_submissions': recent_submissions
+        }
+
+    def get_comprehensive_profile(self, username: str) -> Optional[Dict]:
+        """Get comprehensive user profile with enhanced statistics"""
+        print(f"\n=== Fetching Comprehensive Profile for '{username}' ===")
+        
+        bundle = self.fetch_user_bundle(username)
+        return self.use_profile_bundle(username, bundle)
+
+    def use_profile_bundle(self, username: str, bundle: Optional[Dict[str, Any]]) -> Optional[Dict]:
+        """Keep the bundle's recent submissions for fetch_comprehensive_data and print the profile"""
+        if bundle is None:
+            return None
+        
+        user_data = bundle['profile']
+        if not user_data:
+            print(f"❌ User '{username}' not found")
+            return None
+        
+        # Keep the recent submissions for fetch_comprehensive_data
+        self.prefetched_submissions[username] = bundle['recent_submissions']
+        
+        print("✅ Comprehensive profile fetched successfully!")
+        
+        # Display enhanced info
+        profile = user_data.get('profile', {})
+        print(f"   Real Name: {profile.get('realName', 'N/A')}")
+        print(f"   Global Ranking: #{profile.get('ranking', 'N/A'):,}" if profile.get('ranking') else "   Global Ranking: N/A")
+        print(f"   Country: {profile.get('countryName', 'N/A')}")
+        print(f"   Company: {profile.get('company', 'N/A')}")
+        print(f"   Solutions Posted: {profile.get('solutionCount', 0)}")
+        
+        # Display problem stats
+        stats = user_data.get('submitStatsGlobal', {})
+        ac_stats = stats.get('acSubmissionNum', [])
+        total_stats = stats.get('totalSubmissionNum', [])
+        
+        if ac_stats:
+            print("\n   📊 Problem Solving Statistics:")
+            for ac, total in zip(ac_stats, total_stats):
+                difficulty = ac.get('difficulty', 'Unknown')
+                solved = ac.get('count', 0)
+                total_attempts = total.get('count', 0)
+                acceptance = (solved / total_attempts * 100) if total_attempts > 0 else 0
+                print(f"     {difficulty}: {solved:,} solved / {total_attempts:,} attempted ({acceptance:.1f}%)")
+        
+        # Display calendar stats if available
+        calendar = user_data.get('userCalendar', {})
+        if calendar:
+            print(f"\n   📅 Activity Statistics:")
+            print(f"     Current Streak: {calendar.get('streak', 0)} days")
+            print(f"     Total Active Days: {calendar.get('totalActiveDays', 0)}")
+            print(f"     Active Years: {calendar.get('activeYears', [])}")
+        
+        # Language statistics arrived in the same request
+        lang_stats = bundle['language_stats']
+        if lang_stats:
+            print(f"\n   🔤 Language Proficiency:")
+            for lang_stat in lang_stats[:5]:  # Show top 5
+                lang_name = lang_stat.get('languageName', 'Unknown')
+                problems_solved = lang_stat.get('problemsSolved', 0)
+                print(f"     {lang_name}: {problems_solved} problems")
+        
+        return user_data
+
+    def load_aggregator_state(self, username: str) -> Optional[SubmissionAggregator]:
+        """Restore the persisted analysis aggregator, if any"""
+        state_filename = f'{username}_analysis_state.json'
+        try:
+            with open(state_filename, 'r', encoding='utf-8') as f:
+                return SubmissionAggregator.from_dict(json.load(f), self.debug_mode)
+        except FileNotFoundError:
+            return None
+        except (ValueError, KeyError, OSError) as e:
+            print(f"⚠️ Ignoring unreadable analysis state {state_filename}: {e}")
+            return None
+
+    def save_aggregator_state(self, username: str, aggregator: SubmissionAggregator) -> None:
+        """Persist the analysis aggregator next to the saved data"""
+        write_json_atomic(f'{username}_analysis_state.json', aggregator.to_dict(), ensure_ascii=False)
+
+    def load_problem_timeline(self, username: str) -> Optional[ProblemTimelineIndex]:
+        """Restore the persisted per-problem attempt timeline, if any"""
+        timeline_filename = f'{username}_problem_timeline.json'
+        try:
+            with open(timeline_filename, 'r', encoding='utf-8') as f:
+                return ProblemTimelineIndex.from_dict(json.load(f), self.debug_mode)
+        except FileNotFoundError:
+            return None
+        except (ValueError, KeyError, TypeError, OSError) as e:
+            print(f"⚠️ Ignoring unreadable problem timeline {timeline_filename}: {e}")
+            return None
+
+    def save_problem_timeline(self, username: str, timeline: ProblemTimelineIndex) -> None:
+        """Persist the per-problem attempt timeline next to the saved data"""
+        write_json_atomic(f'{username}_problem_timeline.json', timeline.to_dict(), ensure_ascii=False)
+
+    def get_updated_problem_timeline(self, username: str, submissions: List[Dict],
+                                     new_submissions: Optional[List[Any]] = None) -> ProblemTimelineIndex:
+        """Timeline index covering submissions, updated in O(delta) from the saved index when possible
+        
+        The full history is only normalized when the index has to be rebuilt.
+        """
+        if new_submissions is not None:
+            timeline = self.load_problem_timeline(username)
+            if timeline and timeline.submission_count + len(new_submissions) == len(submissions):
+                timeline.update(new_submissions)
+                return timeline
+            print("⚠️ Saved problem timeline does not match the snapshot, rebuilding it")
+        
+        timeline = ProblemTimelineIndex(self.debug_mode)
+        timeline.update(self.get_submission_records(username, submissions))
+        return timeline
+
+    def get_updated_aggregator(self, username: str, submissions: List[Dict],
+                               new_submissions: Optional[List[Any]] = None) -> SubmissionAggregator:
+        """Aggregator covering submissions, updated in O(delta) from the saved state when possible
+        
+        The full history is only normalized when the state has to be rebuilt.
+        """
+        if new_submissions is not None:
+            aggregator = self.load_aggregator_state(username)
+            if aggregator and aggregator.total_submissions + len(new_submissions) == len(submissions):
+                aggregator.update(new_submissions)
+                if self.debug_mode:
+                    print(f"   Debug: analysis state updated with {len(new_submissions)} new submissions")
+                return aggregator
+            print("⚠️ Saved analysis state does not match the snapshot, rebuilding it")
+        
+        return self.build_aggregator(self.get_submission_records(username, submissions))
+
+    def build_aggregator(self, submissions: List[Any]) -> SubmissionAggregator:
+        """Aggregator over a full history, built by the selected analysis backend"""
+        if self.analysis_backend == 'columnar':
+            if np is not None:
+                return SubmissionColumns(submissions).to_aggregator(self.debug_mode)
+            print("⚠️ numpy is not installed, using the pure Python analysis backend")
+        
+        aggregator = SubmissionAggregator(self.debug_mode)
+        aggregator.update(submissions)
+        return aggregator
+
+    def analyze_comprehensive_data(self, submissions: List[Dict], profile_data: Optional[Dict] = None,
+                                   aggregator: Optional[SubmissionAggregator] = None,
+                                   records: Optional[List[Submission]] = None) -> Dict[str, Any]:
+        """Comprehensive analysis with enhanced statistics
+        
+        aggregator may be passed pre-populated (e.g. restored and updated with only the
+        new submissions); otherwise one is built from submissions. records are the
+        already normalized submissions, if the caller has them.
+        """
         print(f"\n=== Comprehensive Analysis of {len(submissions)} Submissions ===")
         
         if not submissions:
@@ -518,83 +3218,24 @@ class LeetCodeSubmissionFetcher:
             sample = submissions[0] if submissions else {}
             print(f"   Sample submission fields: {list(sample.keys())}")
         
-        # Enhanced statistics
-        total_submissions = len(submissions)
-        accepted_submissions = []
-        failed_submissions = []
-        
-        # Language and problem tracking
-        language_stats = defaultdict(int)
-        status_stats = defaultdict(int)
-        problem_attempts = defaultdict(list)
-        solved_problems = set()
-        difficulty_stats = {'Easy': 0, 'Medium': 0, 'Hard': 0}
-        
-        # Time-based analysis
-        yearly_stats = defaultdict(int)
-        monthly_stats = defaultdict(int)
-        
-        # Process each submission
-        for submission in submissions:
-            # Normalize field names (handle both GraphQL and REST formats)
-            title = submission.get('title') or submission.get('problem_title', 'Unknown')
-            title_slug = submission.get('titleSlug') or submission.get('title_slug', '')
-            lang = submission.get('lang') or submission.get('language', 'Unknown')
-            
-            # Enhanced status detection
-            status = (submission.get('statusDisplay') or 
-                     submission.get('status_display') or 
-                     submission.get('status') or 
-                     'Unknown')
-            
-            # Track attempts per problem
-            if title_slug:
-                problem_attempts[title_slug].append({
-                    'status': status,
-                    'lang': lang,
-                    'timestamp': submission.get('timestamp')
-                })
-            
-            # Acceptance detection
-            is_accepted = (
-                status == 'Accepted' or
-                status == 10 or
-                'Accepted' in str(status) or
-                str(status).lower() == 'accepted'
-            )
-            
-            if is_accepted:
-                accepted_submissions.append(submission)
-                if title_slug:
-                    solved_problems.add(title_slug)
-            else:
-                failed_submissions.append(submission)
-            
-            # Language statistics
-            language_stats[lang] += 1
-            status_stats[status] += 1
-            
-            # Time-based analysis
-            dt = self.fix_timestamp(submission.get('timestamp'))
-            if dt:
-                yearly_stats[dt.year] += 1
-                month_key = f"{dt.year}-{dt.month:02d}"
-                monthly_stats[month_key] += 1
-        
-        # Calculate advanced metrics
-        acceptance_rate = (len(accepted_submissions) / total_submissions * 100) if total_submissions > 0 else 0
-        unique_problems_attempted = len(problem_attempts)
-        unique_problems_solved = len(solved_problems)
-        
-        # Problem solving efficiency
-        problems_with_multiple_attempts = sum(1 for attempts in problem_attempts.values() if len(attempts) > 1)
-        avg_attempts_per_problem = total_submissions / unique_problems_attempted if unique_problems_attempted > 0 else 0
+        if aggregator is None:
+            aggregator = self.build_aggregator(records if records is not None else submissions)
+        analysis = aggregator.snapshot()
+        total_submissions = analysis['total_submissions']
+        acceptance_rate = analysis['acceptance_rate']
+        unique_problems_attempted = analysis['unique_problems_attempted']
+        unique_problems_solved = analysis['unique_problems_solved']
+        problems_with_multiple_attempts = analysis['problems_with_multiple_attempts']
+        avg_attempts_per_problem = analysis['avg_attempts_per_problem']
+        language_stats = analysis['language_stats']
+        status_stats = analysis['status_stats']
+        yearly_stats = analysis['yearly_stats']
         
         # Display comprehensive results
         print(f"📊 Overall Statistics:")
         print(f"   Total Submissions: {total_submissions:,}")
-        print(f"   Accepted Submissions: {len(accepted_submissions):,}")
-        print(f"   Failed Submissions: {len(failed_submissions):,}")
+        print(f"   Accepted Submissions: {analysis['accepted_submissions']:,}")
+        print(f"   Failed Submissions: {analysis['failed_submissions']:,}")
         print(f"   Overall Acceptance Rate: {acceptance_rate:.1f}%")
         print(f"   Unique Problems Attempted: {unique_problems_attempted:,}")
         print(f"   Unique Problems Solved: {unique_problems_solved:,}")
@@ -621,66 +3262,26 @@ class LeetCodeSubmissionFetcher:
             print(f"   {year}: {count:,} submissions")
         
         # Recent activity with enhanced timestamp handling
+        if self.debug_mode:
+            print(f"\n🔍 Timestamp normalization: {TIMESTAMP_NORMALIZER.stats()}")
+        
         print(f"\n🕒 Recent Activity (Last 15 Submissions):")
-        for i, submission in enumerate(submissions[:15], 1):
-            title = submission.get('title') or submission.get('problem_title', 'Unknown')
-            status = (submission.get('statusDisplay') or 
-                     submission.get('status_display') or 
-                     submission.get('status', 'Unknown'))
-            lang = submission.get('lang') or submission.get('language', 'Unknown')
-            
-            dt = self.fix_timestamp(submission.get('timestamp'))
+        recent = records[:15] if records is not None else normalize_submissions(submissions[:15], self.debug_mode)
+        for i, record in enumerate(recent, 1):
+            dt = record.datetime()
             time_str = dt.strftime('%Y-%m-%d %H:%M') if dt else 'Unknown time'
             
-            is_accepted = 'Accepted' in str(status) or status == 10
-            status_emoji = "✅" if is_accepted else "❌"
-            source_emoji = "🔍" if submission.get('_source') == 'graphql' else "🌐"
+            status_emoji = "✅" if record.is_accepted else "❌"
+            source_emoji = "🔍" if record.source is SubmissionSource.GRAPHQL else "🌐"
             
-            print(f"   {i:2d}. {status_emoji}{source_emoji} {title[:40]:<40} ({lang}) - {status} ({time_str})")
+            print(f"   {i:2d}. {status_emoji}{source_emoji} {record.title[:40]:<40} ({record.lang}) - {record.status.value} ({time_str})")
         
-        return {
-            'total_submissions': total_submissions,
-            'accepted_submissions': len(accepted_submissions),
-            'failed_submissions': len(failed_submissions),
-            'acceptance_rate': acceptance_rate,
-            'unique_problems_attempted': unique_problems_attempted,
-            'unique_problems_solved': unique_problems_solved,
-            'problem_solving_rate': (unique_problems_solved/unique_problems_attempted*100) if unique_problems_attempted > 0 else 0,
-            'avg_attempts_per_problem': avg_attempts_per_problem,
-            'problems_with_multiple_attempts': problems_with_multiple_attempts,
-            'language_stats': dict(language_stats),
-            'status_stats': dict(status_stats),
-            'yearly_stats': dict(yearly_stats),
-            'monthly_stats': dict(monthly_stats)
-        }
+        return analysis
 
-    def save_enhanced_data(self, username: str, profile_data: Optional[Dict], 
-                          submissions: List[Dict], analysis: Dict[str, Any]) -> None:
-        """Save comprehensive data with multiple output formats"""
-        
-        timestamp = datetime.now()
-        
-        complete_data = {
-            'metadata': {
-                'username': username,
-                'fetch_timestamp': timestamp.isoformat(),
-                'total_submissions_fetched': len(submissions),
-                'fetcher_version': '4.0_comprehensive',
-                'data_sources': list(set(sub.get('_source', 'unknown') for sub in submissions))
-            },
-            'user_profile': profile_data,
-            'submission_history': submissions,
-            'comprehensive_analysis': analysis
-        }
-        
-        # Save comprehensive JSON data
-        json_filename = f'{username}_comprehensive_leetcode_data.json'
-        with open(json_filename, 'w', encoding='utf-8') as f:
-            json.dump(complete_data, f, indent=2, ensure_ascii=False)
-        
-        # Save enhanced summary report
-        summary_filename = f'{username}_detailed_report.txt'
-        with open(summary_filename, 'w', encoding='utf-8') as f:
+    def write_text_report(self, filename: str, username: str, profile_data: Optional[Dict],
+                          analysis: Dict[str, Any], timestamp: datetime) -> None:
+        """Write the human-readable detailed report"""
+        with open(filename, 'w', encoding='utf-8') as f:
             f.write(f"LeetCode Comprehensive Analysis Report\n")
             f.write("=" * 60 + "\n\n")
             f.write(f"Username: {username}\n")
@@ -725,87 +3326,335 @@ class LeetCodeSubmissionFetcher:
             for year in sorted(analysis.get('yearly_stats', {}).keys(), reverse=True):
                 count = analysis['yearly_stats'][year]
                 f.write(f"{year}: {count:,} submissions\n")
+            
+            # Difficulty and topic breakdowns from the problem metadata cache
+            if analysis.get('difficulty_stats'):
+                f.write("\nDIFFICULTY BREAKDOWN\n")
+                f.write("-" * 30 + "\n")
+                for difficulty, stats in analysis['difficulty_stats'].items():
+                    if stats['attempted']:
+                        f.write(f"{difficulty}: {stats['solved']:,} solved / {stats['attempted']:,} attempted "
+                                f"({stats['submissions']:,} submissions)\n")
+            if analysis.get('topic_stats'):
+                f.write("\nTOP TOPICS\n")
+                f.write("-" * 30 + "\n")
+                for topic, stats in list(analysis['topic_stats'].items())[:10]:
+                    f.write(f"{topic}: {stats['solved']:,} solved / {stats['attempted']:,} attempted\n")
+            
+            # Retry analytics from the problem timeline index
+            timeline = analysis.get('problem_timeline')
+            if timeline:
+                f.write("\nRETRY ANALYTICS\n")
+                f.write("-" * 30 + "\n")
+                f.write(f"Solved First Try: {timeline['solved_first_try']:,} ({timeline['first_try_rate']:.1f}%)\n")
+                f.write(f"Avg Failed Attempts Before Accept: {timeline['avg_failed_before_accept']:.1f}\n")
+                f.write(f"Avg Wrong Answers Before Accept: {timeline['avg_wrong_before_accept']:.1f}\n")
+                f.write(f"Avg Time to Accept: {timeline['avg_time_to_accept_seconds'] / 3600:.1f} hours\n")
+                f.write(f"Problems With Language Switches: {timeline['problems_with_language_switches']:,}\n")
+                f.write(f"Unsolved Problems: {timeline['problems_unsolved']:,}\n")
+                for problem in timeline['most_attempted_unsolved']:
+                    f.write(f"  {problem['titleSlug']}: {problem['attempts']} attempts\n")
+
+    def build_csv_row(self, record: Submission) -> Dict[str, Any]:
+        """Flatten one normalized submission into a CSV row"""
+        dt = record.datetime()
+        return {
+            'title': record.title,
+            'titleSlug': record.title_slug,
+            'lang': record.lang,
+            'statusDisplay': record.status.value,
+            'timestamp': dt.isoformat() if dt else '',
+            'source': record.source.value,
+            'runtime': record.runtime,
+            'memory': record.memory
+        }
+
+    def get_output_sinks(self, outputs: Optional[List[Any]] = None) -> List[OutputSink]:
+        """Sinks for a save: explicit names/instances, self.output_sinks, or the snapshot_format default"""
+        outputs = outputs if outputs is not None else self.output_sinks
+        if outputs is None:
+            outputs = {'json': ['json'], 'compressed': ['compressed'],
+                       'both': ['json', 'compressed']}[self.snapshot_format] + ['report', 'csv']
+        return [OUTPUT_SINKS[output]() if isinstance(output, str) else output for output in outputs]
+
+    def save_enhanced_data(self, username: str, profile_data: Optional[Dict], 
+                          submissions: List[Dict], analysis: Dict[str, Any],
+                          outputs: Optional[List[Any]] = None,
+                          records: Optional[List[Submission]] = None,
+                          history_file: Optional[str] = None, data_sources: Optional[Iterable[str]] = None) -> None:
+        """Save comprehensive data with multiple output formats
         
-        # Save CSV for data analysis
-        csv_filename = f'{username}_submissions_data.csv'
-        try:
-            import csv
-            with open(csv_filename, 'w', newline='', encoding='utf-8') as csvfile:
-                if submissions:
-                    fieldnames = ['title', 'titleSlug', 'lang', 'statusDisplay', 'timestamp', 'source', 'runtime', 'memory']
-                    writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-                    writer.writeheader()
-                    
-                    for sub in submissions:
-                        dt = self.fix_timestamp(sub.get('timestamp'))
-                        row = {
-                            'title': sub.get('title', ''),
-                            'titleSlug': sub.get('titleSlug', ''),
-                            'lang': sub.get('lang', ''),
-                            'statusDisplay': sub.get('statusDisplay', ''),
-                            'timestamp': dt.isoformat() if dt else '',
-                            'source': sub.get('_source', ''),
-                            'runtime': sub.get('runtime', ''),
-                            'memory': sub.get('memory', '')
-                        }
-                        writer.writerow(row)
-        except ImportError:
-            pass  # CSV module not available
+        Each enabled sink writes its file atomically on its own thread; records, if
+        already normalized by the caller, are reused instead of normalizing again.
+        Streamed runs pass their JSONL history_file (and data_sources) instead of submissions.
+        """
+        sinks = self.get_output_sinks(outputs)
+        if not sinks:
+            return
+        context = SaveContext(self, username, profile_data, submissions, analysis, records, history_file,
+                              data_sources)
+        
+        saved, failures = {}, []
+        with ThreadPoolExecutor(max_workers=len(sinks)) as executor:
+            futures = {executor.submit(sink.save, context): sink for sink in sinks}
+            for future in as_completed(futures):
+                sink = futures[future]
+                try:
+                    saved[sink.name] = future.result()
+                except Exception as e:
+                    failures.append((sink, e))
         
         print(f"\n💾 Enhanced data saved:")
-        print(f"   📄 Comprehensive JSON: {json_filename}")
-        print(f"   📝 Detailed Report: {summary_filename}")
-        if 'csv' in locals():
-            print(f"   📊 CSV Data: {csv_filename}")
+        for sink in sinks:
+            if sink.name in saved:
+                print(f"   {sink.label}: {saved[sink.name]}")
+        for sink, error in failures:
+            print(f"   ❌ {sink.label or sink.name} failed: {error}")
+        if failures:
+            raise failures[0][1]
+
+    def save_to_store(self, username: str, profile_data: Optional[Dict], submissions: List[Dict],
+                      analysis: Dict[str, Any], records: Optional[List[Submission]] = None) -> None:
+        """Upsert a run's submissions, profile and analysis into the SQLite store"""
+        if records is None:
+            records = self.get_submission_records(username, submissions)
+        count = self.store.upsert_submissions(username, submissions, self.debug_mode, records)
+        self.store.save_profile(username, profile_data, analysis)
+        print(f"   🗄️ Upserted {count:,} submissions into {self.store.path}")
+
+    def export_from_store(self, username: str) -> None:
+        """Write the JSON/CSV/TXT files for a user from the store without fetching"""
+        submissions = self.store.load_submissions(username)
+        records = normalize_submissions(submissions, self.debug_mode)
+        profile_data, analysis = self.store.load_profile(username)
+        if analysis is None:
+            analysis = self.build_aggregator(records).snapshot()
+        if 'problem_timeline' not in analysis:
+            timeline = ProblemTimelineIndex(self.debug_mode)
+            timeline.update(records)
+            analysis['problem_timeline'] = timeline.snapshot()
+        
+        self.save_enhanced_data(username, profile_data, submissions, analysis, records=records)
+
+    def iter_submission_batches(self, username: str, max_pages: Optional[int] = None,
+                                page_size: Optional[int] = None) -> Iterator[List[Dict]]:
+        """Yield submission batches as they arrive: GraphQL recent accepted first, then REST pages"""
+        graphql_accepted = self.prefetched_submissions.pop(username, None)
+        if graphql_accepted is None:
+            graphql_accepted = self.fetch_recent_submissions(username, limit=200)
+        if graphql_accepted:
+            yield graphql_accepted
+        
+        for result in self.iter_rest_pages(max_pages, page_size):
+            yield result['submissions']
 
+    def stream_comprehensive_data(self, username: str, profile_data: Optional[Dict] = None,
+                                  max_pages: Optional[int] = None, page_size: Optional[int] = None) -> Dict[str, Any]:
+        """Fetch, dedup, aggregate and write submissions page by page without holding the history
+        
+        Raw payloads are only kept one batch at a time. What still grows with the history
+        is the submission index used for dedup (one key and fingerprint per submission)
+        and the problem timeline's (timestamp, status, lang) attempts. The history goes to
+        a temporary JSONL file that only replaces the saved one once the walk reached the
+        end of the history with at least one row; the other outputs are then written by
+        the same sinks and state files as a non-streamed run.
+        """
+        print("\n=== Streaming Data Fetch ===")
+        
+        jsonl_filename = f'{username}_submissions.jsonl'
+        temp_filename = f'{jsonl_filename}.{os.getpid()}.tmp'
+        
+        aggregator = SubmissionAggregator(self.debug_mode)
+        timeline = ProblemTimelineIndex(self.debug_mode)
+        index = SubmissionIndex()  # Dedup by the same key/fingerprint lookup as the batch merge
+        data_sources = set()
+        batches = 0
+        
+        try:
+            with open(temp_filename, 'w', encoding='utf-8') as jsonl_file:
+                for batch in self.iter_submission_batches(username, max_pages, page_size):
+                    batches += 1
+                    fresh = []
+                    for sub in batch:
+                        record = Submission.from_api(sub, self.debug_mode)
+                        if index.lookup(record) is not None or not (record.title_slug or record.timestamp):
+                            continue
+                        index.add(record)
+                        fresh.append(record)
+                        jsonl_file.write(json.dumps(sub, ensure_ascii=False) + "\n")
+                        data_sources.add(record.source.value)
+                    
+                    aggregator.update(fresh)
+                    timeline.update(fresh)
+                    if self.debug_mode:
+                        print(f"   Debug: batch {batches}: {len(batch)} rows, {len(fresh)} new")
+                jsonl_file.flush()
+                os.fsync(jsonl_file.fileno())
+            
+            self.check_rest_complete()
+            if not len(index):
+                raise RuntimeError("stream returned no submissions; the saved files were left unchanged")
+        except BaseException:
+            os.remove(temp_filename)
+            raise
+        os.replace(temp_filename, jsonl_filename)
+        print(f"   ✓ Streamed {len(index):,} unique submissions from {batches} batches")
+        
+        index.submission_count = len(index)
+        self.submission_indexes[username] = index
+        
+        analysis = aggregator.snapshot()
+        analysis['problem_timeline'] = timeline.snapshot()
+        self.update_problem_cache(aggregator.problem_attempts)
+        analysis.update(self.problem_breakdown(aggregator))
+        
+        self.save_enhanced_data(username, profile_data, [], analysis, history_file=jsonl_filename,
+                                data_sources=sorted(data_sources))
+        self.save_aggregator_state(username, aggregator)
+        self.save_problem_timeline(username, timeline)
+        self.save_submission_index(username)
+        
+        if self.store is not None:
+            count, chunk = 0, []
+            for sub in iter_jsonl(jsonl_filename):
+                chunk.append(sub)
+                if len(chunk) >= self.store_batch_size:
+                    count += self.store.upsert_submissions(username, chunk, self.debug_mode)
+                    chunk = []
+            count += self.store.upsert_submissions(username, chunk, self.debug_mode)
+            self.store.save_profile(username, profile_data, analysis)
+            print(f"   🗄️ Upserted {count:,} submissions into {self.store.path}")
+        
+        return analysis
 
-def run_comprehensive_leetcode_fetch():
+def run_comprehensive_leetcode_fetch(stream: bool = False, store_path: Optional[str] = None,
+                                     cache_dir: Optional[str] = None, offline: bool = False,
+                                     base_url: Optional[str] = None, metrics_file: Optional[str] = None,
+                                     profile_dir: Optional[str] = None, trace_memory: bool = False,
+                                     resume: bool = False, snapshot_format: str = 'json',
+                                     outputs: Optional[List[str]] = None, analysis_backend: str = 'python',
+                                     pagination: str = 'cursor'):
     """Main function for comprehensive LeetCode data fetching"""
     print("🚀 LeetCode Comprehensive Data Fetcher v4.0")
     print("   Enhanced with smart merging, better timestamps, and comprehensive analysis\n")
     
     fetcher = LeetCodeSubmissionFetcher()
+    if base_url:
+        fetcher.base_url = base_url.rstrip('/')
+    if store_path:
+        fetcher.store = SubmissionStore(store_path)
+    if cache_dir or offline:
+        fetcher.response_cache = ResponseCache(cache_dir or '.leetcode_cache', offline=offline)
+    fetcher.metrics = FetchMetrics(profile_dir=profile_dir, trace_memory=trace_memory)
+    fetcher.resume = resume
+    fetcher.snapshot_format = snapshot_format
+    fetcher.output_sinks = outputs
+    fetcher.analysis_backend = analysis_backend
+    fetcher.pagination = pagination
+    checkpoint = None
     
     # Ask for debug mode
     debug_choice = input("Enable debug mode? (y/N): ").strip().lower()
     fetcher.debug_mode = debug_choice == 'y'
     
     try:
-        # Step 1: Authentication
-        cookies = fetcher.extract_cookies_manual()
-        session = fetcher.create_authenticated_session(cookies)
-        
-        if not fetcher.test_authentication():
-            print("\n❌ Authentication failed. Please check your cookies and try again.")
-            return
+        # Step 1: Authentication (offline replay serves everything from the cache)
+        if offline:
+            print("📦 Offline mode: replaying cached responses only")
+            fetcher.create_authenticated_session({})
+        else:
+            cookies = fetcher.extract_cookies_manual()
+            session = fetcher.create_authenticated_session(cookies)
+            
+            if not fetcher.test_authentication():
+                print("\n❌ Authentication failed. Please check your cookies and try again.")
+                return
         
         # Step 2: Get username
         username = input("\nEnter your LeetCode username: ").strip()
         if not username:
             print("❌ Username is required!")
             return
+        if offline:
+            # No whoami offline; replay the account entries recorded for this user
+            fetcher.cache_account = username
+        
+        # Finished stages of an interrupted run are restored instead of redone
+        checkpoint = RunCheckpoint(username)
+        if resume and checkpoint.load():
+            print(f"↪ Resuming '{username}' after: {', '.join(checkpoint.completed_stages()) or 'no finished stages'}")
         
         # Step 3: Comprehensive profile fetch
         print(f"\n🔄 Starting comprehensive data fetch for '{username}'...")
-        profile_data = fetcher.get_comprehensive_profile(username)
-        
-        # Step 4: Comprehensive submission fetch
-        print("⏳ This may take a few minutes for comprehensive data collection...")
-        all_submissions = fetcher.fetch_comprehensive_data(username)
-        
-        if not all_submissions:
-            print("❌ No submissions found using any method.")
-            print("💡 Possible reasons:")
-            print("   - No submissions in your account")
-            print("   - Submissions are private")
-            print("   - API changes or restrictions")
+        with fetcher.metrics.stage('profile'):
+            profile_data = fetcher.get_checkpointed_profile(username, checkpoint)
+        
+        # Streaming mode fetches, analyzes and saves page by page
+        if stream:
+            with fetcher.metrics.stage('stream'):
+                analysis = fetcher.stream_comprehensive_data(username, profile_data)
+            # Only the profile stage is checkpointed in streaming mode; it is done with once saved
+            checkpoint.clear()
+            print(f"\n🎉 Streaming analysis complete!")
+            print(f"   📊 Analyzed {analysis.get('total_submissions', 0):,} submissions")
+            print(f"   🎯 Found {analysis.get('unique_problems_solved', 0)} unique problems solved")
+            print(f"   📈 Overall acceptance rate: {analysis.get('acceptance_rate', 0):.1f}%")
             return
         
-        # Step 5: Comprehensive analysis
-        analysis = fetcher.analyze_comprehensive_data(all_submissions, profile_data)
+        # Step 4: Comprehensive submission fetch (incremental when a snapshot exists)
+        incremental = False
+        if checkpoint.has('fetch'):
+            all_submissions = fetcher.restore_checkpointed_submissions(username, checkpoint)
+        else:
+            saved_submissions = fetcher.load_saved_submissions(username)
+            if saved_submissions:
+                incremental_choice = input(f"\nFound saved snapshot with {len(saved_submissions)} submissions. "
+                                           f"Only fetch new ones? (Y/n): ").strip().lower()
+                incremental = incremental_choice != 'n'
+            
+            with fetcher.metrics.stage('fetch'):
+                if incremental:
+                    all_submissions = fetcher.fetch_incremental_data(username, saved_submissions)
+                else:
+                    print("⏳ This may take a few minutes for comprehensive data collection...")
+                    all_submissions = fetcher.fetch_comprehensive_data(username)
+            
+            if not all_submissions:
+                print("❌ No submissions found using any method.")
+                print("💡 Possible reasons:")
+                print("   - No submissions in your account")
+                print("   - Submissions are private")
+                print("   - API changes or restrictions")
+                return
+            checkpoint.save_submissions(all_submissions, fetcher.submission_indexes.get(username), incremental)
+        
+        # Step 5: Comprehensive analysis; the history is normalized (once) only by stages that need all of it
+        new_records = fetcher.last_incremental_records if incremental else None
+        if checkpoint.has('analyze'):
+            analysis, aggregator = checkpoint.load_analysis(fetcher.debug_mode)
+        else:
+            with fetcher.metrics.stage('analyze'):
+                aggregator = fetcher.get_updated_aggregator(username, all_submissions, new_records)
+                analysis = fetcher.analyze_comprehensive_data(
+                    all_submissions, profile_data, aggregator,
+                    fetcher.cached_submission_records(username, all_submissions))
+            checkpoint.save_analysis(aggregator)
+        with fetcher.metrics.stage('timeline'):
+            timeline = fetcher.get_updated_problem_timeline(username, all_submissions, new_records)
+            analysis['problem_timeline'] = timeline.snapshot()
+        with fetcher.metrics.stage('metadata'):
+            fetcher.update_problem_cache(aggregator.problem_attempts)
+            analysis.update(fetcher.problem_breakdown(aggregator))
         
         # Step 6: Save enhanced data
-        fetcher.save_enhanced_data(username, profile_data, all_submissions, analysis)
+        with fetcher.metrics.stage('save'):
+            fetcher.save_enhanced_data(username, profile_data, all_submissions, analysis)
+            fetcher.save_aggregator_state(username, aggregator)
+            fetcher.save_problem_timeline(username, timeline)
+            fetcher.save_submission_index(username)
+            if fetcher.store is not None:
+                fetcher.save_to_store(username, profile_data, all_submissions, analysis)
+        checkpoint.clear()
         
         print(f"\n🎉 Comprehensive analysis complete!")
         print(f"   📊 Analyzed {len(all_submissions):,} submissions")
@@ -813,8 +3662,16 @@ def run_comprehensive_leetcode_fetch():
         print(f"   📈 Overall acceptance rate: {analysis.get('acceptance_rate', 0):.1f}%")
         print("📁 Check the generated files for detailed insights.")
         
+        if fetcher.debug_mode:
+            fetcher.print_latency_report()
+            if fetcher.response_cache is not None:
+                print(f"📦 Response cache: {fetcher.response_cache.hits} hits, {fetcher.response_cache.misses} misses")
+        
     except KeyboardInterrupt:
         print("\n⚠️ Process interrupted by user.")
+        if checkpoint is not None and checkpoint.completed_stages():
+            print(f"   Finished stages are checkpointed ({', '.join(checkpoint.completed_stages())}); "
+                  f"rerun with --resume to continue.")
         return
     except Exception as e:
         print(f"\n❌ Unexpected error: {e}")
@@ -822,7 +3679,307 @@ def run_comprehensive_leetcode_fetch():
             import traceback
             traceback.print_exc()
         return
+    finally:
+        fetcher.save_rate_limit_state()
+        if fetcher.store is not None:
+            fetcher.store.close()
+        if metrics_file:
+            fetcher.metrics.write(metrics_file)
+            print(f"📈 Metrics written to {metrics_file}")
+
+
+def load_bulk_accounts(accounts_file: str) -> List[Dict[str, str]]:
+    """Load accounts for bulk mode from a CSV (username,LEETCODE_SESSION,csrftoken) or JSON list"""
+    if accounts_file.endswith('.json'):
+        with open(accounts_file, 'r', encoding='utf-8') as f:
+            rows = json.load(f)
+    else:
+        with open(accounts_file, 'r', newline='', encoding='utf-8') as f:
+            rows = list(csv.DictReader(f))
+    
+    accounts = []
+    for row in rows:
+        username = (row.get('username') or '').strip()
+        session_cookie = (row.get('LEETCODE_SESSION') or '').strip()
+        if not username or not session_cookie:
+            print(f"⚠️ Skipping account entry without username/LEETCODE_SESSION: {username or row}")
+            continue
+        
+        cookies = {'LEETCODE_SESSION': session_cookie}
+        csrf_token = (row.get('csrftoken') or '').strip()
+        if csrf_token:
+            cookies['csrftoken'] = csrf_token
+        accounts.append({'username': username, 'cookies': cookies})
+    
+    return accounts
+
+
+def process_bulk_account(account: Dict[str, Any], incremental: bool = False, debug_mode: bool = False,
+                         stream: bool = False, store_path: Optional[str] = None,
+                         cache_dir: Optional[str] = None, base_url: Optional[str] = None,
+                         metrics_file: Optional[str] = None, profile_dir: Optional[str] = None,
+                         trace_memory: bool = False, resume: bool = False,
+                         snapshot_format: str = 'json', outputs: Optional[List[str]] = None,
+                         analysis_backend: str = 'python', pagination: str = 'cursor') -> Dict[str, Any]:
+    """Run the full fetch pipeline for one account in its own fetcher and session"""
+    username = account['username']
+    result = {'username': username, 'status': 'ok', 'error': None, 'timings': {}, 'total_submissions': 0}
+    run_start = time.monotonic()
+    metrics = FetchMetrics(profile_dir=os.path.join(profile_dir, username) if profile_dir else None,
+                           trace_memory=trace_memory)
+    
+    def timed(stage: str, func, *args):
+        with metrics.stage(stage):
+            return func(*args)
+    
+    # Each worker process handles one account at a time, so its output goes to a per-user log
+    log_filename = f'{username}_fetch_log.txt'
+    fetcher = None
+    with open(log_filename, 'w', encoding='utf-8') as log, redirect_stdout(log):
+        try:
+            fetcher = LeetCodeSubmissionFetcher()
+            fetcher.debug_mode = debug_mode
+            fetcher.metrics = metrics
+            if base_url:
+                fetcher.base_url = base_url.rstrip('/')
+            if store_path:
+                fetcher.store = SubmissionStore(store_path)
+            if cache_dir:
+                # Authenticated REST pages differ per account, so each gets its own cache
+                fetcher.response_cache = ResponseCache(os.path.join(cache_dir, username))
+            fetcher.create_authenticated_session(account['cookies'])
+            fetcher.resume = resume
+            fetcher.snapshot_format = snapshot_format
+            fetcher.output_sinks = outputs
+            fetcher.analysis_backend = analysis_backend
+            fetcher.pagination = pagination
+            
+            checkpoint = RunCheckpoint(username)
+            if resume and checkpoint.load():
+                result['resumed_stages'] = checkpoint.completed_stages()
+            
+            if not timed('auth', fetcher.test_authentication):
+                raise RuntimeError("authentication failed")
+            
+            profile_data = timed('profile', fetcher.get_checkpointed_profile, username, checkpoint)
+            
+            if stream:
+                analysis = timed('stream', fetcher.stream_comprehensive_data, username, profile_data)
+                checkpoint.clear()
+                total_submissions = analysis.get('total_submissions', 0)
+            else:
+                saved_submissions = []
+                if checkpoint.has('fetch'):
+                    all_submissions = fetcher.restore_checkpointed_submissions(username, checkpoint)
+                else:
+                    saved_submissions = fetcher.load_saved_submissions(username) if incremental else []
+                    if saved_submissions:
+                        all_submissions = timed('fetch', fetcher.fetch_incremental_data, username, saved_submissions)
+                    else:
+                        all_submissions = timed('fetch', fetcher.fetch_comprehensive_data, username)
+                    
+                    if not all_submissions:
+                        raise RuntimeError("no submissions found")
+                    checkpoint.save_submissions(all_submissions, fetcher.submission_indexes.get(username),
+                                                bool(saved_submissions))
+                
+                new_records = fetcher.last_incremental_records if saved_submissions else None
+                if checkpoint.has('analyze'):
+                    analysis, aggregator = checkpoint.load_analysis(fetcher.debug_mode)
+                else:
+                    aggregator = timed('aggregate', fetcher.get_updated_aggregator, username, all_submissions,
+                                       new_records)
+                    analysis = timed('analyze', fetcher.analyze_comprehensive_data, all_submissions, profile_data,
+                                     aggregator, fetcher.cached_submission_records(username, all_submissions))
+                    checkpoint.save_analysis(aggregator)
+                timeline = timed('timeline', fetcher.get_updated_problem_timeline, username, all_submissions,
+                                 new_records)
+                analysis['problem_timeline'] = timeline.snapshot()
+                timed('metadata', fetcher.update_problem_cache, aggregator.problem_attempts)
+                analysis.update(fetcher.problem_breakdown(aggregator))
+                
+                timed('save', fetcher.save_enhanced_data, username, profile_data, all_submissions, analysis)
+                fetcher.save_aggregator_state(username, aggregator)
+                fetcher.save_problem_timeline(username, timeline)
+                fetcher.save_submission_index(username)
+                if fetcher.store is not None:
+                    timed('store', fetcher.save_to_store, username, profile_data, all_submissions, analysis)
+                checkpoint.clear()
+                total_submissions = len(all_submissions)
+            
+            if not total_submissions:
+                raise RuntimeError("no submissions found")
+            
+            result['total_submissions'] = total_submissions
+            result['acceptance_rate'] = analysis.get('acceptance_rate', 0)
+            
+        except Exception as e:
+            print(f"\n❌ Bulk fetch failed for '{username}': {e}")
+            result['status'] = 'error'
+            result['error'] = str(e)
+        finally:
+            if fetcher is not None:
+                fetcher.save_rate_limit_state()
+                if fetcher.store is not None:
+                    fetcher.store.close()
+    
+    result['timings'] = metrics.stage_timings()
+    result['timings']['total'] = round(time.monotonic() - run_start, 3)
+    if metrics_file:
+        # One file per account, e.g. metrics.prom -> alice_metrics.prom
+        directory, basename = os.path.split(metrics_file)
+        metrics.write(os.path.join(directory, f'{username}_{basename}'), {'username': username})
+    return result
+
+
+def run_bulk_leetcode_fetch(accounts_file: str, max_workers: int = 4, incremental: bool = False,
+                            debug_mode: bool = False, stream: bool = False,
+                            store_path: Optional[str] = None, cache_dir: Optional[str] = None,
+                            base_url: Optional[str] = None, metrics_file: Optional[str] = None,
+                            profile_dir: Optional[str] = None, trace_memory: bool = False,
+                            resume: bool = False, snapshot_format: str = 'json',
+                            outputs: Optional[List[str]] = None, analysis_backend: str = 'python',
+                            pagination: str = 'cursor') -> Dict[str, Any]:
+    """Non-interactive bulk fetch over many accounts with a global concurrency cap"""
+    print("🚀 LeetCode Bulk Data Fetcher")
+    
+    accounts = load_bulk_accounts(accounts_file)
+    print(f"   {len(accounts)} accounts, {max_workers} workers{', incremental' if incremental else ''}\n")
+    
+    run_start = time.monotonic()
+    results = []
+    
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(process_bulk_account, account, incremental, debug_mode, stream,
+                            store_path, cache_dir, base_url, metrics_file, profile_dir,
+                            trace_memory, resume, snapshot_format, outputs, analysis_backend,
+                            pagination): account['username']
+            for account in accounts
+        }
+        for future in as_completed(futures):
+            username = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                result = {'username': username, 'status': 'error', 'error': str(e), 'timings': {}, 'total_submissions': 0}
+            
+            results.append(result)
+            status_emoji = "✅" if result['status'] == 'ok' else "❌"
+            detail = f"{result['total_submissions']:,} submissions" if result['status'] == 'ok' else result['error']
+            print(f"   {status_emoji} [{len(results)}/{len(accounts)}] {username}: {detail} "
+                  f"({result['timings'].get('total', 0):.1f}s)")
+    
+    elapsed = time.monotonic() - run_start
+    results.sort(key=lambda r: r['username'])
+    succeeded = sum(1 for r in results if r['status'] == 'ok')
+    
+    summary = {
+        'run_timestamp': datetime.now().isoformat(),
+        'accounts_file': accounts_file,
+        'max_workers': max_workers,
+        'incremental': incremental,
+        'resume': resume,
+        'stream': stream,
+        'store': store_path,
+        'total_accounts': len(accounts),
+        'succeeded': succeeded,
+        'failed': len(results) - succeeded,
+        'elapsed_seconds': round(elapsed, 3),
+        'accounts': results
+    }
+    
+    summary_filename = 'bulk_run_summary.json'
+    with open(summary_filename, 'w', encoding='utf-8') as f:
+        json.dump(summary, f, indent=2, ensure_ascii=False)
+    
+    print(f"\n🎉 Bulk run complete: {succeeded}/{len(accounts)} accounts in {elapsed:.1f}s")
+    print(f"   📄 Run summary: {summary_filename}")
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="LeetCode Comprehensive Data Fetcher")
+    parser.add_argument('--bulk', metavar='ACCOUNTS_FILE',
+                        help="Non-interactive mode over a CSV/JSON file of usernames and cookies")
+    parser.add_argument('--workers', type=positive_int, default=4, help="Accounts processed in parallel in bulk mode")
+    parser.add_argument('--incremental', action='store_true',
+                        help="In bulk mode, only fetch submissions newer than each saved snapshot")
+    parser.add_argument('--debug', action='store_true', help="Enable debug output in bulk mode")
+    parser.add_argument('--stream', action='store_true',
+                        help="Stream pages straight to JSONL/CSV instead of holding every payload in memory")
+    parser.add_argument('--store', metavar='DB_PATH',
+                        help="Also keep submissions in a SQLite store, used as the source for incremental syncs")
+    parser.add_argument('--cache-dir', metavar='DIR',
+                        help="Cache API responses on disk with per-operation TTLs")
+    parser.add_argument('--offline', action='store_true',
+                        help="Replay responses from the cache only, without network access")
+    parser.add_argument('--base-url', default='https://leetcode.com',
+                        help="API base URL, e.g. a local leetcode_mock_server.py instance")
+    parser.add_argument('--export', metavar='USERNAME',
+                        help="Write the JSON/CSV/TXT files for USERNAME from --store without fetching")
+    parser.add_argument('--metrics', metavar='FILE',
+                        help="Write request/stage metrics as Prometheus text (*.prom) or JSON lines (anything else)")
+    parser.add_argument('--profile-dir', metavar='DIR', help="Dump a cProfile .prof file per pipeline stage")
+    parser.add_argument('--trace-memory', action='store_true', help="Record peak traced memory per pipeline stage")
+    parser.add_argument('--resume', action='store_true',
+                        help="Continue interrupted runs from their checkpoints instead of starting over")
+    parser.add_argument('--snapshot-format', choices=['json', 'compressed', 'both'], default='json',
+                        help="Write the pretty JSON snapshot, the compressed .lcsnap snapshot, or both")
+    parser.add_argument('--outputs', type=parse_output_sinks, metavar='SINKS',
+                        help=f"Comma-separated files to write after a fetch ({','.join(OUTPUT_SINKS)}); "
+                             "defaults to the --snapshot-format snapshot plus report and csv")
+    parser.add_argument('--pagination', choices=['cursor', 'offset'], default='cursor',
+                        help="Walk the REST history by cursor (sequential, checkpointed, resumable) or fetch "
+                             "offset pages concurrently")
+    parser.add_argument('--analysis-backend', choices=ANALYSIS_BACKENDS, default='python',
+                        help="Build full-history statistics with pure Python or vectorized with NumPy (columnar)")
+    parser.add_argument('--unsolved', metavar='USERNAME',
+                        help="List USERNAME's never-accepted problems from the saved problem timeline and exit")
+    parser.add_argument('--min-attempts', type=int, default=3,
+                        help="With --unsolved, only list problems tried at least this many times")
+    parser.add_argument('--compress-snapshot', metavar='JSON_FILE', nargs='+',
+                        help="Convert saved JSON snapshots to the compressed format and exit")
+    args = parser.parse_args()
+    
+    if args.compress_snapshot:
+        for json_path in args.compress_snapshot:
+            convert_snapshot(json_path)
+    elif args.unsolved:
+        timeline = LeetCodeSubmissionFetcher().load_problem_timeline(args.unsolved)
+        if timeline is None:
+            parser.error(f"no problem timeline saved for {args.unsolved}; run a fetch first")
+        stuck = timeline.unsolved_after(args.min_attempts)
+        print(f"🧩 {len(stuck)} problems unsolved after {args.min_attempts}+ attempts:")
+        for slug, attempts in stuck:
+            problem = timeline.get(slug)
+            print(f"   {slug:<50} {attempts:>3} attempts, last {datetime.fromtimestamp(problem['last_attempt']):%Y-%m-%d} "
+                  f"({', '.join(problem['languages'])})")
+    elif args.export:
+        if not args.store:
+            parser.error("--export requires --store")
+        fetcher = LeetCodeSubmissionFetcher()
+        fetcher.store = SubmissionStore(args.store)
+        fetcher.snapshot_format = args.snapshot_format
+        fetcher.output_sinks = args.outputs
+        fetcher.analysis_backend = args.analysis_backend
+        fetcher.export_from_store(args.export)
+    elif args.bulk:
+        run_bulk_leetcode_fetch(args.bulk, max_workers=args.workers, incremental=args.incremental,
+                                debug_mode=args.debug, stream=args.stream, store_path=args.store,
+                                cache_dir=args.cache_dir, base_url=args.base_url, metrics_file=args.metrics,
+                                profile_dir=args.profile_dir, trace_memory=args.trace_memory, resume=args.resume,
+                                snapshot_format=args.snapshot_format, outputs=args.outputs,
+                                analysis_backend=args.analysis_backend, pagination=args.pagination)
+    else:
+        run_comprehensive_leetcode_fetch(stream=args.stream, store_path=args.store,
+                                         cache_dir=args.cache_dir, offline=args.offline,
+                                         base_url=args.base_url, metrics_file=args.metrics,
+                                         profile_dir=args.profile_dir, trace_memory=args.trace_memory,
+                                         resume=args.resume, snapshot_format=args.snapshot_format,
+                                         outputs=args.outputs, analysis_backend=args.analysis_backend,
+                                         pagination=args.pagination)
 
 
 if __name__ == "__main__":
-    run_comprehensive_leetcode_fetch()
+    main()
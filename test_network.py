@@ -0,0 +1,163 @@
+import os
+
+import pytest
+
+from conftest import make_fetcher
+from test_leetcode_auth import AdaptiveRateLimiter, ResponseCache
+
+
+def test_cache_serves_fresh_entries_without_a_request(serve, rest_fixture):
+    server = serve(rest_fixture)
+    fetcher = make_fetcher(server.base_url)
+    fetcher.response_cache = ResponseCache('cache')
+
+    first = fetcher.fetch_submission_page_rest(0, 20)
+    second = fetcher.fetch_submission_page_rest(0, 20)
+
+    assert second == first
+    assert server.stats['rest:submissions'] == 1
+    assert (fetcher.response_cache.hits, fetcher.response_cache.misses) == (1, 1)
+
+
+def test_cache_revalidates_stale_entries_with_their_etag(serve, rest_fixture):
+    server = serve(rest_fixture)
+    fetcher = make_fetcher(server.base_url)
+    fetcher.response_cache = ResponseCache('cache', ttls={'rest:submissions': 0})
+
+    first = fetcher.fetch_submission_page_rest(0, 20)
+    second = fetcher.fetch_submission_page_rest(0, 20)
+
+    assert second == first
+    assert server.stats['rest:submissions'] == 1
+    assert server.stats['not_modified'] == 1
+
+
+def test_cache_offline_mode_never_touches_the_network(serve, rest_fixture):
+    server = serve(rest_fixture)
+    fetcher = make_fetcher(server.base_url)
+    fetcher.response_cache = ResponseCache('cache')
+    fetcher.fetch_submission_page_rest(0, 20)
+
+    fetcher.response_cache = ResponseCache('cache', ttls={'rest:submissions': 0}, offline=True)
+
+    assert len(fetcher.fetch_submission_page_rest(0, 20)['submissions']) == 20
+    assert fetcher.fetch_submission_page_rest(20, 20)['error'] == 'status 504'
+    assert server.stats['rest:submissions'] == 1
+
+
+def test_cache_scopes_account_dependent_entries(serve, rest_fixture):
+    server = serve(rest_fixture)
+    alice = make_fetcher(server.base_url, session='alice-session')
+    bob = make_fetcher(server.base_url, session='bob-session')
+    alice.response_cache = bob.response_cache = ResponseCache('cache')
+
+    alice.fetch_submission_page_rest(0, 20)
+    bob.fetch_submission_page_rest(0, 20)
+    alice.fetch_submission_page_rest(0, 20)
+
+    assert server.stats['rest:submissions'] == 2
+    assert len(os.listdir('cache')) == 2
+
+    cache = alice.response_cache
+    url = f'{server.base_url}/graphql/'
+    payload = {'variables': {'slug0': 'two-sum'}}
+    assert cache.make_key('POST', url, 'graphql:questionBatch', payload, 'alice') == \
+        cache.make_key('POST', url, 'graphql:questionBatch', payload, 'bob')
+    assert cache.make_key('POST', url, 'graphql:globalData', None, 'alice') != \
+        cache.make_key('POST', url, 'graphql:globalData', None, 'bob')
+
+
+def test_cache_evicts_least_recently_used_entries(serve, rest_fixture):
+    server = serve(rest_fixture)
+    fetcher = make_fetcher(server.base_url)
+    fetcher.response_cache = ResponseCache('cache', max_bytes=40000)
+
+    for page in range(10):
+        fetcher.fetch_submission_page_rest(page * 20, 20)
+
+    assert fetcher.response_cache.total_bytes <= 40000
+    assert sum(os.path.getsize(os.path.join('cache', name)) for name in os.listdir('cache')) == \
+        fetcher.response_cache.total_bytes
+
+
+def test_limiter_increases_additively_while_responses_succeed():
+    limiter = AdaptiveRateLimiter(2.0, max_rate=3.0, increase_per_second=0.5)
+
+    limiter.on_response(200, 0.05)
+    assert limiter.rate == pytest.approx(2.25)
+
+    for _ in range(100):
+        limiter.on_response(200, 0.05)
+    assert limiter.rate == 3.0
+    assert limiter.decreases == 0
+
+
+def test_limiter_decreases_multiplicatively_once_per_burst():
+    limiter = AdaptiveRateLimiter(4.0, min_rate=0.5, cooldown_seconds=60)
+
+    for _ in range(5):
+        limiter.on_response(429, 0.05)
+
+    assert limiter.rate == 2.0
+    assert (limiter.throttled, limiter.decreases) == (5, 1)
+
+    limiter.cooldown_seconds = 0
+    for _ in range(10):
+        limiter.on_response(429, 0.05)
+    assert limiter.rate == 0.5
+
+
+def test_limiter_backs_off_when_latency_climbs_above_the_endpoint_baseline():
+    limiter = AdaptiveRateLimiter(4.0, cooldown_seconds=0, latency_warmup=3)
+
+    for _ in range(10):
+        limiter.on_response(200, 0.1, endpoint='graphql')
+        limiter.on_response(200, 1.0, endpoint='rest')  # Slow but steady: not a reason to back off
+    assert limiter.decreases == 0
+    assert limiter.latency_baseline('graphql') == pytest.approx(0.1)
+
+    rate = limiter.rate
+    for _ in range(10):
+        limiter.on_response(200, 2.0, endpoint='graphql')
+    assert limiter.decreases > 0
+    assert limiter.rate < rate
+
+
+def test_limiter_restores_the_rate_but_not_the_baselines():
+    limiter = AdaptiveRateLimiter(4.0)
+    for _ in range(10):
+        limiter.on_response(200, 0.1)
+
+    restored = AdaptiveRateLimiter(1.0)
+    restored.restore(limiter.to_dict())
+
+    assert restored.rate == pytest.approx(limiter.rate, abs=1e-4)
+    assert restored.latency_baseline('default') is None
+
+
+def test_offset_paging_reports_a_failed_page_as_an_error(serve, rest_fixture):
+    fetcher = make_fetcher(serve(rest_fixture, fail_offsets=[100]).base_url)
+
+    rows = fetcher.fetch_rest_pages_concurrent(None, 20)
+
+    assert len(rows) == 100
+    assert (fetcher.last_rest_stop, fetcher.last_rest_error) == ('error', 'status 500')
+
+
+def test_offset_paging_tells_the_end_from_the_page_limit(serve, rest_fixture):
+    fetcher = make_fetcher(serve(rest_fixture).base_url)
+
+    assert len(fetcher.fetch_rest_pages_concurrent(3, 20)) == 60
+    assert fetcher.last_rest_stop == 'max_pages'
+    assert len(fetcher.fetch_rest_pages_concurrent(None, 20)) == 200
+    assert fetcher.last_rest_stop == 'end'
+
+
+@pytest.mark.parametrize('pagination', ['cursor', 'offset'])
+def test_full_fetch_refuses_a_history_cut_short_by_a_failed_page(serve, rest_fixture, pagination):
+    fetcher = make_fetcher(serve(rest_fixture, fail_offsets=[40]).base_url)
+    fetcher.pagination = pagination
+
+    with pytest.raises(RuntimeError, match='incomplete'):
+        fetcher.fetch_comprehensive_data(rest_fixture.username)
+    assert rest_fixture.username not in fetcher.submission_records
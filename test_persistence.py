@@ -0,0 +1,120 @@
+import json
+import os
+
+import pytest
+
+from conftest import make_fetcher
+from test_leetcode_auth import (
+    RunCheckpoint, SnapshotFile, SubmissionAggregator, SubmissionIndex, SubmissionStore, convert_snapshot,
+    read_snapshot
+)
+
+
+def test_snapshot_file_round_trip(history):
+    metadata = {'username': 'alice', 'total_submissions_fetched': len(history)}
+    sections = {'user_profile': {'username': 'alice'}, 'comprehensive_analysis': {'total_submissions': 200}}
+
+    SnapshotFile.write('alice.lcsnap', metadata, sections, iter(history))
+    snapshot = SnapshotFile('alice.lcsnap')
+
+    assert snapshot.metadata == metadata
+    assert snapshot.sections == ['user_profile', 'comprehensive_analysis', SnapshotFile.HISTORY_SECTION]
+    assert snapshot.header['sections'][SnapshotFile.HISTORY_SECTION]['count'] == len(history)
+    assert snapshot.section('comprehensive_analysis') == sections['comprehensive_analysis']
+    assert list(snapshot.iter_submissions()) == history
+    assert read_snapshot('alice.lcsnap') == dict(sections, metadata=metadata, submission_history=history)
+
+
+def test_convert_snapshot_keeps_the_history(history):
+    data = {'metadata': {'username': 'alice'}, 'user_profile': None, 'submission_history': history,
+            'comprehensive_analysis': {}}
+    with open('alice_comprehensive_leetcode_data.json', 'w', encoding='utf-8') as f:
+        json.dump(data, f)
+
+    path = convert_snapshot('alice_comprehensive_leetcode_data.json')
+
+    assert read_snapshot(path) == data
+
+
+def test_snapshot_rejects_other_files():
+    with open('bogus.lcsnap', 'wb') as f:
+        f.write(b'not a snapshot')
+    with pytest.raises(ValueError):
+        SnapshotFile('bogus.lcsnap')
+
+
+def test_run_checkpoint_round_trip(history):
+    aggregator = SubmissionAggregator()
+    aggregator.update(history)
+    checkpoint = RunCheckpoint('alice')
+    checkpoint.save_profile({'username': 'alice'}, history[:5])
+    checkpoint.save_submissions(history, SubmissionIndex.from_submissions(history))
+    checkpoint.save_analysis(aggregator)
+
+    restored = RunCheckpoint('alice')
+    assert restored.load()
+    assert restored.completed_stages() == ['profile', 'fetch', 'analyze']
+    submissions, index = restored.load_submissions()
+    assert submissions == history and len(index) == len(history)
+    assert restored.load_analysis()[0] == aggregator.snapshot()
+
+    restored.clear()
+    assert not os.path.exists(checkpoint.path) and not os.path.exists(checkpoint.submissions_path)
+    assert not RunCheckpoint('alice').load()
+
+
+def test_run_checkpoint_redoes_fetch_when_its_history_is_gone(history):
+    checkpoint = RunCheckpoint('alice')
+    checkpoint.save_profile(None, None)
+    checkpoint.save_submissions(history, None)
+    os.remove(checkpoint.submissions_path)
+
+    restored = RunCheckpoint('alice')
+    assert restored.load()
+    assert restored.completed_stages() == ['profile']
+
+
+def test_store_upserts_by_submission_key(history):
+    store = SubmissionStore('submissions.db')
+    try:
+        store.upsert_submissions('alice', history[:120])
+        store.upsert_submissions('alice', history[100:])
+        store.upsert_submissions('bob', history[:10])
+
+        assert store.load_submissions('alice') == sorted(history, key=lambda sub: -sub['timestamp'])
+        assert store.usernames() == ['alice', 'bob']
+        assert sum(count for _, _, count in store.language_status_counts('alice')) == len(history)
+    finally:
+        store.close()
+
+
+def test_cursor_crawl_resumes_from_its_checkpoint(serve, rest_fixture):
+    server = serve(rest_fixture, fail_offsets=[60])
+    fetcher = make_fetcher(server.base_url)
+    fetcher.checkpoint_every_pages = 1
+
+    partial = fetcher.fetch_full_history_rest('alice')
+
+    assert len(partial) == 60 and fetcher.last_rest_stop == 'error'
+    assert os.path.exists('alice_rest_checkpoint.json')
+
+    server.fail_offsets.clear()
+    requests_before = server.stats['rest:submissions']
+    fetcher = make_fetcher(server.base_url)
+    fetcher.resume = True
+
+    rows = fetcher.fetch_full_history_rest('alice')
+
+    assert [sub['id'] for sub in rows] == [sub['id'] for sub in rest_fixture.rest_submissions]
+    assert server.stats['rest:submissions'] - requests_before == 7  # Offsets 60..180, not the first 3 pages again
+    assert not os.path.exists('alice_rest_checkpoint.json') and not os.path.exists('alice_rest_pages.jsonl')
+
+
+def test_cursor_crawl_without_resume_starts_over(serve, rest_fixture):
+    server = serve(rest_fixture, fail_offsets=[60])
+    make_fetcher(server.base_url).fetch_full_history_rest('alice')
+    server.fail_offsets.clear()
+
+    rows = make_fetcher(server.base_url).fetch_full_history_rest('alice')
+
+    assert [sub['id'] for sub in rows] == [sub['id'] for sub in rest_fixture.rest_submissions]
@@ -0,0 +1,181 @@
+import json
+
+import pytest
+
+from conftest import make_fetcher
+from test_leetcode_auth import Submission, SubmissionIndex, process_bulk_account, read_snapshot
+
+
+def run_account(server, username, **options):
+    """process_bulk_account against the mock server, starting from a fast learned rate"""
+    with open('.leetcode_rate_limit.json', 'w', encoding='utf-8') as f:
+        json.dump({server.base_url: {'version': 1, 'rate': 20.0}}, f)
+    account = {'username': username, 'cookies': {'LEETCODE_SESSION': 'session', 'csrftoken': 'token'}}
+    return process_bulk_account(account, base_url=server.base_url, **options)
+
+
+def ids(submissions):
+    return [str(sub['id']) for sub in submissions]
+
+
+def saved_files(workdir, username):
+    """Contents of the account's outputs and state files, leaving out the run log and checkpoint"""
+    return {path.name: path.read_bytes() for path in workdir.glob(f'{username}_*')
+            if not path.name.endswith(('_fetch_log.txt', '_run_checkpoint.json'))}
+
+
+def test_incremental_sync_only_pages_until_known_rows(serve, rest_fixture):
+    server = serve(rest_fixture)
+    rows = rest_fixture.rest_submissions
+    fetcher = make_fetcher(server.base_url)
+
+    merged = fetcher.fetch_incremental_data('alice', rows[50:], page_size=20)
+
+    assert ids(merged) == ids(rows)
+    assert ids(fetcher.last_incremental_delta) == ids(rows[:50])
+    assert server.stats['rest:submissions'] == 3
+
+
+def test_incremental_sync_with_a_matching_index_only_normalizes_fetched_rows(serve, rest_fixture, monkeypatch):
+    server = serve(rest_fixture)
+    rows = rest_fixture.rest_submissions
+    fetcher = make_fetcher(server.base_url)
+    fetcher.submission_indexes['alice'] = SubmissionIndex.from_submissions(rows[50:])
+    fetcher.save_submission_index('alice')
+
+    normalized = []
+    from_api = Submission.from_api
+    monkeypatch.setattr(Submission, 'from_api', classmethod(
+        lambda cls, payload, debug_mode=False: normalized.append(payload) or from_api(payload, debug_mode)))
+    fetcher = make_fetcher(server.base_url)
+
+    merged = fetcher.fetch_incremental_data('alice', rows[50:], page_size=20)
+
+    assert len(merged) == 200
+    assert len(normalized) == 60  # The three REST pages fetched, each row once
+    assert fetcher.cached_submission_records('alice', merged) is None
+    assert len(fetcher.get_submission_records('alice', merged)) == 200
+
+
+def test_incremental_sync_with_nothing_new_keeps_the_snapshot(serve, rest_fixture):
+    server = serve(rest_fixture)
+    rows = rest_fixture.rest_submissions
+    fetcher = make_fetcher(server.base_url)
+
+    merged = fetcher.fetch_incremental_data('alice', rows, page_size=20)
+
+    assert merged is rows
+    assert fetcher.last_incremental_delta == []
+    assert server.stats['rest:submissions'] == 1
+
+
+def test_bulk_incremental_run_matches_a_full_run(serve, rest_fixture, workdir):
+    server = serve(rest_fixture)
+    username = rest_fixture.username
+    rows = rest_fixture.rest_submissions
+    rest_fixture.rest_submissions = rows[60:]
+
+    assert run_account(server, username)['status'] == 'ok'
+    rest_fixture.rest_submissions = rows
+    result = run_account(server, username, incremental=True)
+
+    assert result['status'] == 'ok' and result['total_submissions'] == 200
+    assert 'rebuilding' not in (workdir / f'{username}_fetch_log.txt').read_text(encoding='utf-8')
+    incremental = read_snapshot(f'{username}_comprehensive_leetcode_data.json')
+    state = json.loads((workdir / f'{username}_analysis_state.json').read_text())
+    assert ids(incremental['submission_history']) == ids(rows)
+
+    for path in workdir.glob(f'{username}_*'):
+        path.unlink()
+    assert run_account(server, username)['status'] == 'ok'
+
+    full = read_snapshot(f'{username}_comprehensive_leetcode_data.json')
+    assert full['comprehensive_analysis'] == incremental['comprehensive_analysis']
+    assert json.loads((workdir / f'{username}_analysis_state.json').read_text()) == state
+
+
+@pytest.mark.parametrize('failure', ['error', 'max_pages'])
+def test_incremental_sync_never_merges_a_delta_with_a_gap(serve, rest_fixture, failure):
+    server = serve(rest_fixture, fail_offsets=[20] if failure == 'error' else [])
+    rows = rest_fixture.rest_submissions
+    fetcher = make_fetcher(server.base_url)
+
+    with pytest.raises(RuntimeError, match='before reaching the saved snapshot'):
+        fetcher.fetch_incremental_data('alice', rows[50:], max_pages=None if failure == 'error' else 2,
+                                       page_size=20)
+    assert 'alice' not in fetcher.submission_records
+
+
+def test_incremental_run_after_a_failed_page_recovers_every_row(serve, rest_fixture, workdir):
+    server = serve(rest_fixture, fail_offsets=[20])
+    username = rest_fixture.username
+    rows = rest_fixture.rest_submissions
+    snapshot_file = workdir / f'{username}_comprehensive_leetcode_data.json'
+    snapshot_file.write_text(json.dumps({'metadata': {'username': username}, 'submission_history': rows[50:]}))
+
+    result = run_account(server, username, incremental=True)
+
+    assert result['status'] == 'error'
+    assert ids(read_snapshot(str(snapshot_file))['submission_history']) == ids(rows[50:])
+
+    server.fail_offsets.clear()
+    result = run_account(server, username, incremental=True)
+
+    assert result['status'] == 'ok' and result['total_submissions'] == 200
+    assert ids(read_snapshot(str(snapshot_file))['submission_history']) == ids(rows)
+
+
+def test_stream_run_saves_the_same_outputs_and_state_as_a_full_run(serve, rest_fixture, workdir):
+    server = serve(rest_fixture)
+    username = rest_fixture.username
+    rows = rest_fixture.rest_submissions
+
+    result = run_account(server, username, stream=True)
+
+    assert result['status'] == 'ok' and result['total_submissions'] == 200
+    streamed = read_snapshot(f'{username}_comprehensive_leetcode_data.json')
+    assert streamed['submission_history_file'] == f'{username}_submissions.jsonl'
+    assert ids(streamed['submission_history']) == ids(rows)
+    for state in ('analysis_state', 'problem_timeline', 'submission_index'):
+        assert (workdir / f'{username}_{state}.json').exists()
+    assert not list(workdir.glob('*.tmp'))
+
+    rest_fixture.rest_submissions = [dict(rows[0], id=rows[0]['id'] + 10 ** 9, timestamp=rows[0]['timestamp'] + 1)] + rows
+    result = run_account(server, username, incremental=True)
+
+    assert result['status'] == 'ok' and result['total_submissions'] == 201
+    assert 'rebuilding' not in (workdir / f'{username}_fetch_log.txt').read_text(encoding='utf-8')
+
+
+def test_stream_run_honours_the_selected_outputs(serve, rest_fixture, workdir):
+    server = serve(rest_fixture)
+    username = rest_fixture.username
+
+    assert run_account(server, username, stream=True, outputs=['compressed', 'csv'])['status'] == 'ok'
+
+    assert ids(read_snapshot(f'{username}_comprehensive_leetcode_data.lcsnap')['submission_history']) == \
+        ids(rest_fixture.rest_submissions)
+    with open(f'{username}_submissions_data.csv', encoding='utf-8') as f:
+        assert len(f.readlines()) == 201
+    assert not (workdir / f'{username}_comprehensive_leetcode_data.json').exists()
+    assert not (workdir / f'{username}_detailed_report.txt').exists()
+
+
+@pytest.mark.parametrize('failure', ['error', 'empty'])
+def test_failed_stream_run_leaves_the_saved_files_unchanged(serve, rest_fixture, workdir, failure):
+    server = serve(rest_fixture)
+    username = rest_fixture.username
+    rows = rest_fixture.rest_submissions
+    assert run_account(server, username, stream=True)['status'] == 'ok'
+    saved = saved_files(workdir, username)
+
+    if failure == 'error':
+        server.fail_offsets.add(40)
+    else:
+        rest_fixture.rest_submissions = []
+    result = run_account(server, username, stream=True)
+
+    assert result['status'] == 'error'
+    assert saved_files(workdir, username) == saved
+    assert not list(workdir.glob('*.tmp'))
+    assert ids(read_snapshot(f'{username}_comprehensive_leetcode_data.json')['submission_history']) == ids(rows)